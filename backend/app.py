@@ -1,21 +1,64 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 from flask_cors import CORS
+import json
 import logging
+import os
+import time
 
 from utils.number_formatting import (
     format_with_sig_figs,
     format_with_rounding,
+    format_batch,
+    enable_format_cache,
+    clear_format_cache,
+    format_cache_stats,
 )
+from utils.dataframe_operations import (
+    ARROW_STREAM_MIMETYPE,
+    process_dataframe,
+    aggregate_dataframe,
+    transform_dataframe,
+    stream_dataframe,
+    read_ndjson_chunks,
+    read_csv_chunks,
+    enable_result_cache,
+    clear_result_cache,
+    result_cache_stats,
+    enable_dataset_registry,
+    register_dataset,
+    dataset_info,
+    drop_dataset,
+    list_datasets,
+    dataset_registry_stats,
+)
+from utils.dataset_registry import DatasetNotFoundError
+from utils.json_serialization import JSONProvider, dumps as dumps_json, use_json_encoder
+from utils.metrics import (
+    PROMETHEUS_MIMETYPE,
+    RequestProfile,
+    enable_metrics,
+    observe_request,
+    render_metrics,
+    span,
+)
+from utils.result_cache import fingerprint_data
 
 # Initialize Flask app
 app = Flask(__name__)
 
+# JSON responses: 'auto' encodes with orjson when it is installed, else with
+# the standard library ('orjson' or 'stdlib' to force one)
+app.config['JSON_ENCODER'] = os.environ.get('JSON_ENCODER', 'auto')
+use_json_encoder(app.config['JSON_ENCODER'])
+app.json = JSONProvider(app)
+
 # Configure CORS for React frontend
 CORS(app, resources={
     r"/api/*": {
         "origins": ["http://localhost:5173", "http://127.0.0.1:5173", "http://localhost:3000"],
         "methods": ["GET", "POST", "PUT", "DELETE"],
-        "allow_headers": ["Content-Type"]
+        "allow_headers": ["Content-Type", "X-Profile"],
+        "expose_headers": ["X-Dataset-Id"]
     }
 })
 
@@ -23,6 +66,90 @@ CORS(app, resources={
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Number formatting cache: maximum number of memoized results, 0 disables it
+app.config['FORMAT_CACHE_SIZE'] = int(os.environ.get('FORMAT_CACHE_SIZE', 0))
+if app.config['FORMAT_CACHE_SIZE'] > 0:
+    enable_format_cache(app.config['FORMAT_CACHE_SIZE'])
+
+# Dataset registry: memory budget in bytes (off by default; set it to enable
+# the registry), idle TTL, an optional directory of Arrow files shared by all
+# workers, and the filters on a column after which it is indexed (0 disables
+# indexing)
+app.config['DATASET_REGISTRY_BYTES'] = int(os.environ.get('DATASET_REGISTRY_BYTES', 0))
+app.config['DATASET_TTL_SECONDS'] = float(os.environ.get('DATASET_TTL_SECONDS', 3600))
+app.config['DATASET_REGISTRY_DIR'] = os.environ.get('DATASET_REGISTRY_DIR') or None
+app.config['DATASET_INDEX_AFTER'] = int(os.environ.get('DATASET_INDEX_AFTER', 3))
+if app.config['DATASET_REGISTRY_BYTES'] > 0:
+    enable_dataset_registry(
+        app.config['DATASET_REGISTRY_BYTES'],
+        ttl_seconds=app.config['DATASET_TTL_SECONDS'],
+        directory=app.config['DATASET_REGISTRY_DIR'],
+        index_after=app.config['DATASET_INDEX_AFTER'] or None
+    )
+
+# Worker processes for large mergeable aggregations, 1 keeps them in-process
+app.config['AGGREGATION_WORKERS'] = int(os.environ.get('AGGREGATION_WORKERS', 1))
+
+# Dataframe result cache: memory budget in bytes (0 disables it), plus an
+# optional directory and budget for its on-disk Arrow tier
+app.config['RESULT_CACHE_BYTES'] = int(os.environ.get('RESULT_CACHE_BYTES', 0))
+app.config['RESULT_CACHE_DIR'] = os.environ.get('RESULT_CACHE_DIR') or None
+app.config['RESULT_CACHE_DISK_BYTES'] = int(os.environ.get('RESULT_CACHE_DISK_BYTES', 2 * 1024 ** 3))
+if app.config['RESULT_CACHE_BYTES'] > 0:
+    enable_result_cache(
+        app.config['RESULT_CACHE_BYTES'],
+        directory=app.config['RESULT_CACHE_DIR'],
+        max_disk_bytes=app.config['RESULT_CACHE_DISK_BYTES']
+    )
+
+# Metrics: request latency histograms and utility spans served on /metrics,
+# and whether a request may ask for its own profile with ?profile=1 or an
+# X-Profile: 1 header (off by default, as profiles expose code paths)
+app.config['METRICS_ENABLED'] = os.environ.get('METRICS_ENABLED', '1') == '1'
+app.config['REQUEST_PROFILING'] = os.environ.get('REQUEST_PROFILING', '0') == '1'
+if app.config['METRICS_ENABLED']:
+    enable_metrics()
+
+
+# Instrumentation
+@app.before_request
+def start_request_timing():
+    g.request_start = time.perf_counter()
+    if app.config['REQUEST_PROFILING'] and '1' in (request.args.get('profile'), request.headers.get('X-Profile')):
+        g.profile = RequestProfile().start()
+
+
+@app.after_request
+def finish_request_timing(response):
+    """
+    Record the request latency (for streamed responses, up to the start of the
+    stream) and attach the profile of a profiled request: a Server-Timing
+    header with the span totals, and a "profile" field in JSON object bodies.
+    """
+    route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    observe_request(route, request.method, response.status_code, time.perf_counter() - g.request_start)
+    
+    profile = g.pop('profile', None)
+    if profile is None:
+        return response
+    profile.stop()
+    response.headers['Server-Timing'] = profile.server_timing()
+    if response.is_json and not response.is_streamed:
+        body = response.get_json(silent=True)
+        if isinstance(body, dict):
+            body['profile'] = _profile_response(profile)
+            response.set_data(app.json.dumps(body))
+    return response
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """
+    Request latency histograms (by route, method and status), span duration
+    histograms and rows handled by span, in the Prometheus text format
+    """
+    return Response(render_metrics(), content_type=PROMETHEUS_MIMETYPE), 200
+
 
 # Number Formatting Endpoints
 @app.route('/api/format/sig-figs', methods=['POST'])
@@ -44,7 +171,9 @@ def format_significant_figures():
         if value is None or sig_figs is None:
             return jsonify({'error': 'Missing required fields: value, sigFigs'}), 400
         
-        result = format_with_sig_figs(value, sig_figs)
+        # Spans are per request, not per value: format_batch formats many
+        with span('format.sig_figs'):
+            result = format_with_sig_figs(value, sig_figs)
         
         return jsonify({
             'original': value,
@@ -76,7 +205,8 @@ def format_rounding():
         if value is None or decimal_places is None:
             return jsonify({'error': 'Missing required fields: value, decimalPlaces'}), 400
         
-        result = format_with_rounding(value, decimal_places)
+        with span('format.rounding'):
+            result = format_with_rounding(value, decimal_places)
         
         return jsonify({
             'original': value,
@@ -89,5 +219,567 @@ def format_rounding():
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/format/batch', methods=['POST'])
+def format_batch_endpoint():
+    """
+    Format many numbers in one request
+
+    Request body, either a list of items:
+    {
+        "items": [
+            {"value": 123.456, "mode": "sigFigs", "sigFigs": 3},
+            {"value": 0.00123, "mode": "sigFigs", "sigFigs": 2, "notation": "scientific", "indicator": " x 10"},
+            {"value": 123.456789, "mode": "rounding", "decimalPlaces": 2}
+        ]
+    }
+
+    or a column of values sharing the same options:
+    {
+        "values": [123.456, 0.00123, 1000],
+        "mode": "sigFigs",
+        "sigFigs": 3
+    }
+
+    Results are returned in request order; items that cannot be formatted
+    carry an "error" instead of "formatted".
+    """
+    try:
+        data = request.get_json()
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Request body must be a JSON object'}), 400
+
+        if 'items' in data:
+            items = data.get('items')
+            if not isinstance(items, list):
+                return jsonify({'error': 'items must be a list'}), 400
+        elif 'values' in data:
+            values = data.get('values')
+            if not isinstance(values, list):
+                return jsonify({'error': 'values must be a list'}), 400
+            options = {key: option for key, option in data.items() if key != 'values'}
+            items = [dict(options, value=value) for value in values]
+        else:
+            return jsonify({'error': 'Missing required field: items or values'}), 400
+
+        results = format_batch([_parse_batch_item(item) for item in items])
+
+        return jsonify({
+            'results': results,
+            'count': len(results),
+            'errorCount': sum(1 for result in results if 'error' in result)
+        }), 200
+
+    except Exception as e:
+        logger.error(f"Error in format_batch_endpoint: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+def _parse_batch_item(item):
+    """Translate a batch request item into the keyword form used by format_batch."""
+    if not isinstance(item, dict):
+        return {'value': item, 'mode': None}
+
+    mode = item.get('mode')
+    if mode is None:
+        mode = 'rounding' if 'decimalPlaces' in item and 'sigFigs' not in item else 'sigFigs'
+
+    if mode == 'sigFigs':
+        mode, precision = 'sig_figs', item.get('sigFigs')
+    else:
+        precision = item.get('decimalPlaces')
+
+    return {
+        'value': item.get('value'),
+        'mode': mode,
+        'precision': precision,
+        'force_scientific': item.get('notation') == 'scientific',
+        'indicator': item.get('indicator')
+    }
+
+
+@app.route('/api/format/cache', methods=['GET'])
+def get_format_cache_stats():
+    """
+    Report number formatting cache statistics
+
+    Response body:
+    {
+        "enabled": true,
+        "hits": 120,
+        "misses": 30,
+        "evictions": 0,
+        "size": 30,
+        "maxSize": 10000
+    }
+    """
+    stats = format_cache_stats()
+    if stats is None:
+        return jsonify({'enabled': False}), 200
+
+    return jsonify({
+        'enabled': True,
+        'hits': stats['hits'],
+        'misses': stats['misses'],
+        'evictions': stats['evictions'],
+        'size': stats['size'],
+        'maxSize': stats['max_size']
+    }), 200
+
+
+@app.route('/api/format/cache', methods=['DELETE'])
+def clear_format_cache_endpoint():
+    """
+    Drop all cached formatting results and reset the counters
+    """
+    clear_format_cache()
+    return jsonify({'cleared': True}), 200
+
+
+# Dataframe Endpoints
+#
+# Each endpoint takes a JSON body with "data" (records, columnar or split) and its
+# options, or an Arrow IPC stream body (Content-Type: application/vnd.apache.arrow.stream)
+# with the options as JSON-encoded query parameters. Results are JSON unless
+# "dataFormat" is "arrow" or the request prefers Arrow in its Accept header.
+@app.route('/api/dataframe/process', methods=['POST'])
+def process_dataframe_endpoint():
+    """
+    Process dataframe with operations
+    
+    Request body:
+    {
+        "data": [{"col1": 1, "col2": "a"}, {"col1": 2, "col2": "b"}],
+        "operations": [
+            {"type": "filter", "column": "col1", "condition": "greater_than", "value": 1}
+        ],
+        "explain": false,
+        "dataFormat": "records"
+    }
+    
+    "data" can be replaced by "datasetId" of a registered dataset, and
+    "storeResult": true registers the result and returns its "datasetId".
+    "compact": true (or "arrow") stores the input in compact dtypes before
+    processing and reports the bytes saved in "memory". The same applies to
+    the aggregate and transform endpoints.
+    """
+    try:
+        data, params = _read_dataframe_request()
+        dataset_id = _request_dataset_id(data, params)
+        if data is None and dataset_id is None:
+            return jsonify({'error': 'Missing required field: data or datasetId'}), 400
+        
+        result = process_dataframe(
+            data,
+            params.get('operations'),
+            explain=bool(params.get('explain', False)),
+            data_format=_response_data_format(params),
+            data_key=_request_data_key(data, params),
+            dataset_id=dataset_id,
+            store_result=bool(params.get('storeResult', False)),
+            compact=params.get('compact', False)
+        )
+        return _dataframe_response(result)
+    
+    except DatasetNotFoundError as e:
+        return jsonify({'error': str(e)}), 404
+    
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    except Exception as e:
+        logger.error(f"Error in process_dataframe_endpoint: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/dataframe/aggregate', methods=['POST'])
+def aggregate_dataframe_endpoint():
+    """
+    Aggregate dataframe
+    
+    Request body:
+    {
+        "data": [{"category": "A", "sales": 100}, {"category": "A", "sales": 200}],
+        "groupBy": ["category"],
+        "aggregations": {"sales": "sum"}
+    }
+    """
+    try:
+        data, params = _read_dataframe_request()
+        dataset_id = _request_dataset_id(data, params)
+        if data is None and dataset_id is None:
+            return jsonify({'error': 'Missing required field: data or datasetId'}), 400
+        
+        result = aggregate_dataframe(
+            data,
+            params.get('groupBy'),
+            params.get('aggregations'),
+            data_format=_response_data_format(params),
+            workers=app.config['AGGREGATION_WORKERS'],
+            data_key=_request_data_key(data, params),
+            dataset_id=dataset_id,
+            store_result=bool(params.get('storeResult', False)),
+            compact=params.get('compact', False)
+        )
+        return _dataframe_response(result)
+    
+    except DatasetNotFoundError as e:
+        return jsonify({'error': str(e)}), 404
+    
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    except Exception as e:
+        logger.error(f"Error in aggregate_dataframe_endpoint: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/dataframe/transform', methods=['POST'])
+def transform_dataframe_endpoint():
+    """
+    Transform dataframe
+    
+    Request body:
+    {
+        "data": [{"value": 10}, {"value": 20}],
+        "transformations": [
+            {"type": "calculate", "name": "doubled", "expression": "value * 2"}
+        ],
+        "explain": false
+    }
+    
+    With "explain": true the response is the execution plan: the fused
+    steps and the transformations eliminated as dead writes.
+    """
+    try:
+        data, params = _read_dataframe_request()
+        dataset_id = _request_dataset_id(data, params)
+        if data is None and dataset_id is None:
+            return jsonify({'error': 'Missing required field: data or datasetId'}), 400
+        
+        result = transform_dataframe(
+            data,
+            params.get('transformations'),
+            explain=bool(params.get('explain', False)),
+            data_format=_response_data_format(params),
+            data_key=_request_data_key(data, params),
+            dataset_id=dataset_id,
+            store_result=bool(params.get('storeResult', False)),
+            compact=params.get('compact', False)
+        )
+        return _dataframe_response(result)
+    
+    except DatasetNotFoundError as e:
+        return jsonify({'error': str(e)}), 404
+    
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    except Exception as e:
+        logger.error(f"Error in transform_dataframe_endpoint: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/dataframe/stream', methods=['POST'])
+def stream_dataframe_endpoint():
+    """
+    Filter and transform a dataset too large to hold in memory
+    
+    The body is newline-delimited JSON (Content-Type: application/x-ndjson) or
+    CSV (Content-Type: text/csv). It is read and processed chunkSize rows at a
+    time and the result is streamed back as newline-delimited JSON.
+    
+    The first output chunk is computed before the response starts, so malformed
+    input or an operation that fails on it gets an error response. An error on
+    a later chunk ends the stream with a final {"error": ..., "truncated": true}
+    record instead of silently cutting it short.
+    
+    Query parameters:
+        operations: JSON list of row-local operations (filter, select, rename,
+                    add_column, calculate, fill_na, drop_na, convert_type,
+                    apply_function)
+        chunkSize: Rows per chunk (default 10000)
+    """
+    try:
+        operations = json.loads(request.args.get('operations', '[]'))
+        chunk_size = int(request.args.get('chunkSize', 10000))
+        
+        if request.mimetype == 'text/csv':
+            chunks = read_csv_chunks(request.stream, chunk_size)
+        elif request.mimetype == 'application/x-ndjson':
+            chunks = read_ndjson_chunks(request.stream, chunk_size)
+        else:
+            return jsonify({'error': 'Content-Type must be application/x-ndjson or text/csv'}), 415
+        
+        # Validates the operations before anything is streamed
+        output_chunks = stream_dataframe(chunks, operations)
+        first_chunk = next(output_chunks, None)
+    
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    except Exception as e:
+        logger.error(f"Error in stream_dataframe_endpoint: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+    
+    def generate():
+        try:
+            if first_chunk is not None:
+                yield first_chunk.to_json(orient='records', lines=True).rstrip('\n') + '\n'
+            for chunk in output_chunks:
+                yield chunk.to_json(orient='records', lines=True).rstrip('\n') + '\n'
+        except Exception as e:
+            # The status line has gone out; end the body with an error record
+            logger.error(f"Error in stream_dataframe_endpoint after streaming began: {str(e)}")
+            yield json.dumps({'error': str(e), 'truncated': True}) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson'), 200
+
+
+@app.route('/api/dataframe/cache', methods=['GET'])
+def get_result_cache_stats():
+    """
+    Report dataframe result cache statistics
+    
+    Response body:
+    {
+        "enabled": true,
+        "memory": {"hits": 12, "misses": 4, "evictions": 0, "size": 4,
+                   "maxSize": 10000, "bytes": 5242880, "maxBytes": 268435456},
+        "disk": {"enabled": false, "hits": 0, "misses": 0, "evictions": 0,
+                 "size": 0, "bytes": 0, "maxBytes": 2147483648}
+    }
+    """
+    stats = result_cache_stats()
+    if stats is None:
+        return jsonify({'enabled': False}), 200
+    
+    memory, disk = stats['memory'], stats['disk']
+    return jsonify({
+        'enabled': True,
+        'memory': {
+            'hits': memory['hits'],
+            'misses': memory['misses'],
+            'evictions': memory['evictions'],
+            'size': memory['size'],
+            'maxSize': memory['max_size'],
+            'bytes': memory['bytes'],
+            'maxBytes': memory['max_bytes']
+        },
+        'disk': {
+            'enabled': disk['enabled'],
+            'hits': disk['hits'],
+            'misses': disk['misses'],
+            'evictions': disk['evictions'],
+            'size': disk['size'],
+            'bytes': disk['bytes'],
+            'maxBytes': disk['max_bytes']
+        }
+    }), 200
+
+
+@app.route('/api/dataframe/cache', methods=['DELETE'])
+def clear_result_cache_endpoint():
+    """
+    Drop all cached dataframe results, including files on disk, and reset the counters
+    """
+    clear_result_cache()
+    return jsonify({'cleared': True}), 200
+
+
+# Dataset Registry Endpoints
+@app.route('/api/datasets', methods=['POST'])
+def register_dataset_endpoint():
+    """
+    Register a table once so operations can reference it by datasetId
+    
+    Request body (or an Arrow IPC stream with ?name=...):
+    {
+        "data": [{"site": "A", "value": 1.5}, ...],
+        "name": "march-extract",
+        "compact": false
+    }
+    
+    Response body (201):
+    {
+        "datasetId": "4f1c...", "name": "march-extract", "shape": [1000, 2],
+        "columns": ["site", "value"], "dtypes": {...}, "bytes": 74128, "expiresIn": 3600
+    }
+    
+    With "compact": true (or "arrow") the table is stored in compact dtypes
+    and the response adds "memory" with originalBytes, compactBytes and
+    savedBytes.
+    """
+    try:
+        data, params = _read_dataframe_request()
+        if data is None:
+            return jsonify({'error': 'Missing required field: data'}), 400
+        
+        info = register_dataset(data, name=params.get('name'), compact=params.get('compact', False))
+        return jsonify(_dataset_response(info)), 201
+    
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    except Exception as e:
+        logger.error(f"Error in register_dataset_endpoint: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/datasets', methods=['GET'])
+def list_datasets_endpoint():
+    """
+    List the datasets held by this server process and the registry statistics
+    """
+    stats = dataset_registry_stats()
+    if stats is None:
+        return jsonify({'enabled': False, 'datasets': []}), 200
+    
+    return jsonify({
+        'enabled': True,
+        'datasets': [_dataset_response(info) for info in list_datasets()],
+        'size': stats['size'],
+        'bytes': stats['bytes'],
+        'maxBytes': stats['max_bytes'],
+        'ttlSeconds': stats['ttl_seconds'],
+        'evictions': stats['evictions'],
+        'expirations': stats['expirations'],
+        'shared': stats['shared'],
+        'indexes': stats['indexes'],
+        'indexBytes': stats['index_bytes'],
+        'indexedLookups': stats['indexed_lookups']
+    }), 200
+
+
+@app.route('/api/datasets/<dataset_id>', methods=['GET'])
+def get_dataset_endpoint(dataset_id):
+    """
+    Describe a registered dataset
+    """
+    try:
+        return jsonify(_dataset_response(dataset_info(dataset_id))), 200
+    
+    except DatasetNotFoundError as e:
+        return jsonify({'error': str(e)}), 404
+    
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+
+@app.route('/api/datasets/<dataset_id>', methods=['DELETE'])
+def drop_dataset_endpoint(dataset_id):
+    """
+    Remove a registered dataset
+    """
+    try:
+        if not drop_dataset(dataset_id):
+            return jsonify({'error': f'Dataset not found or expired: {dataset_id}'}), 404
+        return jsonify({'deleted': True}), 200
+    
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+
+def _dataset_response(info):
+    """API field names for a dataset description"""
+    response = {
+        'datasetId': info['dataset_id'],
+        'name': info['name'],
+        'shape': info['shape'],
+        'columns': info['columns'],
+        'dtypes': info['dtypes'],
+        'bytes': info['bytes'],
+        'expiresIn': info['expires_in']
+    }
+    if 'memory' in info:
+        response['memory'] = {
+            'originalBytes': info['memory']['original_bytes'],
+            'compactBytes': info['memory']['compact_bytes'],
+            'savedBytes': info['memory']['saved_bytes']
+        }
+    return response
+
+
+def _read_dataframe_request():
+    """
+    Split a dataframe request into its data and options.
+    
+    Returns:
+        tuple: (data, params) where data is the JSON "data" field or the raw
+               Arrow IPC stream bytes, and params holds the remaining options.
+    """
+    if request.mimetype == ARROW_STREAM_MIMETYPE:
+        params = {}
+        for key, value in request.args.items():
+            try:
+                params[key] = json.loads(value)
+            except ValueError:
+                params[key] = value  # plain strings such as dataFormat=arrow
+        return request.get_data() or None, params
+    
+    body = request.get_json()
+    return body.get('data'), body
+
+
+def _request_dataset_id(data, params):
+    """ID of the registered dataset to use: datasetId when the request carries no data"""
+    if data is None:
+        return params.get('datasetId')
+    return None
+
+
+def _request_data_key(data, params):
+    """
+    Identity of the request's input data for the result cache: the client's
+    datasetId and datasetVersion when both are given, else a hash of the data
+    alone (the Arrow IPC body as received, or the JSON encoding of the "data"
+    field), so output options such as dataFormat share one entry. None when
+    the cache is disabled or the request has no data; registered datasets are
+    identified by the library.
+    """
+    if app.config['RESULT_CACHE_BYTES'] <= 0:
+        return None
+    if params.get('datasetId') is not None and params.get('datasetVersion') is not None:
+        return f"dataset:{params['datasetId']}@{params['datasetVersion']}"
+    if data is None:
+        return None
+    if not isinstance(data, (bytes, bytearray, memoryview)):
+        data = dumps_json(data)
+    return 'data:' + fingerprint_data(data)
+
+
+def _response_data_format(params):
+    """Output data format: explicit dataFormat, else Arrow if the client prefers it, else records"""
+    if params.get('dataFormat'):
+        return params['dataFormat']
+    preferred = request.accept_mimetypes.best_match(['application/json', ARROW_STREAM_MIMETYPE])
+    return 'arrow' if preferred == ARROW_STREAM_MIMETYPE else 'records'
+
+
+def _profile_response(profile):
+    """API form of a stopped RequestProfile"""
+    summary = profile.summary()
+    return {
+        'totalSeconds': summary['total_seconds'],
+        'spans': summary['spans'],
+        'functions': [
+            {
+                'function': function['function'],
+                'calls': function['calls'],
+                'totalSeconds': function['total_seconds'],
+                'cumulativeSeconds': function['cumulative_seconds']
+            }
+            for function in summary['functions']
+        ]
+    }
+
+
+def _dataframe_response(result):
+    """JSON response, or the bare Arrow IPC stream (with any datasetId in X-Dataset-Id) when the result data is Arrow"""
+    if isinstance(result.get('data'), bytes):
+        headers = {'X-Dataset-Id': result['datasetId']} if 'datasetId' in result else {}
+        return Response(result['data'], mimetype=ARROW_STREAM_MIMETYPE, headers=headers), 200
+    return jsonify(result), 200
+
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
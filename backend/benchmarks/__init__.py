@@ -0,0 +1,4 @@
+"""
+Micro-benchmarks for the backend utilities.
+Run from the backend directory, e.g. python -m benchmarks.string_scanning
+"""
@@ -0,0 +1,70 @@
+"""
+Compare JSON and Arrow IPC transport for process_dataframe at several row counts.
+
+Each round trip includes encoding the request body, running a filter + select,
+and encoding the response body, as the Flask endpoint does.
+
+Usage (from the backend directory, requires pyarrow):
+    python -m benchmarks.arrow_transport
+"""
+
+import json
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from utils.dataframe_operations import dump_dataframe, process_dataframe
+
+OPERATIONS = [
+    {'type': 'filter', 'column': 'value', 'condition': 'greater_than', 'value': 0},
+    {'type': 'select', 'columns': ['site', 'unit', 'value', 'count']},
+]
+
+
+def make_extract(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Report-like extract: low-cardinality text, floats, integers and timestamps."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'site': rng.choice([f'site-{i}' for i in range(50)], rows),
+        'unit': rng.choice(['mg/L', 'ug/L', 'pH', 'NTU'], rows),
+        'value': rng.normal(0, 10, rows),
+        'count': rng.integers(0, 1000, rows),
+        'sampled_at': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 10 ** 6, rows), unit='s'),
+    })
+
+
+def json_round_trip(body: str, data_format: str) -> str:
+    request = json.loads(body)
+    result = process_dataframe(request['data'], request['operations'], data_format=data_format)
+    return json.dumps(result)
+
+
+def arrow_round_trip(body: bytes) -> bytes:
+    return process_dataframe(body, OPERATIONS, data_format='arrow')['data']
+
+
+def best_time(function, *args, repeat: int = 3) -> float:
+    return min(timeit.repeat(lambda: function(*args), number=1, repeat=repeat))
+
+
+def main() -> None:
+    print(f'{"rows":>8}{"format":>10}{"request (KB)":>14}{"response (KB)":>15}{"time (ms)":>11}')
+    for rows in (1000, 10000, 100000, 500000):
+        df = make_extract(rows)
+        df['sampled_at'] = df['sampled_at'].astype(str)  # JSON has no timestamp type
+
+        for data_format in ('records', 'columnar'):
+            body = json.dumps({'data': dump_dataframe(df, data_format), 'operations': OPERATIONS})
+            response = json_round_trip(body, data_format)
+            elapsed = best_time(json_round_trip, body, data_format)
+            print(f'{rows:>8}{data_format:>10}{len(body) / 1024:>14.0f}{len(response) / 1024:>15.0f}{elapsed * 1000:>11.1f}')
+
+        body = dump_dataframe(make_extract(rows), 'arrow')
+        response = arrow_round_trip(body)
+        elapsed = best_time(arrow_round_trip, body)
+        print(f'{rows:>8}{"arrow":>10}{len(body) / 1024:>14.0f}{len(response) / 1024:>15.0f}{elapsed * 1000:>11.1f}')
+
+
+if __name__ == '__main__':
+    main()
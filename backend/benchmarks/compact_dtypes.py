@@ -0,0 +1,66 @@
+"""
+Compare memory and operation times of an extract before and after compact_dataframe.
+
+The extract has low-cardinality text (sites, units, status codes), a unique
+sample ID and small integers, as report extracts usually do. Each operation's
+result on the compacted frame is checked against the original before timing.
+
+Usage (from the backend directory):
+    python -m benchmarks.compact_dtypes
+"""
+
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from utils.dataframe_operations import aggregate_dataframe, compact_dataframe, process_dataframe
+
+OPERATIONS = {
+    'groupby': lambda df: aggregate_dataframe(df, ['site', 'unit'], {'value': 'mean', 'count': 'sum'},
+                                              'columnar'),
+    'equals': lambda df: process_dataframe(df, [
+        {'type': 'filter', 'column': 'status', 'condition': 'equals', 'value': 'FLAGGED'}], data_format='columnar'),
+    'contains': lambda df: process_dataframe(df, [
+        {'type': 'filter', 'column': 'site', 'condition': 'contains', 'value': 'Creek'}], data_format='columnar'),
+}
+
+
+def make_extract(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    sites = np.array([f'{name} {kind} {i}' for i, (name, kind) in enumerate(
+        (name, kind) for name in ('Cedar', 'Mill', 'Stone', 'Willow', 'Bear') for kind in ('Creek', 'Lake', 'Well')
+    )], dtype=object)
+    return pd.DataFrame({
+        'sample_id': np.array([f'S{i:08d}' for i in range(rows)], dtype=object),
+        'site': sites[rng.integers(0, len(sites), rows)],
+        'unit': np.array(['mg/L', 'ug/L', 'pH', 'NTU'], dtype=object)[rng.integers(0, 4, rows)],
+        'status': np.array(['OK', 'FLAGGED', 'REJECTED'], dtype=object)[rng.integers(0, 3, rows)],
+        'count': rng.integers(0, 1000, rows),
+        'value': rng.normal(0, 10, rows),
+    })
+
+
+def main() -> None:
+    print(f'{"rows":>10}{"mode":>8}{"MB":>9}{"saved (MB)":>12}'
+          + ''.join(f'{f"{name} (ms)":>16}' for name in OPERATIONS))
+    for rows in (100000, 1000000):
+        df = make_extract(rows)
+        frames = {'none': (df, None)}
+        frames['compact'] = compact_dataframe(df)
+        frames['arrow'] = compact_dataframe(df, arrow_strings=True)
+        expected = {name: operation(df)['data'] for name, operation in OPERATIONS.items()}
+
+        for mode, (frame, report) in frames.items():
+            timings = []
+            for name, operation in OPERATIONS.items():
+                assert operation(frame)['data'] == expected[name], (mode, name)
+                timings.append(min(timeit.repeat(lambda: operation(frame), number=1, repeat=3)))
+            nbytes = report['compact_bytes'] if report else frame.memory_usage(deep=True).sum()
+            saved = report['saved_bytes'] if report else 0
+            print(f'{rows:>10}{mode:>8}{nbytes / 1e6:>9.1f}{saved / 1e6:>12.1f}'
+                  + ''.join(f'{t * 1000:>16.1f}' for t in timings))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Compare repeated filters on a registered dataset with and without column indexes.
+
+Interactive report editing re-runs filters on the same columns with changing
+values. The extract is registered once and filtered by dataset ID, which
+builds and then uses the indexes, and filtered as a DataFrame, which scans.
+Results are checked against the scanning path first.
+
+Usage (from the backend directory):
+    python -m benchmarks.indexed_filtering
+"""
+
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from utils.dataframe_operations import enable_dataset_registry, process_dataframe, register_dataset
+
+FILTERS = {
+    'equals': lambda rng: [{'type': 'filter', 'column': 'sample_id', 'condition': 'equals',
+                            'value': f'S{rng.integers(0, 1000000):08d}'}],
+    'range': lambda rng: [{'type': 'filter', 'column': 'value', 'condition': 'greater_than',
+                           'value': float(rng.uniform(39, 40))}],
+}
+
+
+def make_extract(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'sample_id': np.array([f'S{i:08d}' for i in range(rows)], dtype=object),
+        'site': rng.integers(0, 500, rows),
+        'value': rng.normal(0, 10, rows),
+    })
+
+
+def run(df: pd.DataFrame, dataset_id: str, make_operations, seed: int = 1) -> list:
+    """Results of 20 filters with different values, by dataset ID when given"""
+    rng = np.random.default_rng(seed)
+    return [process_dataframe(df, make_operations(rng), data_format='split', dataset_id=dataset_id)['data']
+            for _ in range(20)]
+
+
+def main() -> None:
+    print(f'{"rows":>10}{"filter":>8}{"scan (ms/filter)":>18}{"indexed (ms/filter)":>21}{"speedup":>9}')
+    enable_dataset_registry(index_after=1)
+    for rows in (100000, 1000000):
+        df = make_extract(rows)
+        dataset_id = register_dataset(df)['dataset_id']
+        for name, make_operations in FILTERS.items():
+            assert run(None, dataset_id, make_operations) == run(df, None, make_operations)
+            scan = min(timeit.repeat(lambda: run(df, None, make_operations), number=1, repeat=3)) / 20
+            index = min(timeit.repeat(lambda: run(None, dataset_id, make_operations), number=1, repeat=3)) / 20
+            print(f'{rows:>10}{name:>8}{scan * 1000:>18.2f}{index * 1000:>21.2f}{scan / index:>8.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Compare the standard library JSON encoder with orjson on API response bodies.
+
+Bodies are the Textract AnalyzeDocument fixture (etl2report/tests/assets) and
+process_dataframe results in the records and columnar formats. The baseline is
+Flask's default provider (what jsonify used before); the candidates are
+utils.json_serialization with each encoder. Outputs are checked to decode to
+the same value before timing. The orjson rows are skipped when it is not
+installed.
+
+Usage (from the backend directory):
+    python -m benchmarks.json_encoding
+"""
+
+import json
+import os
+import timeit
+
+import numpy as np
+import pandas as pd
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from utils import json_serialization
+from utils.dataframe_operations import process_dataframe
+
+FIXTURE = os.path.join(os.path.dirname(__file__), '..', '..', 'etl2report', 'tests', 'assets',
+                       'analyzeDocResponse.json')
+
+
+def make_extract(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'sample_id': [f'S{i:08d}' for i in range(rows)],
+        'site': rng.integers(0, 500, rows),
+        'analyte': rng.choice(['lead', 'copper', 'zinc', 'nitrate'], rows),
+        'value': np.where(rng.random(rows) < 0.05, np.nan, rng.normal(0, 10, rows)),
+        'detected': rng.random(rows) < 0.8,
+    })
+
+
+def main() -> None:
+    with open(FIXTURE) as f:
+        bodies = {'textract': json.load(f)}
+    df = make_extract(100000)
+    for data_format in ('records', 'columnar'):
+        bodies[f'{data_format} 100k'] = process_dataframe(df, [], data_format=data_format)
+    
+    flask_default = DefaultJSONProvider(Flask(__name__))
+    encoders = ['stdlib'] + (['orjson'] if json_serialization.orjson is not None else [])
+    
+    print(f'{"body":>16}{"flask (ms)":>12}' + ''.join(f'{f"{name} (ms)":>14}{"speedup":>9}' for name in encoders))
+    for name, body in bodies.items():
+        # Flask's default writes NaN, which is not JSON; the encoders write null
+        expected = json.loads(json_serialization._stdlib_dumps(body, True, False))
+        baseline = min(timeit.repeat(lambda: flask_default.dumps(body, separators=(',', ':')), number=1, repeat=5))
+        line = f'{name:>16}{baseline * 1000:>12.1f}'
+        for encoder in encoders:
+            json_serialization.use_json_encoder(encoder)
+            assert json.loads(json_serialization.dumps(body, sort_keys=True)) == expected
+            elapsed = min(timeit.repeat(lambda: json_serialization.dumps(body, sort_keys=True), number=1, repeat=5))
+            line += f'{elapsed * 1000:>14.1f}{baseline / elapsed:>8.1f}x'
+        print(line)
+    json_serialization.use_json_encoder('auto')
+
+
+if __name__ == '__main__':
+    main()
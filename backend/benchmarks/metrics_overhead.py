@@ -0,0 +1,112 @@
+"""
+Measure what recording metrics costs the instrumented paths.
+
+Each case runs alternately with metrics disabled (spans are a flag check) and
+enabled (spans time the step and update the histograms). Spans are recorded
+once per batch, request, operation or chunk, so their fixed cost is spread
+over every row the step handles: the report counts the spans a call records
+and, besides the measured difference (which is within timing noise), the
+overhead they account for at the measured cost of one span. Outputs are
+checked to be identical in both modes before timing.
+
+Usage (from the backend directory):
+    python -m benchmarks.metrics_overhead
+"""
+
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from utils import number_formatting
+from utils.dataframe_operations import process_dataframe
+from utils.metrics import RequestProfile, clear_metrics, disable_metrics, enable_metrics, span
+
+
+def batch_items(count: int, seed: int = 0) -> list:
+    """format_batch items mixing both modes, precisions and notations."""
+    rng = np.random.default_rng(seed)
+    values = rng.lognormal(0, 6, count) * rng.choice([-1, 1], count)
+    return [
+        {'value': float(value), 'mode': 'sig_figs' if index % 2 else 'rounding',
+         'precision': int(index % 5) + 1, 'force_scientific': index % 7 == 0}
+        for index, value in enumerate(values)
+    ]
+
+
+def sample_records(rows: int, seed: int = 0) -> list:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'region': rng.choice(['north', 'south', 'east', 'west'], rows),
+        'units': rng.integers(0, 1000, rows),
+        'price': rng.random(rows) * 100
+    }).to_dict(orient='records')
+
+
+def best_times(function, repeat: int = 15) -> tuple:
+    """Best wall time in seconds of one call with metrics disabled and enabled, measured alternately."""
+    disabled, enabled = [], []
+    try:
+        for _ in range(repeat):
+            disable_metrics()
+            disabled.append(timeit.timeit(function, number=1))
+            enable_metrics()
+            enabled.append(timeit.timeit(function, number=1))
+    finally:
+        disable_metrics()
+        clear_metrics()
+    return min(disabled), min(enabled)
+
+
+def spans_per_call(function) -> int:
+    """Number of spans one call records."""
+    profile = RequestProfile().start()
+    try:
+        function()
+    finally:
+        profile.stop()
+    return sum(entry['calls'] for entry in profile.summary(limit=0)['spans'])
+
+
+def main() -> None:
+    # Measure formatting itself, not the cache
+    number_formatting.disable_format_cache()
+    items = batch_items(20000)
+    records = sample_records(50000)
+    operations = [
+        {'type': 'filter', 'column': 'units', 'condition': 'greater_than', 'value': 100},
+        {'type': 'sort', 'columns': ['price'], 'ascending': False},
+        {'type': 'select', 'columns': ['region', 'price']}
+    ]
+    cases = [
+        (f'format_batch ({len(items)} items)', lambda: number_formatting.format_batch(items)),
+        (f'process_dataframe ({len(records)} rows, 3 ops)', lambda: process_dataframe(records, operations)),
+    ]
+
+    enable_metrics()
+    expected = [function() for _, function in cases]
+    disable_metrics()
+    for (name, function), result in zip(cases, expected):
+        assert str(function()) == str(result), name
+    print('identical output with metrics enabled and disabled')
+
+    def spans(count):
+        for _ in range(count):
+            with span('benchmark'):
+                pass
+
+    count = 100000
+    span_disabled, span_enabled = (seconds / count for seconds in best_times(lambda: spans(count), repeat=5))
+    print(f'one span: {span_disabled * 1e9:.0f} ns disabled, {span_enabled * 1e9:.0f} ns enabled')
+
+    print(f'{"case":<44}{"spans":>7}{"disabled (ms)":>15}{"enabled (ms)":>14}{"measured":>10}{"spans":>9}')
+    for name, function in cases:
+        recorded = spans_per_call(function)
+        disabled, enabled = best_times(function)
+        attributed = recorded * span_enabled / disabled * 100
+        print(f'{name:<44}{recorded:>7}{disabled * 1000:>15.2f}{enabled * 1000:>14.2f}'
+              f'{(enabled / disabled - 1) * 100:>9.1f}%{attributed:>8.3f}%')
+
+
+if __name__ == '__main__':
+    main()
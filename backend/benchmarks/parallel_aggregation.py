@@ -0,0 +1,59 @@
+"""
+Compare single-process and process-pool aggregate_dataframe on a grouped extract.
+
+Each run checks that the parallel result matches the single-process one before
+timing. Speedup depends on the cores available; on a single core the parallel
+path only adds partitioning and pickling overhead.
+
+Usage (from the backend directory):
+    python -m benchmarks.parallel_aggregation
+"""
+
+import os
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from utils.dataframe_operations import aggregate_dataframe
+
+AGGREGATIONS = {'value': 'mean', 'count': 'sum', 'reading': 'std', 'peak': 'max'}
+
+
+def make_extract(rows: int, groups: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'site': rng.integers(0, groups, rows),
+        'unit': rng.choice(['mg/L', 'ug/L', 'pH', 'NTU'], rows),
+        'value': rng.normal(0, 10, rows),
+        'count': rng.integers(0, 1000, rows),
+        'reading': np.where(rng.random(rows) < 0.1, np.nan, rng.normal(5, 2, rows)),
+        'peak': rng.normal(0, 1, rows),
+    })
+
+
+def aggregate(payload: dict, workers: int) -> pd.DataFrame:
+    result = aggregate_dataframe(payload, ['site', 'unit'], AGGREGATIONS, 'columnar', workers=workers)
+    return pd.DataFrame(result['data']['data'])
+
+
+def main() -> None:
+    cores = os.cpu_count() or 1
+    worker_counts = sorted({1, 2, 4, cores})
+    print(f'{cores} CPU(s)')
+    print(f'{"rows":>10}{"groups":>9}' + ''.join(f'{f"{w} worker(s) (ms)":>20}' for w in worker_counts))
+    for rows, groups in ((200000, 100), (1000000, 1000), (4000000, 100000)):
+        df = make_extract(rows, groups)
+        # Columnar payload of arrays, so timings are dominated by the aggregation
+        payload = {'data': {column: df[column].to_numpy() for column in df.columns}}
+
+        expected = aggregate(payload, 1)
+        timings = []
+        for workers in worker_counts:
+            pd.testing.assert_frame_equal(aggregate(payload, workers), expected, check_exact=False, rtol=1e-9)
+            timings.append(min(timeit.repeat(lambda: aggregate(payload, workers), number=1, repeat=3)))
+        print(f'{rows:>10}{groups:>9}' + ''.join(f'{t * 1000:>20.0f}' for t in timings))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Differential check and benchmark of the native rounding engine in
+utils.number_formatting against the sigfig package it replaced, which serves
+as the reference oracle.
+
+Usage (from the backend directory, requires sigfig):
+    python -m benchmarks.rounding_engine
+"""
+
+import random
+import timeit
+
+from sigfig import round as sigfig_round
+
+from utils.number_formatting import count_sig_figs, format_with_rounding, format_with_sig_figs
+
+
+def reference_format_with_sig_figs(value: float, sig_figs: int, force_scientific: bool = False) -> str:
+    """format_with_sig_figs as implemented on top of sigfig."""
+    value = float(value)
+    if force_scientific:
+        return sigfig_round(value, sig_figs, output_type=str, warn=False, notation='scientific')
+
+    standard_rounded_value = sigfig_round(value, sig_figs, output_type=str, warn=False, notation='standard')
+    if count_sig_figs(standard_rounded_value) < sig_figs:
+        return sigfig_round(value, sig_figs, output_type=str, warn=False, notation='scientific')
+    return standard_rounded_value
+
+
+def reference_format_with_rounding(value: float, decimal_places: int, use_scientific_notation: bool = False) -> str:
+    """format_with_rounding as implemented on top of sigfig."""
+    notation = 'scientific' if use_scientific_notation else 'standard'
+    return sigfig_round(float(value), decimals=decimal_places, output_type=str, warn=False, notation=notation)
+
+
+def random_values(count: int, seed: int = 0) -> list:
+    """Report-like values: ties, cents, integers, tiny and huge magnitudes, signed zeros."""
+    rng = random.Random(seed)
+    values = [0.0, -0.0, 0.15, 0.25, 0.5, 2.675, 9.99, -9.99, 1000.0, -110.0, 1e16, 1e-7, 5e-324, 1.7976931348623157e308]
+    while len(values) < count:
+        kind = rng.randrange(6)
+        sign = rng.choice([-1, 1])
+        if kind == 0:
+            values.append(sign * rng.lognormvariate(0, 10))
+        elif kind == 1:
+            values.append(sign * rng.randint(0, 10 ** 6) / 100)
+        elif kind == 2:
+            values.append(float(sign * rng.randint(0, 10 ** rng.randint(1, 18))))
+        elif kind == 3:
+            values.append(sign * (rng.randint(0, 999) + 0.5) * 10.0 ** rng.randint(-6, 6))
+        elif kind == 4:
+            values.append(sign * rng.random() * 10.0 ** rng.randint(-300, 300))
+        else:
+            values.append(float(f'{sign * rng.random():.{rng.randint(1, 4)}f}'))
+    return values
+
+
+def check_equivalence(values: list) -> int:
+    """Assert byte-identical output across notations and precisions; returns the number of comparisons."""
+    comparisons = 0
+    for value in values:
+        for sig_figs in (1, 2, 3, 4, 6, 10, 17, 20):
+            for force_scientific in (False, True):
+                expected = reference_format_with_sig_figs(value, sig_figs, force_scientific)
+                assert format_with_sig_figs(value, sig_figs, force_scientific) == expected, (value, sig_figs, force_scientific)
+                comparisons += 1
+        for decimal_places in (-3, -1, 0, 1, 2, 3, 5, 8):
+            for use_scientific_notation in (False, True):
+                expected = reference_format_with_rounding(value, decimal_places, use_scientific_notation)
+                actual = format_with_rounding(value, decimal_places, use_scientific_notation)
+                assert actual == expected, (value, decimal_places, use_scientific_notation)
+                comparisons += 1
+    return comparisons
+
+
+def best_time(function, values, *args, repeat: int = 5) -> float:
+    """Best wall time in seconds to apply function to every value."""
+    return min(timeit.repeat(lambda: [function(value, *args) for value in values], number=1, repeat=repeat))
+
+
+def main() -> None:
+    comparisons = check_equivalence(random_values(5000))
+    print(f'byte-identical to sigfig on {comparisons} comparisons')
+
+    values = random_values(20000, seed=1)
+    cases = [
+        ('format_with_sig_figs(3)', format_with_sig_figs, reference_format_with_sig_figs, (3,)),
+        ('format_with_sig_figs(3, force_scientific)', format_with_sig_figs, reference_format_with_sig_figs, (3, True)),
+        ('format_with_rounding(2)', format_with_rounding, reference_format_with_rounding, (2,)),
+        ('format_with_rounding(2, scientific)', format_with_rounding, reference_format_with_rounding, (2, True)),
+    ]
+    print(f'{"function":<44}{"sigfig (us)":>13}{"native (us)":>13}{"speedup":>9}')
+    for name, native, reference, args in cases:
+        reference_time = best_time(reference, values, *args, repeat=3) / len(values) * 1e6
+        native_time = best_time(native, values, *args) / len(values) * 1e6
+        print(f'{name:<44}{reference_time:>13.2f}{native_time:>13.2f}{reference_time / native_time:>8.1f}x')
+
+
+if __name__ == '__main__':
+    main()
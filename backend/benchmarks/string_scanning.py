@@ -0,0 +1,168 @@
+"""
+Benchmark count_sig_figs and format_scientific_notation_indicator against the
+previous implementations, after checking they agree on a randomized corpus.
+
+Usage (from the backend directory):
+    python -m benchmarks.string_scanning
+"""
+
+import random
+import timeit
+
+from utils.number_formatting import count_sig_figs, format_scientific_notation_indicator
+
+
+def legacy_format_scientific_notation_indicator(value: str, scientific_notation_indicator='E') -> str:
+    """Previous implementation: rebuilds the superscript maps on every call."""
+
+    def to_superscript(text):
+        superscript_map = {
+            "0": "⁰", "1": "¹", "2": "²", "3": "³", "4": "⁴",
+            "5": "⁵", "6": "⁶", "7": "⁷", "8": "⁸", "9": "⁹",
+            "+": "⁺", "-": "⁻", "=": "⁼", "(": "⁽", ")": "⁾"
+        }
+        return ''.join(superscript_map.get(char, char) for char in str(text))
+
+    def from_superscript(text):
+        reverse_map = {
+            "⁰": "0", "¹": "1", "²": "2", "³": "3", "⁴": "4",
+            "⁵": "5", "⁶": "6", "⁷": "7", "⁸": "8", "⁹": "9",
+            "⁺": "+", "⁻": "-", "⁼": "=", "⁽": "(", "⁾": ")"
+        }
+        return ''.join(reverse_map.get(char, char) for char in str(text))
+
+    exponent_part = ''
+    patterns = [
+        ('e', 1, to_superscript, 'E'),
+        ('E', 1, to_superscript, 'e'),
+        (' x 10', 5, from_superscript, None)
+    ]
+
+    for pattern, offset, transform, simple_replacement in patterns:
+        index = value.lower().find(pattern.lower()) if pattern == ' x 10' else value.find(pattern)
+        if index > -1:
+            if simple_replacement and scientific_notation_indicator == simple_replacement:
+                return value.replace(pattern, simple_replacement)
+            exponent_part = value[index + offset:]
+            exponent_change_function = transform
+            break
+
+    if exponent_part == '':
+        return value
+
+    return value[:index] + scientific_notation_indicator + exponent_change_function(exponent_part)
+
+
+def legacy_count_sig_figs(value: str) -> int:
+    """Previous implementation: strips trailing zeros by repeated slicing."""
+
+    def count_integer_sig_figs(value: str) -> int:
+        sig_figs = len(value)
+        while value.endswith('0'):
+            sig_figs -= 1
+            value = value[:-1]
+        return sig_figs
+
+    def count_decimal_sig_figs(value_list) -> int:
+        integer_part = value_list[0]
+        if integer_part.count('0') == len(integer_part):
+            sig_figs = 0
+        else:
+            sig_figs = len(integer_part)
+        decimal_part = value_list[1]
+        if sig_figs > 0:
+            return sig_figs + len(decimal_part)
+        if decimal_part.count('0') == len(decimal_part):
+            return sig_figs + len(decimal_part)
+        sig_figs += count_integer_sig_figs(decimal_part[::-1])
+        return sig_figs
+
+    value_str = str(value).strip()
+    try:
+        value_str = value_str[:value_str.lower().index('e')]
+    except ValueError:
+        pass
+    value_split = value_str.split('.')
+    if len(value_split) == 1:
+        return count_integer_sig_figs(value_split[0])
+    return count_decimal_sig_figs(value_split)
+
+
+def random_numeric_strings(count: int, seed: int = 0) -> list:
+    """Numbers as sigfig prints them, plus edge cases: zeros, padding, stray dots and exponents."""
+    rng = random.Random(seed)
+    alphabet = '0000123456789..eE-+ '
+    strings = []
+    for _ in range(count):
+        kind = rng.random()
+        if kind < 0.4:
+            digits = ''.join(rng.choice('0123456789') for _ in range(rng.randint(1, 12)))
+            zeros = '0' * rng.randint(0, 8)
+            strings.append(rng.choice(['', '-']) + rng.choice([digits + zeros, zeros + '.' + zeros + digits, digits + '.' + zeros]))
+        elif kind < 0.7:
+            strings.append(f'{rng.uniform(-1, 1) * 10 ** rng.randint(-12, 12):.{rng.randint(0, 10)}{rng.choice("efg")}}')
+        else:
+            strings.append(''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 16))))
+    return strings
+
+
+def random_scientific_strings(count: int, seed: int = 0) -> list:
+    """Mantissas with 'e', 'E', ' x 10' and ' X 10' exponents, superscript or plain."""
+    rng = random.Random(seed)
+    superscript = str.maketrans('0123456789-+', '⁰¹²³⁴⁵⁶⁷⁸⁹⁻⁺')
+    strings = []
+    for _ in range(count):
+        mantissa = f'{rng.uniform(-10, 10):.{rng.randint(0, 6)}f}'
+        exponent = str(rng.randint(-30, 30))
+        style = rng.randrange(5)
+        if style == 0:
+            strings.append(f'{mantissa}e{exponent}')
+        elif style == 1:
+            strings.append(f'{mantissa}E{exponent}')
+        elif style == 2:
+            strings.append(f'{mantissa}{rng.choice([" x 10", " X 10"])}{exponent.translate(superscript)}')
+        elif style == 3:
+            strings.append(mantissa)
+        else:
+            strings.append(mantissa + rng.choice(['e', 'E', ' x 10', 'ee5', 'E1e2']))
+    return strings
+
+
+def check_equivalence(numeric: list, scientific: list) -> None:
+    for value in numeric:
+        assert count_sig_figs(value) == legacy_count_sig_figs(value), value
+    for value in scientific:
+        for indicator in ('E', 'e', ' x 10'):
+            expected = legacy_format_scientific_notation_indicator(value, indicator)
+            assert format_scientific_notation_indicator(value, indicator) == expected, (value, indicator)
+
+
+def best_time(function, values, *args, repeat: int = 5) -> float:
+    """Best wall time in seconds to apply function to every value."""
+    return min(timeit.repeat(lambda: [function(value, *args) for value in values], number=1, repeat=repeat))
+
+
+def main() -> None:
+    numeric = random_numeric_strings(200000)
+    scientific = random_scientific_strings(100000)
+    check_equivalence(numeric, scientific)
+    print(f'equivalent on {len(numeric)} numeric and {len(scientific)} x 3 scientific strings')
+
+    long_values = ['1' + '0' * 2000, '0.' + '0' * 2000 + '1']
+    cases = [
+        ('count_sig_figs', count_sig_figs, legacy_count_sig_figs, numeric, ()),
+        ('count_sig_figs (2000-digit)', count_sig_figs, legacy_count_sig_figs, long_values * 100, ()),
+        ("format_scientific_notation_indicator(' x 10')", format_scientific_notation_indicator,
+         legacy_format_scientific_notation_indicator, scientific, (' x 10',)),
+        ("format_scientific_notation_indicator('E')", format_scientific_notation_indicator,
+         legacy_format_scientific_notation_indicator, scientific, ('E',)),
+    ]
+    print(f'{"function":<48}{"legacy (s)":>12}{"current (s)":>13}{"speedup":>9}')
+    for name, current, legacy, values, args in cases:
+        legacy_time = best_time(legacy, values, *args)
+        current_time = best_time(current, values, *args)
+        print(f'{name:<48}{legacy_time:>12.4f}{current_time:>13.4f}{legacy_time / current_time:>8.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+Compare the contains and contains_any filters with pandas str.contains.
+
+The pandas baselines are what the filter used to run: a regex search per row
+for contains, and one alternation regex of every keyword for contains_any.
+Masks are checked for equality before timing, on object columns (unique and
+repeated values) and on Arrow-backed strings.
+
+Usage (from the backend directory):
+    python -m benchmarks.text_filters
+"""
+
+import re
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from utils.dataframe_operations import _filter_mask
+
+WORDS = np.array(['lead', 'copper', 'zinc', 'nitrate', 'phosphate', 'arsenic', 'mercury', 'iron',
+                  'total', 'dissolved', 'field', 'lab', 'duplicate', 'blank'], dtype=object)
+
+KEYWORDS = [f'analyte-{i}' for i in range(200)] + ['arsenic', 'mercury']
+
+
+def make_columns(rows: int, seed: int = 0) -> dict:
+    rng = np.random.default_rng(seed)
+    phrases = np.array([' '.join(rng.choice(WORDS, 4)) for _ in range(rows)], dtype=object)
+    unique = pd.Series([f'{phrase} #{i}' for i, phrase in enumerate(phrases)], dtype=object)
+    return {
+        'unique': unique,
+        'repeated': pd.Series(phrases[rng.integers(0, 500, rows)], dtype=object),
+        'arrow': unique.astype('string[pyarrow]'),
+    }
+
+
+def main() -> None:
+    alternation = '|'.join(map(re.escape, KEYWORDS))
+    cases = {
+        'contains': (lambda column: column.str.contains('arsenic', na=False),
+                     lambda column: _filter_mask(column, 'contains', 'arsenic')),
+        'contains_any': (lambda column: column.str.contains(alternation, na=False),
+                         lambda column: _filter_mask(column, 'contains_any', KEYWORDS)),
+    }
+    print(f'{"rows":>10}{"column":>10}{"filter":>14}{"pandas (ms)":>13}{"filter (ms)":>13}{"speedup":>9}')
+    for rows in (100000, 1000000):
+        for name, column in make_columns(rows).items():
+            for case, (baseline, candidate) in cases.items():
+                np.testing.assert_array_equal(np.asarray(candidate(column), dtype=bool),
+                                              np.asarray(baseline(column).fillna(False), dtype=bool))
+                before = min(timeit.repeat(lambda: baseline(column), number=1, repeat=3))
+                after = min(timeit.repeat(lambda: candidate(column), number=1, repeat=3))
+                print(f'{rows:>10}{name:>10}{case:>14}{before * 1000:>13.1f}{after * 1000:>13.1f}'
+                      f'{before / after:>8.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Compare a sort followed by head with a sort limited to the first rows.
+
+Report tables usually show the first 20 to 100 rows of a sorted extract. The
+baseline sorts every row and keeps the first k; the limited sort selects the
+first k rows by partitioning and only sorts those. Results are checked for
+equality before timing, on one numeric key and on a string key with a
+descending numeric tiebreak.
+
+Usage (from the backend directory):
+    python -m benchmarks.topk_sort
+"""
+
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from utils.dataframe_operations import process_dataframe
+
+SORTS = {
+    'value': {'type': 'sort', 'columns': ['value'], 'ascending': False},
+    'site,value': {'type': 'sort', 'columns': ['site', 'value'], 'ascending': [True, False]},
+}
+
+
+def make_extract(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'site': np.array([f'site-{i:04d}' for i in range(1000)], dtype=object)[rng.integers(0, 1000, rows)],
+        'value': np.where(rng.random(rows) < 0.05, np.nan, rng.normal(0, 10, rows).round(2)),
+        'count': rng.integers(0, 1000, rows),
+    })
+
+
+def full_sort(df: pd.DataFrame, sort: dict, k: int) -> pd.DataFrame:
+    """What process_dataframe ran before: a sort of every row, then the first k"""
+    return df.sort_values(by=sort['columns'], ascending=sort['ascending'], kind='stable').head(k)
+
+
+def limited_sort(df: pd.DataFrame, sort: dict, k: int) -> pd.DataFrame:
+    return process_dataframe(df, [{**sort, 'limit': k}], data_format='split')['data']
+
+
+def main() -> None:
+    print(f'{"rows":>10}{"keys":>12}{"k":>6}{"full sort (ms)":>16}{"limit (ms)":>12}{"speedup":>9}')
+    for rows in (100000, 1000000):
+        df = make_extract(rows)
+        for name, sort in SORTS.items():
+            for k in (20, 100):
+                expected = full_sort(df, sort, k)
+                pd.testing.assert_frame_equal(pd.DataFrame(**limited_sort(df, sort, k)),
+                                              expected.reset_index(drop=True))
+                full = min(timeit.repeat(lambda: full_sort(df, sort, k), number=1, repeat=3))
+                limited = min(timeit.repeat(lambda: limited_sort(df, sort, k), number=1, repeat=3))
+                print(f'{rows:>10}{name:>12}{k:>6}{full * 1000:>16.1f}{limited * 1000:>12.1f}{full / limited:>8.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Compare step-by-step and planned transform_dataframe execution on a report-style chain.
+
+The chain mirrors what the report builder sends: a placeholder column that is
+recomputed later, several derived measures, and clean-up of a text column with
+strip/upper applied one function at a time.
+
+Usage (from the backend directory):
+    python -m benchmarks.transform_pipeline
+"""
+
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from utils.dataframe_operations import _apply_transformation, _execute_transformations, plan_transformations
+
+try:
+    import numexpr
+except ImportError:
+    numexpr = None
+
+TRANSFORMATIONS = [
+    {'type': 'add_column', 'name': 'load', 'value': 0},
+    {'type': 'calculate', 'name': 'flow_l', 'expression': 'flow * 3.785'},
+    {'type': 'calculate', 'name': 'ratio', 'expression': 'value / (reference + 1)'},
+    {'type': 'calculate', 'name': 'excess', 'expression': 'value - reference'},
+    {'type': 'calculate', 'name': 'load', 'expression': 'flow_l * value * 1e-6'},
+    {'type': 'apply_function', 'column': 'site', 'function': 'strip'},
+    {'type': 'apply_function', 'column': 'site', 'function': 'upper'},
+    {'type': 'apply_function', 'column': 'unit', 'function': 'strip'},
+    {'type': 'apply_function', 'column': 'unit', 'function': 'lower'},
+    {'type': 'apply_function', 'column': 'excess', 'function': 'round', 'decimals': 2},
+]
+
+
+def make_extract(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'site': rng.choice([f' site-{i} ' for i in range(50)], rows).astype(object),
+        'unit': rng.choice([' MG/L', 'ug/L ', ' pH '], rows).astype(object),
+        'value': rng.normal(10, 3, rows),
+        'reference': rng.normal(8, 2, rows),
+        'flow': rng.uniform(0, 500, rows),
+    })
+
+
+def sequential(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.copy(deep=False)
+    for transform in TRANSFORMATIONS:
+        df = _apply_transformation(df, transform)
+    return df
+
+
+def planned(df: pd.DataFrame) -> pd.DataFrame:
+    return _execute_transformations(df, plan_transformations(TRANSFORMATIONS, list(df.columns)))
+
+
+def main() -> None:
+    print(f'calculate engine: {"numexpr " + numexpr.__version__ if numexpr else "python (numexpr not installed)"}')
+    print(f'{"rows":>10}{"step-by-step (ms)":>20}{"planned (ms)":>15}{"speedup":>10}')
+    for rows in (10000, 100000, 1000000):
+        df = make_extract(rows)
+        pd.testing.assert_frame_equal(planned(df), sequential(df))
+        before = min(timeit.repeat(lambda: sequential(df), number=1, repeat=3))
+        after = min(timeit.repeat(lambda: planned(df), number=1, repeat=3))
+        print(f'{rows:>10}{before * 1000:>20.1f}{after * 1000:>15.1f}{before / after:>9.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+Tests of the column indexes behind filters on registered datasets: every
+index lookup must select the rows pandas' comparison masks select.
+
+Usage (from the backend directory):
+    python -m pytest tests
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.column_index import ColumnIndexes  # noqa: E402
+from utils.dataframe_operations import (  # noqa: E402
+    dataset_registry_stats, disable_dataset_registry, enable_dataset_registry, process_dataframe, register_dataset
+)
+
+CONDITIONS = ('equals', 'greater_than', 'less_than')
+
+
+def sample_frame(rows: int = 2000, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    value = rng.integers(-5, 5, rows) / 2
+    value[rng.random(rows) < 0.1] = np.nan
+    value[:2] = [-0.0, 0.0]
+    return pd.DataFrame({
+        'units': rng.integers(-50, 50, rows),
+        'count': rng.integers(0, 10, rows).astype(np.uint8),
+        'large': rng.choice([-2 ** 63, 0, 2 ** 62, 2 ** 63 - 1], rows),
+        'value': value,
+        'site': rng.choice(np.array(['north', 'south', 'east', 'west', None], dtype=object), rows),
+        'region': pd.Categorical(rng.choice(['A', 'B', 'C', None], rows), categories=['A', 'B', 'C', 'D']),
+    })
+
+
+VALUES = {
+    'units': [0, 7, -50, 49, 50, -51, 3.5, 7.0, np.int64(7), np.float32(2.5), float('inf'), float('nan'), 2 ** 70],
+    'count': [0, 9, 10, -1, 4.5, 255, 2 ** 63],
+    'large': [-2 ** 63, 2 ** 63 - 1, 2 ** 62, 1, -2 ** 63 + 1, float(2 ** 62)],
+    'value': [0, 0.0, -0.0, 1.5, 1.25, -2.5, 2, 10, -10, float('inf'), float('-inf'), float('nan'), np.float64(2.0)],
+    'site': ['north', 'west', 'none', '', 'North'],
+    'region': ['A', 'C', 'D', 'E'],
+}
+
+
+def pandas_positions(column: pd.Series, condition: str, value) -> np.ndarray:
+    if condition == 'equals':
+        mask = column == value
+    elif condition == 'greater_than':
+        mask = column > value
+    else:
+        mask = column < value
+    return np.flatnonzero(mask.to_numpy(dtype=bool))
+
+
+@pytest.mark.parametrize('column', list(VALUES))
+@pytest.mark.parametrize('condition', CONDITIONS)
+def test_lookups_match_pandas_masks(column, condition):
+    df = sample_frame()
+    indexes = ColumnIndexes(df, build_after=1)
+
+    for value in VALUES[column]:
+        positions = indexes.lookup(column, condition, value)
+        if positions is None:
+            continue  # Not answered by an index; the caller scans instead
+        try:
+            expected = pandas_positions(df[column], condition, value)
+        except TypeError:
+            pytest.fail(f'index answered {column} {condition} {value!r}, which pandas cannot compare')
+        np.testing.assert_array_equal(positions, expected, err_msg=f'{column} {condition} {value!r}')
+
+
+def test_indexes_answer_supported_filters():
+    df = sample_frame()
+    indexes = ColumnIndexes(df, build_after=1)
+
+    for column in ('units', 'count', 'large', 'value', 'site'):
+        for condition in CONDITIONS:
+            assert indexes.lookup(column, condition, VALUES[column][0]) is not None, (column, condition)
+    assert indexes.lookup('region', 'equals', 'A') is not None
+
+    # Mismatched types, unsupported kinds and unknown columns are left to the scan
+    assert indexes.lookup('units', 'equals', 'A') is None
+    assert indexes.lookup('units', 'equals', True) is None
+    assert indexes.lookup('site', 'greater_than', 3) is None
+    assert indexes.lookup('region', 'greater_than', 'A') is None
+    assert indexes.lookup('missing', 'equals', 1) is None
+    assert indexes.lookup('site', 'contains', 'th') is None
+
+
+def test_indexes_are_built_after_repeated_filters():
+    indexes = ColumnIndexes(sample_frame(), build_after=3)
+
+    assert indexes.lookup('units', 'equals', 1) is None
+    assert indexes.lookup('units', 'equals', 2) is None
+    assert indexes.lookup('units', 'equals', 3) is not None
+    assert indexes.lookup('units', 'greater_than', 3) is None
+    assert indexes.stats()['indexes'] == 1
+    assert indexes.stats()['lookups'] == 1
+
+
+def test_registered_dataset_filters_match_unindexed_filters():
+    df = sample_frame()
+    filters = [('units', 'greater_than', 10), ('value', 'less_than', 1.5), ('site', 'equals', 'east'),
+               ('region', 'equals', 'B'), ('count', 'equals', 3), ('large', 'less_than', 1)]
+    enable_dataset_registry(64 * 1024 ** 2, index_after=1)
+    try:
+        dataset_id = register_dataset(df)['dataset_id']
+        for first in filters:
+            for second in filters:
+                operations = [{'type': 'filter', 'column': column, 'condition': condition, 'value': value}
+                              for column, condition, value in (first, second)]
+                indexed = process_dataframe(None, operations, dataset_id=dataset_id, data_format='split')
+                scanned = process_dataframe(df, operations, data_format='split')
+                pd.testing.assert_frame_equal(pd.DataFrame(**indexed['data']), pd.DataFrame(**scanned['data']),
+                                              obj=str(operations))
+        assert dataset_registry_stats()['indexed_lookups'] > 0
+    finally:
+        disable_dataset_registry()
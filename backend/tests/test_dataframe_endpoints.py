@@ -0,0 +1,67 @@
+"""
+Tests of the dataframe endpoints' responses to requests the server cannot
+serve as configured, through Flask's test client.
+
+Usage (from the backend directory):
+    python -m pytest tests
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import app  # noqa: E402
+from utils.dataframe_operations import disable_dataset_registry, enable_dataset_registry  # noqa: E402
+
+ROWS = [{'site': 'A', 'value': 1.5}, {'site': 'B', 'value': 2.5}]
+
+REQUESTS = [
+    ('/api/dataframe/process', {'operations': []}),
+    ('/api/dataframe/aggregate', {'groupBy': ['site'], 'aggregations': {'value': 'sum'}}),
+    ('/api/dataframe/transform', {'transformations': []}),
+]
+
+
+@pytest.fixture
+def client():
+    """Test client of a server started without DATASET_REGISTRY_BYTES"""
+    disable_dataset_registry()
+    yield app.test_client()
+    disable_dataset_registry()
+
+
+@pytest.mark.parametrize('path, params', REQUESTS)
+def test_dataset_id_without_registry_is_a_client_error(client, path, params):
+    response = client.post(path, json={'datasetId': 'f' * 32, **params})
+
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'The dataset registry is disabled'}
+
+
+@pytest.mark.parametrize('path, params', REQUESTS)
+def test_store_result_without_registry_is_a_client_error(client, path, params):
+    response = client.post(path, json={'data': ROWS, 'storeResult': True, **params})
+
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'The dataset registry is disabled'}
+
+
+def test_register_without_registry_is_a_client_error(client):
+    response = client.post('/api/datasets', json={'data': ROWS})
+
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'The dataset registry is disabled'}
+
+
+@pytest.mark.parametrize('path, params', REQUESTS)
+def test_store_result_with_registry(client, path, params):
+    enable_dataset_registry(1024 ** 2)
+
+    stored = client.post(path, json={'data': ROWS, 'storeResult': True, **params}).get_json()
+    response = client.post(path, json={'datasetId': stored['datasetId'], **params})
+
+    assert response.status_code == 200
+    assert response.get_json()['shape'] == stored['shape']
@@ -0,0 +1,123 @@
+"""
+Tests of the dataframe result cache: hits return the same output as the
+uncached computation, in every output format, from memory and from disk.
+
+Usage (from the backend directory):
+    python -m pytest tests
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import app  # noqa: E402
+from utils.dataframe_operations import (  # noqa: E402
+    aggregate_dataframe, disable_result_cache, enable_result_cache, process_dataframe, result_cache_stats,
+    transform_dataframe
+)
+
+OPERATIONS = [
+    {'type': 'filter', 'column': 'value', 'condition': 'greater_than', 'value': 0},
+    {'type': 'sort', 'columns': ['value'], 'ascending': False, 'limit': 20},
+]
+
+
+def sample_records(rows: int = 500, seed: int = 0) -> list:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'site': rng.choice(['north', 'south', 'east'], rows),
+        'units': rng.integers(0, 100, rows),
+        'value': rng.normal(0, 10, rows).round(2),
+    }).to_dict(orient='records')
+
+
+def run_all(records: list, data_format: str = 'records') -> list:
+    return [
+        process_dataframe(records, OPERATIONS, data_format=data_format),
+        aggregate_dataframe(records, ['site'], {'value': 'mean', 'units': 'sum'}, data_format=data_format,
+                            workers=1),
+        transform_dataframe(records, [{'type': 'calculate', 'expression': 'units * value', 'name': 'total'}],
+                            data_format=data_format),
+    ]
+
+
+def hits(tier: str = 'memory') -> int:
+    return result_cache_stats()[tier]['hits']
+
+
+@pytest.fixture
+def cache():
+    cache = enable_result_cache(16 * 1024 ** 2)
+    yield cache
+    disable_result_cache()
+
+
+def test_hits_return_the_uncached_output(cache):
+    records = sample_records()
+    disable_result_cache()
+    expected = run_all(records)
+    enable_result_cache(16 * 1024 ** 2)
+
+    assert run_all(records) == expected
+    assert hits() == 0
+    assert run_all(records) == expected
+    assert hits() == 3
+
+
+@pytest.mark.parametrize('data_format', ['columnar', 'split'])
+def test_one_entry_serves_every_output_format(cache, data_format):
+    records = sample_records()
+    run_all(records)
+    disable_result_cache()
+    expected = run_all(records, data_format)
+    enable_result_cache(16 * 1024 ** 2)
+    run_all(records)
+
+    assert run_all(records, data_format) == expected
+    assert hits() == 3
+
+
+def test_changed_data_or_parameters_miss(cache):
+    records = sample_records()
+    process_dataframe(records, OPERATIONS)
+
+    process_dataframe(sample_records(seed=1), OPERATIONS)
+    process_dataframe(records, OPERATIONS[:1])
+    process_dataframe(records, OPERATIONS, compact=True)
+
+    assert hits() == 0
+    assert result_cache_stats()['memory']['misses'] == 4
+
+
+def test_disk_tier_survives_a_new_cache(tmp_path):
+    pytest.importorskip('pyarrow')
+    records = sample_records()
+    try:
+        enable_result_cache(16 * 1024 ** 2, directory=str(tmp_path))
+        expected = run_all(records)
+
+        # A restarted process: empty memory, same directory
+        enable_result_cache(16 * 1024 ** 2, directory=str(tmp_path))
+        assert run_all(records) == expected
+        assert hits('disk') == 3
+    finally:
+        disable_result_cache()
+
+
+def test_endpoint_key_ignores_output_options(cache, monkeypatch):
+    monkeypatch.setitem(app.config, 'RESULT_CACHE_BYTES', 16 * 1024 ** 2)
+    client = app.test_client()
+    body = {'data': sample_records(), 'operations': OPERATIONS}
+
+    records = client.post('/api/dataframe/process', json=body)
+    columnar = client.post('/api/dataframe/process', json={**body, 'dataFormat': 'columnar'})
+
+    assert records.status_code == columnar.status_code == 200
+    assert hits() == 1
+    frame = pd.DataFrame(columnar.get_json()['data']['data'])
+    assert frame.to_dict(orient='records') == records.get_json()['data']
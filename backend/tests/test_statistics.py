@@ -0,0 +1,119 @@
+"""
+Tests of calculate_statistics and StatisticsAccumulator against pandas'
+own reductions.
+
+Usage (from the backend directory):
+    python -m pytest tests
+"""
+
+import json
+import math
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.dataframe_operations import StatisticsAccumulator, calculate_statistics  # noqa: E402
+
+
+def sample_frame(rows: int = 1000, seed: int = 0) -> pd.DataFrame:
+    """Floats with missing values, an all-NaN column, integers and booleans"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'value': np.where(rng.random(rows) < 0.1, np.nan, rng.normal(50, 20, rows)),
+        'empty': np.full(rows, np.nan),
+        'units': rng.integers(-1000, 1000, rows),
+        'large': rng.integers(2 ** 60, 2 ** 62, rows),
+        'count': pd.array(np.where(rng.random(rows) < 0.1, None, rng.integers(0, 50, rows)), dtype='Int64'),
+    })
+
+
+def expected_statistics(df: pd.DataFrame) -> dict:
+    return {
+        'mean': df.mean().to_dict(),
+        'median': df.median().to_dict(),
+        'std': df.std().to_dict(),
+        'min': df.min().to_dict(),
+        'max': df.max().to_dict(),
+        'count': df.count().to_dict(),
+    }
+
+
+def assert_statistics_equal(actual: dict, expected: dict) -> None:
+    for measure, columns in expected.items():
+        assert actual[measure].keys() == columns.keys(), measure
+        for column, value in columns.items():
+            result = actual[measure][column]
+            if pd.isna(value):
+                assert math.isnan(result), (measure, column)
+            elif measure in ('min', 'max', 'count'):
+                # Exact, and of the same kind (integers stay integers)
+                assert result == value and type(result) is type(value.item() if hasattr(value, 'item') else value), \
+                    (measure, column, result, value)
+            else:
+                assert result == pytest.approx(value, rel=1e-9), (measure, column)
+
+
+@pytest.mark.parametrize('columns', [
+    ['value', 'empty', 'units', 'large', 'count'],
+    ['units', 'large', 'count'],
+    ['empty'],
+])
+def test_calculate_statistics_matches_pandas(columns):
+    df = sample_frame()[columns]
+
+    assert_statistics_equal(calculate_statistics(df, columns), expected_statistics(df))
+
+
+def test_calculate_statistics_of_records_matches_pandas():
+    records = sample_frame().to_dict(orient='records')
+
+    assert_statistics_equal(calculate_statistics(records), expected_statistics(pd.DataFrame(records)))
+
+
+def test_calculate_statistics_selects_numeric_columns():
+    df = sample_frame().assign(site='A', flag=True)
+
+    stats = calculate_statistics(df)
+
+    assert list(stats['mean']) == ['value', 'empty', 'units', 'large', 'count']
+
+
+def test_calculate_statistics_quantiles_match_pandas():
+    df = sample_frame()[['value', 'units']]
+
+    stats = calculate_statistics(df, quantiles=[0.1, 0.75])
+
+    for q in (0.1, 0.75):
+        assert stats['quantiles'][str(q)] == pytest.approx(df.quantile(q).to_dict(), rel=1e-12)
+
+
+def test_calculate_statistics_rejects_non_numeric_columns():
+    with pytest.raises(TypeError):
+        calculate_statistics([{'site': 'A', 'value': 1}], ['site'])
+
+
+@pytest.mark.parametrize('columns, missing', [(['value', 'empty'], 'value'), (['units', 'large', 'count'], 'count')])
+def test_accumulator_merges_chunks_like_one_frame(columns, missing):
+    df = sample_frame(rows=3000)[columns]
+    # A first chunk with no values in one column, and uneven chunk sizes
+    df.loc[:499, missing] = None
+    expected = expected_statistics(df)
+    del expected['median']
+
+    chunks = [df.iloc[:500], df.iloc[500:501], df.iloc[501:1700], df.iloc[1700:]]
+    sequential = StatisticsAccumulator()
+    for chunk in chunks:
+        sequential.update(chunk)
+    assert_statistics_equal(sequential.result(), expected)
+
+    # Partial states merged in another order, after a round trip through JSON
+    partials = [StatisticsAccumulator().update(chunk).to_dict() for chunk in chunks]
+    merged = StatisticsAccumulator()
+    for payload in reversed(partials):
+        merged.merge(StatisticsAccumulator.from_dict(json.loads(json.dumps(payload))))
+    assert_statistics_equal(merged.result(), expected)
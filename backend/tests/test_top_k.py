@@ -0,0 +1,78 @@
+"""
+Tests of the top-k selection behind sort limits and sort + head: the
+selected rows must be the first rows of a stable full sort, in order.
+
+Usage (from the backend directory):
+    python -m pytest tests
+"""
+
+import os
+import random
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.dataframe_operations import _sort_order, process_dataframe  # noqa: E402
+
+
+def sample_frame(rows: int = 300, seed: int = 0) -> pd.DataFrame:
+    """Sort keys with many ties and missing values, of every dtype the selection handles"""
+    rng = np.random.default_rng(seed)
+    value = rng.integers(-3, 3, rows) / 2
+    value[rng.random(rows) < 0.15] = np.nan
+    value[rng.random(rows) < 0.05] = -0.0
+    return pd.DataFrame({
+        'units': rng.integers(0, 6, rows),
+        'value': value,
+        'flag': rng.random(rows) < 0.5,
+        'site': rng.choice(np.array(['north', 'south', 'east', None], dtype=object), rows),
+        'grade': pd.Categorical(rng.choice(['low', 'mid', 'high', None], rows), categories=['low', 'mid', 'high'],
+                                ordered=True),
+        'region': pd.Categorical(rng.choice(['B', 'A', 'C'], rows)),
+        'day': pd.to_datetime(rng.choice(['2024-01-01', '2024-01-02', None], rows)),
+        'mixed': rng.choice(np.array([1, 2, 'a'], dtype=object), rows),
+    }, index=rng.permutation(rows) * 3)
+
+
+def full_sort(df: pd.DataFrame, columns: list, ascending, k: int) -> pd.DataFrame:
+    return df.sort_values(by=columns, ascending=ascending, kind='stable').head(k)
+
+
+@pytest.mark.parametrize('seed', range(200))
+def test_top_k_matches_the_head_of_a_stable_sort(seed):
+    rng = random.Random(seed)
+    df = sample_frame(seed=seed % 7)
+    candidates = [column for column in df.columns if column != 'mixed' or rng.random() < 0.1]
+    columns = rng.sample(candidates, rng.randint(1, 3))
+    ascending = rng.choice([True, False, [rng.random() < 0.5 for _ in columns]])
+    k = rng.choice([0, 1, 2, 7, 50, len(df) - 1, len(df), len(df) + 5])
+    keys = df[columns]
+
+    order = _sort_order(keys, ascending, k)
+
+    expected = full_sort(keys, columns, ascending, k)
+    pd.testing.assert_frame_equal(keys.iloc[order], expected, obj=f'{columns} {ascending} k={k}')
+
+
+@pytest.mark.parametrize('ascending', [True, False])
+def test_sort_limit_and_sort_head_match_pandas(ascending):
+    df = sample_frame(rows=1000)
+    expected = full_sort(df, ['units', 'value'], ascending, 25).drop(columns='mixed')
+
+    for operations in ([{'type': 'sort', 'columns': ['units', 'value'], 'ascending': ascending, 'limit': 25}],
+                       [{'type': 'sort', 'columns': ['units', 'value'], 'ascending': ascending},
+                        {'type': 'head', 'n': 40}, {'type': 'head', 'n': 25}]):
+        operations = [{'type': 'select', 'columns': [c for c in df.columns if c != 'mixed']}] + operations
+        result = process_dataframe(df, operations, data_format='split')
+        pd.testing.assert_frame_equal(pd.DataFrame(**result['data']).astype(expected.dtypes),
+                                      expected.reset_index(drop=True), obj=str(operations))
+
+
+@pytest.mark.parametrize('limit', [-1, 2.5, True, '3'])
+def test_invalid_limits_are_rejected(limit):
+    with pytest.raises(ValueError):
+        process_dataframe(sample_frame(rows=10), [{'type': 'sort', 'columns': 'units', 'limit': limit}])
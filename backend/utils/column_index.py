@@ -0,0 +1,188 @@
+"""
+Secondary indexes for repeated filters on an immutable DataFrame.
+
+A hash index (row positions grouped by value) answers equals filters and a
+sorted index (argsort plus searchsorted) answers greater_than and less_than,
+each in O(log n + k) for k matching rows instead of a full column scan.
+Indexes are built lazily, once a column has been filtered build_after times
+with the same kind of condition, and live as long as the ColumnIndexes
+object; the DataFrame must not change in the meantime.
+"""
+
+import threading
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+
+# Index kind answering each filter condition
+_INDEX_KINDS = {'equals': 'hash', 'greater_than': 'sorted', 'less_than': 'sorted'}
+
+_NOT_BUILT = object()
+
+
+class ColumnIndexes:
+    """
+    Lazily built hash and sorted indexes over the columns of one DataFrame.
+
+    Indexes cover numeric columns, object columns of strings and categoricals
+    of strings (equals only), and are used for values of the matching type;
+    lookup returns None for anything else so the caller scans instead. Results
+    equal the rows pandas selects with column == value, > value and < value.
+    """
+
+    def __init__(self, df: pd.DataFrame, build_after: int = 3):
+        """
+        Args:
+            df: DataFrame to index, which must not be modified afterwards
+            build_after: Filters on a column (per index kind) before its index
+                         is built. Must be a positive integer.
+
+        Raises:
+            ValueError: If build_after is not a positive integer
+        """
+        if build_after <= 0:
+            raise ValueError("build_after must be a positive integer")
+
+        self._df = df
+        self._build_after = build_after
+        self._lock = threading.Lock()
+        self._counts = {}  # (column, kind) -> filters seen before the index was built
+        self._indexes = {}  # (column, kind) -> index, or None where the column cannot be indexed
+        self.lookups = 0
+
+    def lookup(self, column: str, condition: str, value: Any) -> Optional[np.ndarray]:
+        """
+        Positions of the rows where column <condition> value, in ascending order
+
+        Counts the filter towards building the column's index, and builds it
+        once the threshold is reached.
+
+        Returns:
+            Integer array of row positions, or None if no index answers the filter
+        """
+        kind = _INDEX_KINDS.get(condition)
+        if kind is None or not self._df.columns.is_unique or column not in self._df.columns:
+            return None
+
+        key = (column, kind)
+        with self._lock:
+            index = self._indexes.get(key, _NOT_BUILT)
+            if index is _NOT_BUILT:
+                self._counts[key] = self._counts.get(key, 0) + 1
+                if self._counts[key] < self._build_after:
+                    return None
+
+        if index is _NOT_BUILT:
+            # Built outside the lock; two threads may both build it, and one result is kept
+            index = _build_index(kind, self._df[column])
+            with self._lock:
+                index = self._indexes.setdefault(key, index)
+                self._counts.pop(key, None)
+
+        if index is None:
+            return None
+        positions = index.lookup(condition, value)
+        if positions is not None:
+            with self._lock:
+                self.lookups += 1
+        return positions
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns:
+            Dictionary with indexes (number built), bytes and lookups (filters answered)
+        """
+        with self._lock:
+            built = [index for index in self._indexes.values() if index is not None]
+            return {
+                'indexes': len(built),
+                'bytes': sum(index.nbytes for index in built),
+                'lookups': self.lookups
+            }
+
+
+def _build_index(kind: str, column: pd.Series):
+    """Hash or sorted index of a column, or None if the column's dtype is not supported"""
+    value_type = _value_type(column)
+    if value_type is None:
+        return None
+    if kind == 'hash':
+        return _HashIndex(column, value_type)
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return None
+    return _SortedIndex(column, value_type)
+
+
+def _value_type(column: pd.Series) -> Optional[str]:
+    """'number' or 'string' for indexable columns, else None"""
+    dtype = column.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        return 'string' if pd.api.types.infer_dtype(dtype.categories, skipna=True) == 'string' else None
+    if not isinstance(dtype, np.dtype):
+        return None
+    if dtype.kind in 'iuf':
+        return 'number'
+    if dtype == object and pd.api.types.infer_dtype(column, skipna=True) == 'string':
+        return 'string'
+    return None
+
+
+def _matches_type(value: Any, value_type: str) -> bool:
+    """Whether value compares with the column's values the way the index assumes"""
+    if value_type == 'string':
+        return isinstance(value, str)
+    return isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(value, (bool, np.bool_))
+
+
+class _HashIndex:
+    """Row positions grouped by value: positions of value i are order[starts[i]:starts[i + 1]]"""
+
+    def __init__(self, column: pd.Series, value_type: str):
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            codes, uniques = column.cat.codes.to_numpy(), column.cat.categories
+        else:
+            codes, uniques = pd.factorize(column.to_numpy())
+        # A stable sort keeps each value's positions ascending; missing values (code -1) sort first
+        self._order = np.argsort(codes, kind='stable')
+        counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        self._starts = np.concatenate(([0], np.cumsum(counts))) + np.count_nonzero(codes < 0)
+        self._uniques = pd.Index(uniques)
+        self._value_type = value_type
+        # Strings are shared with the DataFrame, so only references are counted
+        self.nbytes = self._order.nbytes + self._starts.nbytes + self._uniques.memory_usage()
+
+    def lookup(self, condition: str, value: Any) -> Optional[np.ndarray]:
+        if not _matches_type(value, self._value_type):
+            return None
+        try:
+            code = self._uniques.get_loc(value)
+        except (KeyError, TypeError, OverflowError):
+            # Not present; NaN never is, since factorize leaves missing values out
+            return self._order[:0]
+        return self._order[self._starts[code]:self._starts[code + 1]]
+
+
+class _SortedIndex:
+    """Non-missing values in ascending order, with their row positions"""
+
+    def __init__(self, column: pd.Series, value_type: str):
+        values = column.to_numpy()
+        positions = np.flatnonzero(pd.notna(values))
+        order = np.argsort(values[positions], kind='stable')
+        self._positions = positions[order]
+        self._values = values[self._positions]
+        self._value_type = value_type
+        self.nbytes = self._positions.nbytes + self._values.nbytes
+
+    def lookup(self, condition: str, value: Any) -> Optional[np.ndarray]:
+        if not _matches_type(value, self._value_type):
+            return None
+        if pd.isna(value):
+            return self._positions[:0]
+        if condition == 'greater_than':
+            matches = self._positions[np.searchsorted(self._values, value, side='right'):]
+        else:
+            matches = self._positions[:np.searchsorted(self._values, value, side='left')]
+        return np.sort(matches)
@@ -3,220 +3,1841 @@ Dataframe operations utilities for processing tabular data.
 Leverages pandas for powerful data manipulation capabilities.
 """
 
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
 import pandas as pd
 import numpy as np
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple, Union, Iterable, Iterator, IO
+
+from utils.column_index import ColumnIndexes
+from utils.dataset_registry import DatasetRegistry
+from utils.metrics import span
+from utils.result_cache import ResultCache, dataframe_nbytes, fingerprint_data, result_key
+from utils import text_search
+
+try:
+    import pyarrow as pa
+except ImportError:  # Arrow IPC transport is optional
+    pa = None
+
+
+DATA_FORMATS = ('records', 'columnar', 'split', 'arrow')
+
+ARROW_STREAM_MIMETYPE = 'application/vnd.apache.arrow.stream'
+
+_FILTER_CONDITIONS = ('equals', 'greater_than', 'less_than', 'contains', 'contains_any')
+
+# apply_function transformations: element-wise string methods, which
+# plan_transformations fuses per column, and vectorized numeric functions
+_STRING_FUNCTIONS = ('upper', 'lower', 'strip')
+_NUMERIC_FUNCTIONS = ('abs', 'round')
+
+# Element functions behind Series.str.<name> for columns of strings
+_STRING_METHODS = {'upper': str.upper, 'lower': str.lower, 'strip': str.strip}
+
+# Names an eval expression may reference: backtick-quoted or bare identifiers
+_QUOTED_NAME_PATTERN = re.compile(r'`([^`]*)`')
+_IDENTIFIER_PATTERN = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
+
+# Values of the compact option: categoricals and integer downcasting, plus
+# Arrow-backed strings for 'arrow'
+COMPACT_MODES = (False, True, 'arrow')
+
+# Integer widths compact_dataframe downcasts to, narrowest first
+_SIGNED_INTEGER_TYPES = (np.int8, np.int16, np.int32)
+_UNSIGNED_INTEGER_TYPES = (np.uint8, np.uint16, np.uint32)
+
+# Aggregations that work on categorical columns without converting them back
+_CATEGORICAL_AGGREGATIONS = ('count', 'size', 'nunique', 'first', 'last')
+
+# Aggregations aggregate_dataframe can split into partial states and merge
+MERGEABLE_AGGREGATIONS = ('sum', 'count', 'size', 'min', 'max', 'mean', 'var', 'std')
+
+# Inputs smaller than this are aggregated in-process even when workers > 1
+PARALLEL_AGGREGATION_MIN_ROWS = 200000
+
+# Opt-in cache of operation results, see enable_result_cache
+_result_cache = None
+
+# Opt-in registry of uploaded tables, see enable_dataset_registry
+_dataset_registry = None
+
+# Operations stream_dataframe can apply to each chunk independently
+STREAMABLE_OPERATIONS = (
+    'filter', 'select', 'rename',
+    'add_column', 'calculate', 'fill_na', 'drop_na', 'convert_type', 'apply_function'
+)
+
+# Operation, transformation and plan step types, which name the metrics spans of their steps
+_STEP_TYPES = (
+    'filter', 'sort', 'head', 'select', 'rename', 'limit', 'project',
+    'add_column', 'calculate', 'fill_na', 'drop_na', 'convert_type', 'apply_function',
+    'constant', 'string', 'numeric'
+)
+
+
+def load_dataframe(data: Union[List[Dict], Dict, bytes, pd.DataFrame]) -> pd.DataFrame:
+    """
+    Build a DataFrame from any of the supported wire formats
+    
+    Args:
+        data: One of
+            - records: list of row dictionaries, [{"a": 1, "b": "x"}, ...]
+            - columnar: {"columns": ["a", "b"], "data": {"a": [1, ...], "b": ["x", ...]}}
+              ("columns" is optional and fixes the column order)
+            - split: {"columns": ["a", "b"], "data": [[1, "x"], ...]}
+            - arrow: bytes of an Arrow IPC stream (requires pyarrow)
+            - a DataFrame, e.g. a registered dataset, which is not modified
+    
+    Returns:
+        DataFrame with dtypes inferred once per column
+    
+    Raises:
+        ValueError: If data is not in a supported format
+    """
+    if isinstance(data, pd.DataFrame):
+        # Column assignments on a shallow copy leave the original untouched
+        return data.copy(deep=False)
+    
+    if isinstance(data, list):
+        return pd.DataFrame(data)
+    
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return _read_arrow_stream(data)
+    
+    if isinstance(data, dict) and 'data' in data:
+        columns = data.get('columns')
+        values = data['data']
+        if isinstance(values, dict):
+            return pd.DataFrame(values, columns=columns)
+        if isinstance(values, list):
+            return pd.DataFrame(values, columns=columns)
+    
+    raise ValueError("data must be a list of records or a dictionary with 'data' "
+                     "(columnar: column name to values, split: list of rows)")
+
+
+def dump_dataframe(df: pd.DataFrame, data_format: str = 'records') -> Union[List[Dict], Dict, bytes]:
+    """
+    Convert a DataFrame to one of the supported wire formats
+    
+    Args:
+        df: DataFrame to convert
+        data_format: 'records', 'columnar', 'split' or 'arrow' (see load_dataframe)
+    
+    Returns:
+        List of row dictionaries for records, Arrow IPC stream bytes for arrow,
+        otherwise a dictionary with 'columns' and 'data'
+    
+    Raises:
+        ValueError: If data_format is not supported
+    """
+    if data_format not in DATA_FORMATS:
+        raise ValueError(f"data_format must be one of {', '.join(DATA_FORMATS)}, got {data_format!r}")
+    with span(f'serialize.{data_format}', rows=len(df)):
+        if data_format == 'arrow':
+            return _write_arrow_stream(df)
+        df = _with_missing_as_none(df)
+        if data_format == 'records':
+            return df.to_dict('records')
+        
+        columns = list(df.columns)
+        values = [df.iloc[:, i].tolist() for i in range(len(columns))]
+        if data_format == 'columnar':
+            return {'columns': columns, 'data': dict(zip(columns, values))}
+        return {'columns': columns, 'data': [list(row) for row in zip(*values)]}
+
+
+def _with_missing_as_none(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Categorical and pandas string columns as objects with None for missing
+    values; float NaN is left to the JSON encoder, which writes it as null
+    """
+    positions = [i for i, dtype in enumerate(df.dtypes) if isinstance(dtype, (pd.CategoricalDtype, pd.StringDtype))]
+    if not positions:
+        return df
+    df = df.copy(deep=False)
+    for position in positions:
+        column = df.iloc[:, position]
+        df.isetitem(position, column.astype(object).where(column.notna(), None))
+    return df
+
+
+def _read_arrow_stream(data: Union[bytes, bytearray, memoryview]) -> pd.DataFrame:
+    """Read an Arrow IPC stream into a DataFrame, sharing buffers where dtypes allow"""
+    _require_pyarrow()
+    try:
+        table = pa.ipc.open_stream(pa.py_buffer(data)).read_all()
+    except pa.ArrowInvalid as e:
+        raise ValueError(f"Invalid Arrow IPC stream: {e}")
+    # split_blocks keeps one block per column, so null-free numeric columns
+    # are views on the Arrow buffers rather than consolidated copies
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+def _write_arrow_stream(df: pd.DataFrame) -> bytes:
+    """Write a DataFrame (without its index) as an Arrow IPC stream"""
+    _require_pyarrow()
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _require_pyarrow() -> None:
+    if pa is None:
+        raise ValueError("The arrow data format requires the pyarrow package")
+
+
+def compact_dataframe(df: pd.DataFrame, arrow_strings: bool = False) -> Tuple[pd.DataFrame, Dict]:
+    """
+    Store a DataFrame's columns in compact dtypes
+    
+    - String columns whose values repeat (units, status codes, site names)
+      become categoricals, with sorted categories so sorting and grouping
+      order is unchanged
+    - Integer columns are downcast to the narrowest width holding their
+      values and the values' negation, so abs cannot overflow
+    - With arrow_strings, the remaining string columns use Arrow-backed
+      strings (requires pyarrow)
+    
+    Float columns keep float64, since float32 would change aggregation
+    results. The input DataFrame is not modified.
+    
+    Args:
+        df: DataFrame to compact
+        arrow_strings: Store high-cardinality string columns as string[pyarrow]
+    
+    Returns:
+        The compacted DataFrame, and a dictionary with original_bytes,
+        compact_bytes and saved_bytes
+    
+    Raises:
+        ValueError: If arrow_strings is set but pyarrow is not installed
+    """
+    if arrow_strings and pa is None:
+        raise ValueError("Arrow-backed strings require the pyarrow package")
+    
+    original_bytes = dataframe_nbytes(df)
+    compact = df.copy(deep=False)
+    for position in range(compact.shape[1]):
+        column = compact.iloc[:, position]
+        compacted = _compact_column(column, arrow_strings)
+        if compacted is not column:
+            compact.isetitem(position, compacted)
+    
+    compact_bytes = dataframe_nbytes(compact)
+    return compact, {
+        'original_bytes': original_bytes,
+        'compact_bytes': compact_bytes,
+        'saved_bytes': original_bytes - compact_bytes
+    }
+
+
+def _compact_column(column: pd.Series, arrow_strings: bool) -> pd.Series:
+    """The column in its compact dtype, or the column itself when it has none"""
+    dtype = column.dtype
+    if not isinstance(dtype, np.dtype) or len(column) == 0:
+        return column
+    
+    if dtype.kind in 'iu':
+        values = column.to_numpy()
+        low, high = values.min(), values.max()
+        for candidate in (_SIGNED_INTEGER_TYPES if dtype.kind == 'i' else _UNSIGNED_INTEGER_TYPES):
+            if np.dtype(candidate).itemsize >= dtype.itemsize:
+                break
+            bound = np.iinfo(candidate).max
+            if -bound <= low and high <= bound:
+                return column.astype(candidate)
+        return column
+    
+    if dtype == object and pd.api.types.infer_dtype(column, skipna=True) == 'string':
+        if _has_repeated_values(column.to_numpy()):
+            return column.astype('category')
+        if arrow_strings:
+            return column.astype('string[pyarrow]')
+    return column
+
+
+def _load_input(data: Any, compact: Union[bool, str]) -> Tuple[pd.DataFrame, Optional[Dict]]:
+    """load_dataframe, then compact_dataframe when compact is set"""
+    if compact not in COMPACT_MODES:
+        raise ValueError(f"compact must be true, false or 'arrow', got {compact!r}")
+    with span('ingest') as ingest:
+        df = load_dataframe(data)
+        ingest.rows = len(df)
+    if not compact:
+        return df, None
+    with span('compact', rows=len(df)):
+        return compact_dataframe(df, arrow_strings=compact == 'arrow')
+
+
+def _memory_output(df: pd.DataFrame) -> Optional[Dict]:
+    """API form of the compaction report _cached_result attached to a result"""
+    report = df.attrs.get('memory')
+    if report is None:
+        return None
+    return {
+        'originalBytes': report['original_bytes'],
+        'compactBytes': report['compact_bytes'],
+        'savedBytes': report['saved_bytes']
+    }
 
 
-def process_dataframe(data: List[Dict], operations: List[Dict] = None) -> Dict:
+def enable_result_cache(max_bytes: int = 256 * 1024 ** 2, directory: Optional[str] = None,
+                        max_disk_bytes: int = 2 * 1024 ** 3) -> ResultCache:
+    """
+    Cache process_dataframe, aggregate_dataframe and transform_dataframe
+    results by input fingerprint and canonicalized parameters, in a cache
+    shared by all threads of this process. Calling it again replaces the
+    existing cache; files already in directory are reused.
+    
+    Args:
+        max_bytes: Memory budget for cached results
+        directory: Directory for Arrow files of the results (requires
+                   pyarrow), None to keep results in memory only
+        max_disk_bytes: Disk budget for the Arrow files
+    
+    Returns:
+        The active ResultCache
+    """
+    global _result_cache
+    _result_cache = ResultCache(max_bytes, directory=directory, max_disk_bytes=max_disk_bytes)
+    return _result_cache
+
+
+def disable_result_cache() -> None:
+    """Stop caching results and drop the in-memory tier (files on disk are kept)"""
+    global _result_cache
+    _result_cache = None
+
+
+def clear_result_cache() -> None:
+    """Drop all cached results, including files on disk, and reset the counters, if the cache is enabled"""
+    if _result_cache is not None:
+        _result_cache.clear()
+
+
+def result_cache_stats() -> Optional[Dict]:
+    """
+    Returns:
+        'memory' and 'disk' statistics of the result cache (see
+        ResultCache.stats), or None when it is disabled
+    """
+    if _result_cache is None:
+        return None
+    return _result_cache.stats()
+
+
+def _cached_result(kind: str, data: Any, data_key: Optional[str], params: Dict, compute,
+                   compact: Union[bool, str] = False) -> pd.DataFrame:
+    """
+    Load data and run compute on the DataFrame, through the result cache when it is enabled
+    
+    With compact, the input is compacted first (see compact_dataframe) and
+    the report is kept in the result's attrs['memory'], which the cache
+    stores with the result.
+    """
+    def run():
+        df, memory = _load_input(data, compact)
+        with span(kind, rows=len(df)):
+            result = compute(df)
+        if memory is not None:
+            result.attrs = {**result.attrs, 'memory': memory}
+        return result
+    
+    if _result_cache is None:
+        return run()
+    if data_key is None:
+        data_key = fingerprint_data(data)
+    if compact:
+        params = {**params, 'compact': compact}
+    return _result_cache.get_or_compute(result_key(kind, data_key, params), run)
+
+
+def enable_dataset_registry(max_bytes: int = 1024 ** 3, ttl_seconds: Optional[float] = 3600,
+                            directory: Optional[str] = None, index_after: Optional[int] = 3) -> DatasetRegistry:
+    """
+    Keep registered tables server-side so operations can reference them by
+    dataset ID instead of re-sending data. Calling it again replaces the
+    registry, dropping the datasets held in memory.
+    
+    Args:
+        max_bytes: Memory budget for registered DataFrames in this process
+        ttl_seconds: Idle time after which a dataset expires, None for never
+        directory: Directory for Arrow files of the datasets, shared by all
+                   processes using it (requires pyarrow); None to keep
+                   datasets in this process only
+        index_after: Filters on a column of a dataset after which the column
+                     is indexed for later filters, None to never index
+    
+    Returns:
+        The active DatasetRegistry
+    """
+    global _dataset_registry
+    _dataset_registry = DatasetRegistry(max_bytes, ttl_seconds=ttl_seconds, directory=directory,
+                                        index_after=index_after)
+    return _dataset_registry
+
+
+def disable_dataset_registry() -> None:
+    """Stop accepting dataset IDs and drop the datasets held in memory"""
+    global _dataset_registry
+    _dataset_registry = None
+
+
+def register_dataset(data: Union[List[Dict], Dict, bytes], name: str = None,
+                     compact: Union[bool, str] = False) -> Dict:
+    """
+    Parse a table once and register it under a new dataset ID
+    
+    Args:
+        data: Rows in any format accepted by load_dataframe
+        name: Optional label for the dataset
+        compact: Store the table in compact dtypes (see compact_dataframe);
+                 'arrow' also uses Arrow-backed strings
+    
+    Returns:
+        Dictionary with dataset_id, name, shape, columns, dtypes, bytes and
+        expires_in (seconds), plus memory (see compact_dataframe) with compact
+    
+    Raises:
+        ValueError: If the registry is disabled or the table exceeds its budget
+    """
+    registry = _require_registry()
+    df, memory = _load_input(data, compact)
+    info = registry.register(df, name=name)
+    if memory is not None:
+        info['memory'] = memory
+    return info
+
+
+def dataset_info(dataset_id: str) -> Dict:
+    """
+    Description of a registered dataset, see register_dataset
+    
+    Raises:
+        DatasetNotFoundError: If the ID is unknown or expired
+    """
+    return _require_registry().info(dataset_id)
+
+
+def drop_dataset(dataset_id: str) -> bool:
+    """Remove a registered dataset, returning whether it existed"""
+    return _require_registry().drop(dataset_id)
+
+
+def list_datasets() -> List[Dict]:
+    """Descriptions of the datasets held by this process"""
+    return _require_registry().list()
+
+
+def dataset_registry_stats() -> Optional[Dict]:
+    """
+    Returns:
+        Registry statistics (see DatasetRegistry.stats), or None when it is disabled
+    """
+    if _dataset_registry is None:
+        return None
+    return _dataset_registry.stats()
+
+
+def _require_registry() -> DatasetRegistry:
+    if _dataset_registry is None:
+        raise ValueError("The dataset registry is disabled")
+    return _dataset_registry
+
+
+def _resolve_input(data: Any, dataset_id: Optional[str], data_key: Optional[str], store_result: bool = False):
+    """
+    The data to load and its result cache identity, from either data or a dataset ID
+    
+    Raises:
+        ValueError: If neither or both of data and dataset_id are given, or if
+                    the registry is disabled and dataset_id or store_result is
+                    given (checked before any work is done)
+        DatasetNotFoundError: If the dataset ID is unknown or expired
+    """
+    if store_result:
+        _require_registry()
+    if dataset_id is None:
+        if data is None:
+            raise ValueError("Either data or a dataset ID is required")
+        return data, data_key
+    if data is not None:
+        raise ValueError("Pass either data or a dataset ID, not both")
+    # Registered datasets are immutable and their IDs are never reused
+    return _require_registry().get(dataset_id), f'dataset:{dataset_id}'
+
+
+def process_dataframe(data: Union[List[Dict], Dict], operations: List[Dict] = None,
+                      explain: bool = False, data_format: str = 'records', data_key: str = None,
+                      dataset_id: str = None, store_result: bool = False,
+                      compact: Union[bool, str] = False) -> Dict:
     """
     Process dataframe data with various operations
     
+    The operations are compiled by plan_operations: consecutive filters share
+    one row selection, renames are applied once at the end, no-op selects and
+    renames are dropped, and the result is materialized once with only the
+    output columns. Operation lists the planner does not support (e.g. ones
+    producing duplicate column names) run step by step instead. Filters on a
+    registered dataset use its column indexes once a column has been
+    filtered often enough (see DatasetRegistry).
+    
     Args:
-        data: List of dictionaries representing rows
+        data: Rows in any format accepted by load_dataframe
         operations: List of operation dictionaries to apply
+        explain: Return the compiled plan instead of running it
+        data_format: Output format of 'data': 'records', 'columnar', 'split' or 'arrow'
+        data_key: Identity of the input data for the result cache (see
+                  enable_result_cache), e.g. a dataset ID and version or a
+                  hash of the request body; None to fingerprint data
+        dataset_id: ID of a registered dataset to use instead of data
+        store_result: Also register the result, returning its 'datasetId'
+        compact: Compact the input first (see compact_dataframe), reporting
+                 the bytes saved in 'memory'; 'arrow' also uses Arrow-backed strings
     
     Returns:
-        Dictionary with processed data
+        Dictionary with processed data, or with the plan when explain is set
+    
+    Raises:
+        ValueError: If the dataset registry is disabled and dataset_id or
+                    store_result is given
+        DatasetNotFoundError: If dataset_id is unknown or expired
     """
     if operations is None:
         operations = []
+    data, data_key = _resolve_input(data, dataset_id, data_key, store_result)
+    indexes = _require_registry().indexes(dataset_id) if dataset_id is not None else None
     
-    # Convert to DataFrame
-    df = pd.DataFrame(data)
+    if explain:
+        df = load_dataframe(data)
+        return {'plan': plan_operations(operations, list(df.columns))}
     
-    # Apply operations
-    for op in operations:
+    def compute(df):
+        plan = plan_operations(operations, list(df.columns))
+        if plan is None:
+            return _apply_operations(df, operations)
+        return _execute_plan(df, plan, indexes)
+    
+    df = _cached_result('process', data, data_key, {'operations': operations}, compute, compact)
+    
+    # Convert back to the requested wire format
+    result = dump_dataframe(df, data_format)
+    
+    output = {
+        'data': result,
+        'shape': list(df.shape),
+        'columns': list(df.columns),
+        'dtypes': {col: str(dtype) for col, dtype in df.dtypes.items()}
+    }
+    if compact:
+        output['memory'] = _memory_output(df)
+    if store_result:
+        output['datasetId'] = _require_registry().register(df)['dataset_id']
+    return output
+
+
+def plan_operations(operations: List[Dict], columns: List[str]) -> Optional[Dict]:
+    """
+    Compile a process_dataframe operation list into an execution plan
+    
+    Column references are resolved to input column names, so every step reads
+    the original DataFrame:
+    - 'filter': adjacent filters fused into one step with a list of conditions
+    - 'sort': sort keys and direction, with the 'limit' of a following head
+      fused in so only the first rows are selected (see _sort_order)
+    - 'limit': the first n rows, for a head that does not follow a sort
+    - 'project': the input columns to materialize, in output order
+    - 'rename': a single input-to-output name mapping, applied last
+    
+    Args:
+        operations: List of operation dictionaries
+        columns: Column names of the input DataFrame
+    
+    Returns:
+        Dictionary with 'steps' and the 'eliminated' no-op operations, or None
+        if the operations need the step-by-step interpreter
+    
+    Raises:
+        KeyError: If an operation references a column that does not exist
+    """
+    if len(set(columns)) != len(columns):
+        return None
+    
+    # (current name, input name) for each column of the intermediate result
+    current = [(column, column) for column in columns]
+    steps = []
+    eliminated = []
+    
+    def resolve(name):
+        for current_name, source in current:
+            if current_name == name:
+                return source
+        raise KeyError(name)
+    
+    for index, op in enumerate(operations):
         operation_type = op.get('type')
         
         if operation_type == 'filter':
-            # Filter rows based on condition
-            column = op.get('column')
             condition = op.get('condition')
-            value = op.get('value')
+            if condition not in _FILTER_CONDITIONS:
+                eliminated.append({'index': index, 'type': operation_type, 'reason': 'unknown condition'})
+                continue
             
-            if condition == 'equals':
-                df = df[df[column] == value]
-            elif condition == 'greater_than':
-                df = df[df[column] > value]
-            elif condition == 'less_than':
-                df = df[df[column] < value]
-            elif condition == 'contains':
-                df = df[df[column].str.contains(str(value), na=False)]
+            entry = {'column': resolve(op.get('column')), 'condition': condition, 'value': op.get('value')}
+            if op.get('regex'):
+                entry['regex'] = True
+            if steps and steps[-1]['step'] == 'filter':
+                steps[-1]['conditions'].append(entry)
+            else:
+                steps.append({'step': 'filter', 'conditions': [entry]})
         
         elif operation_type == 'sort':
-            # Sort by column(s)
-            columns = op.get('columns', [])
-            ascending = op.get('ascending', True)
-            df = df.sort_values(by=columns, ascending=ascending)
+            by = op.get('columns', [])
+            by = [by] if isinstance(by, str) else list(by)
+            if not by:
+                eliminated.append({'index': index, 'type': operation_type, 'reason': 'no sort columns'})
+                continue
+            step = {
+                'step': 'sort',
+                'columns': [resolve(column) for column in by],
+                'ascending': op.get('ascending', True)
+            }
+            if op.get('limit') is not None:
+                step['limit'] = _row_limit(op['limit'], 'sort limit')
+            steps.append(step)
+        
+        elif operation_type == 'head':
+            n = _row_limit(op.get('n'), 'head n')
+            if steps and steps[-1]['step'] in ('sort', 'limit'):
+                # Fused into the preceding sort (a top-k selection) or limit
+                key = 'n' if steps[-1]['step'] == 'limit' else 'limit'
+                steps[-1][key] = min(n, steps[-1].get(key, n))
+            else:
+                steps.append({'step': 'limit', 'n': n})
         
         elif operation_type == 'select':
-            # Select specific columns
-            columns = op.get('columns', [])
-            df = df[columns]
+            selected = op.get('columns', [])
+            if not isinstance(selected, list) or len(set(selected)) != len(selected):
+                return None
+            if selected == [name for name, _ in current]:
+                eliminated.append({'index': index, 'type': operation_type, 'reason': 'selects all columns in order'})
+                continue
+            current = [(name, resolve(name)) for name in selected]
         
         elif operation_type == 'rename':
-            # Rename columns
             mapping = op.get('mapping', {})
-            df = df.rename(columns=mapping)
+            renamed = [(mapping.get(name, name), source) for name, source in current]
+            if renamed == current:
+                eliminated.append({'index': index, 'type': operation_type, 'reason': 'renames no columns'})
+                continue
+            if len(set(name for name, _ in renamed)) != len(renamed):
+                return None
+            current = renamed
+        
+        else:
+            eliminated.append({'index': index, 'type': operation_type, 'reason': 'unknown operation'})
     
-    # Convert back to list of dictionaries
-    result = df.to_dict('records')
+    steps.append({'step': 'project', 'columns': [source for _, source in current]})
+    mapping = {source: name for name, source in current if name != source}
+    if mapping:
+        steps.append({'step': 'rename', 'mapping': mapping})
     
-    return {
-        'data': result,
-        'shape': list(df.shape),
-        'columns': list(df.columns),
-        'dtypes': {col: str(dtype) for col, dtype in df.dtypes.items()}
-    }
+    return {'steps': steps, 'eliminated': eliminated}
+
+
+def _execute_plan(df: pd.DataFrame, plan: Dict, indexes: Optional[ColumnIndexes] = None) -> pd.DataFrame:
+    """
+    Run a plan from plan_operations
+    
+    Filters and sorts only read the columns they reference and narrow an array
+    of row positions; the output rows and columns are copied once at the end.
+    A filter on all rows is answered from indexes (over the rows of df) when
+    they have an index for it.
+    """
+    positions = None  # None means all rows in their original order
+    
+    for step in plan['steps']:
+        with _step_span('process', step['step']):
+            if step['step'] == 'filter':
+                for condition in step['conditions']:
+                    if positions is None and indexes is not None:
+                        matches = indexes.lookup(condition['column'], condition['condition'], condition['value'])
+                        if matches is not None:
+                            positions = matches
+                            continue
+                    column = df[condition['column']]
+                    if positions is not None:
+                        column = column.take(positions)
+                    mask = np.asarray(_filter_mask(column, condition['condition'], condition['value'],
+                                                   condition.get('regex', False)), dtype=bool)
+                    positions = np.flatnonzero(mask) if positions is None else positions[mask]
+            
+            elif step['step'] == 'sort':
+                keys = df[step['columns']]
+                if positions is not None:
+                    keys = keys.take(positions)
+                order = _sort_order(keys, step['ascending'], step.get('limit'))
+                positions = order if positions is None else positions[order]
+            
+            elif step['step'] == 'limit':
+                positions = np.arange(min(step['n'], len(df))) if positions is None else positions[:step['n']]
+            
+            elif step['step'] == 'project':
+                columns = step['columns']
+                if positions is None and columns == list(df.columns):
+                    continue
+                if positions is not None:
+                    # Rows first: iloc[rows, columns] copies the selected columns in full before taking rows
+                    df = df.iloc[positions]
+                df = df.iloc[:, df.columns.get_indexer(columns)]
+                positions = None
+            
+            elif step['step'] == 'rename':
+                df = df.rename(columns=step['mapping'])
+    
+    return df
+
+
+def _row_limit(value: Any, name: str) -> int:
+    """
+    Validate a row count of a sort limit or head operation
+    
+    Raises:
+        ValueError: If value is not a non-negative integer
+    """
+    if isinstance(value, (bool, np.bool_)) or not isinstance(value, (int, np.integer)) or value < 0:
+        raise ValueError(f"{name} must be a non-negative integer")
+    return int(value)
+
+
+def _sort_order(keys: pd.DataFrame, ascending: Union[bool, List[bool]] = True,
+                limit: Optional[int] = None) -> np.ndarray:
+    """
+    Positions of the rows of keys in sort order, only the first limit of them when given
+    
+    The sort is stable, so rows with equal keys keep their order, and missing
+    values go last for either direction, as with sort_values. With a limit the
+    first rows are selected by partitioning on each key in turn (see _top_k),
+    in O(n + k log k) rather than O(n log n), and the result equals the first
+    limit rows of the full sort.
+    """
+    columns = list(keys.columns)
+    keys = keys.set_axis(pd.RangeIndex(len(keys)))
+    
+    if limit is not None and limit < len(keys):
+        directions = [ascending] * len(columns) if isinstance(ascending, bool) else ascending
+        sort_keys = [_sort_key(keys.iloc[:, i]) for i in range(len(columns))]
+        if isinstance(directions, list) and len(directions) == len(columns) \
+                and all(isinstance(direction, bool) for direction in directions) \
+                and all(key is not None for key in sort_keys):
+            selected = np.sort(_top_k(sort_keys, directions, limit, np.arange(len(keys))))
+            # Positions stay ascending, so sorting the selected rows stably keeps ties in order
+            order = keys.take(selected).sort_values(by=columns, ascending=ascending, kind='stable').index
+            return order.to_numpy()
+    
+    order = keys.sort_values(by=columns, ascending=ascending, kind='stable').index.to_numpy()
+    return order if limit is None else order[:limit]
+
+
+def _sort_key(column: pd.Series) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Values of a sort key that order as sort_values orders the column, and a missing value mask
+    
+    Returns None for dtypes the top-k selection does not handle, e.g. mixed
+    object columns, which are sorted in full instead.
+    """
+    dtype = column.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        codes = column.cat.codes.to_numpy()
+        return codes, codes < 0
+    if pd.api.types.is_datetime64_any_dtype(dtype) or pd.api.types.is_timedelta64_dtype(dtype):
+        return column.array.asi8, column.isna().to_numpy()
+    if isinstance(dtype, np.dtype) and dtype.kind in 'biuf':
+        values = column.to_numpy()
+        return values, (np.isnan(values) if dtype.kind == 'f' else np.zeros(len(values), dtype=bool))
+    if dtype == object or isinstance(dtype, pd.StringDtype):
+        if pd.api.types.infer_dtype(column, skipna=True) != 'string':
+            return None
+        # Codes of the sorted distinct strings partition faster than the strings
+        codes, _ = pd.factorize(column.to_numpy(dtype=object), sort=True)
+        return codes, codes < 0
+    return None
+
+
+def _top_k(sort_keys: List[Tuple[np.ndarray, np.ndarray]], ascending: List[bool], k: int,
+           rows: np.ndarray) -> np.ndarray:
+    """
+    The k of rows that come first in stable sort order, unordered
+    
+    np.partition finds the k-th value of the first key; rows before it are
+    selected, and the rows equal to it (or missing, when too few values are
+    present) are narrowed down by the remaining keys. Rows tied on every key
+    are taken in position order.
+    """
+    if k >= len(rows):
+        return rows
+    if k == 0:
+        return rows[:0]
+    if not sort_keys:
+        return rows[:k]
+    
+    values, missing = sort_keys[0]
+    values, missing = values[rows], missing[rows]
+    present = rows[~missing]
+    if k >= len(present):
+        # Missing values sort last, ordered by the remaining keys
+        return np.concatenate((present, _top_k(sort_keys[1:], ascending[1:], k - len(present), rows[missing])))
+    
+    values = values[~missing]
+    kth = k - 1 if ascending[0] else len(values) - k
+    threshold = np.partition(values, kth)[kth]
+    before = values < threshold if ascending[0] else values > threshold
+    tied = values == threshold
+    selected = present[before]
+    return np.concatenate((selected, _top_k(sort_keys[1:], ascending[1:], k - len(selected), present[tied])))
+
+
+def _filter_mask(column: pd.Series, condition: str, value: Any, regex: bool = False) -> pd.Series:
+    """
+    Boolean mask of the rows of column that satisfy a filter condition
+    
+    'contains' finds value as a literal substring, or as a regular expression
+    with regex; 'contains_any' finds any of a list of literal terms (see
+    text_search).
+    """
+    if isinstance(column.dtype, pd.CategoricalDtype) and condition != 'equals':
+        # Test each category once and look rows up by code (which also gives
+        # unordered categoricals the comparisons of their values)
+        matches = _filter_mask(pd.Series(column.cat.categories), condition, value, regex).to_numpy(dtype=bool)
+        # Missing values (code -1) never match
+        return pd.Series(np.append(matches, False)[column.cat.codes.to_numpy()], index=column.index)
+    
+    if condition == 'equals':
+        mask = column == value
+    elif condition == 'greater_than':
+        mask = column > value
+    elif condition == 'less_than':
+        mask = column < value
+    elif condition in ('contains', 'contains_any'):
+        mask = pd.Series(_text_mask(column, condition, value, regex), index=column.index)
+    else:
+        raise ValueError(f"Unknown filter condition: {condition}")
+    
+    if mask.dtype != bool:
+        # Nullable results, e.g. of Arrow-backed strings: missing values do not match
+        mask = mask.fillna(False).astype(bool)
+    return mask
+
+
+def _text_mask(column: pd.Series, condition: str, value: Any, regex: bool) -> np.ndarray:
+    """contains or contains_any, searching each distinct value once where values repeat"""
+    column.str  # Raises for columns without string values, as column.str.contains did
+    if condition == 'contains':
+        pattern = str(value)
+        search = lambda values: text_search.contains(values, pattern, regex=regex)
+    else:
+        if not isinstance(value, list):
+            raise ValueError("contains_any needs a list of terms as its value")
+        terms = [str(term) for term in value]
+        search = lambda values: text_search.contains_any(values, terms)
+    
+    if column.dtype == object:
+        values = column.to_numpy()
+        try:
+            codes, uniques = pd.factorize(values) if _has_repeated_values(values) else (None, None)
+        except TypeError:  # unhashable values, e.g. lists
+            codes = None
+        if codes is not None:
+            # Missing values (code -1) never match
+            return np.append(search(pd.Series(uniques, dtype=object)), False)[codes]
+    return search(column)
+
+
+def _apply_operations(df: pd.DataFrame, operations: List[Dict]) -> pd.DataFrame:
+    """Apply process_dataframe operations one at a time, without planning"""
+    for op in operations:
+        with _step_span('process', op.get('type')):
+            df = _apply_operation(df, op)
+    
+    return df
+
+
+def _step_span(prefix: str, step_type: Any):
+    """
+    Metrics span of one operation, transformation or plan step, e.g. 'process.filter'
+    
+    Unknown types share the name 'other', so request contents cannot add metric series.
+    """
+    return span(f"{prefix}.{step_type if step_type in _STEP_TYPES else 'other'}")
+
+
+def _apply_operation(df: pd.DataFrame, op: Dict) -> pd.DataFrame:
+    """Apply a single process_dataframe operation"""
+    operation_type = op.get('type')
+    
+    if operation_type == 'filter':
+        # Filter rows based on condition
+        column = op.get('column')
+        condition = op.get('condition')
+        value = op.get('value')
+        
+        if condition in _FILTER_CONDITIONS:
+            df = df[_filter_mask(df[column], condition, value, bool(op.get('regex', False)))]
+    
+    elif operation_type == 'sort':
+        # Sort by column(s)
+        columns = op.get('columns', [])
+        ascending = op.get('ascending', True)
+        if op.get('limit') is None:
+            df = df.sort_values(by=columns, ascending=ascending, kind='stable')
+        else:
+            limit = _row_limit(op['limit'], 'sort limit')
+            by = [columns] if isinstance(columns, str) else list(columns)
+            df = df.iloc[_sort_order(df[by], ascending, limit)]
+    
+    elif operation_type == 'head':
+        # Keep the first n rows
+        df = df.head(_row_limit(op.get('n'), 'head n'))
+    
+    elif operation_type == 'select':
+        # Select specific columns
+        columns = op.get('columns', [])
+        df = df[columns]
+    
+    elif operation_type == 'rename':
+        # Rename columns
+        mapping = op.get('mapping', {})
+        df = df.rename(columns=mapping)
+    
+    return df
 
 
-def aggregate_dataframe(data: List[Dict], group_by: List[str] = None, 
-                       aggregations: Dict[str, str] = None) -> Dict:
+def aggregate_dataframe(data: Union[List[Dict], Dict], group_by: List[str] = None, 
+                       aggregations: Dict[str, str] = None, data_format: str = 'records',
+                       workers: Optional[int] = 1, data_key: str = None,
+                       dataset_id: str = None, store_result: bool = False,
+                       compact: Union[bool, str] = False) -> Dict:
     """
     Perform aggregation operations on dataframe
     
+    With more than one worker, inputs of at least PARALLEL_AGGREGATION_MIN_ROWS
+    rows whose aggregations are all in MERGEABLE_AGGREGATIONS are split across
+    a process pool (see _parallel_aggregate); the result is the same as the
+    in-process path, up to the last digit of floating point means, variances
+    and standard deviations, which are merged from partial states.
+    
     Args:
-        data: List of dictionaries representing rows
+        data: Rows in any format accepted by load_dataframe
         group_by: Columns to group by
         aggregations: Dictionary mapping column names to aggregation functions
                      (e.g., {'sales': 'sum', 'price': 'mean'})
+        data_format: Output format of 'data': 'records', 'columnar', 'split' or 'arrow'
+        workers: Worker processes to aggregate with (None for one per CPU)
+        data_key: Identity of the input data for the result cache, see process_dataframe
+        dataset_id: ID of a registered dataset to use instead of data
+        store_result: Also register the result, returning its 'datasetId'
+        compact: Compact the input first, see process_dataframe
     
     Returns:
         Dictionary with aggregated data
+    
+    Raises:
+        ValueError: If the dataset registry is disabled and dataset_id or
+                    store_result is given
+        DatasetNotFoundError: If dataset_id is unknown or expired
     """
     if group_by is None:
         group_by = []
     if aggregations is None:
         aggregations = {}
+    if workers is None:
+        workers = os.cpu_count() or 1
+    data, data_key = _resolve_input(data, dataset_id, data_key, store_result)
     
-    # Convert to DataFrame
-    df = pd.DataFrame(data)
+    def compute(df):
+        df = _decategorize_aggregated(df, aggregations)
+        if aggregations and workers > 1 and _can_aggregate_in_parallel(df, group_by, aggregations):
+            return _parallel_aggregate(df, group_by, aggregations, workers)
+        if group_by and aggregations:
+            # Group and aggregate (only the key combinations present, for categorical keys)
+            return df.groupby(group_by, observed=True).agg(aggregations).reset_index()
+        if aggregations:
+            # Aggregate without grouping
+            return df.agg(aggregations).to_frame().T
+        return df
     
-    if group_by and aggregations:
-        # Group and aggregate
-        result_df = df.groupby(group_by).agg(aggregations).reset_index()
-    elif aggregations:
-        # Aggregate without grouping
-        result_df = df.agg(aggregations).to_frame().T
-    else:
-        result_df = df
+    params = {'groupBy': group_by, 'aggregations': aggregations}
+    result_df = _cached_result('aggregate', data, data_key, params, compute, compact)
     
-    # Convert back to list of dictionaries
-    result = result_df.to_dict('records')
+    # Convert back to the requested wire format
+    result = dump_dataframe(result_df, data_format)
     
-    return {
+    output = {
         'data': result,
         'shape': list(result_df.shape),
         'columns': list(result_df.columns)
     }
+    if compact:
+        output['memory'] = _memory_output(result_df)
+    if store_result:
+        output['datasetId'] = _require_registry().register(result_df)['dataset_id']
+    return output
+
+
+def _decategorize_aggregated(df: pd.DataFrame, aggregations: Dict) -> pd.DataFrame:
+    """
+    Convert categorical columns back to their values where an aggregation
+    needs them (e.g. min and max, which unordered categoricals do not support)
+    """
+    columns = []
+    for column, func in aggregations.items():
+        funcs = func if isinstance(func, list) else [func]
+        if (column in df.columns and isinstance(df[column].dtype, pd.CategoricalDtype)
+                and not all(f in _CATEGORICAL_AGGREGATIONS for f in funcs)):
+            columns.append(column)
+    if not columns:
+        return df
+    df = df.copy(deep=False)
+    for column in columns:
+        df[column] = df[column].astype(df[column].cat.categories.dtype)
+    return df
+
+
+def _can_aggregate_in_parallel(df: pd.DataFrame, group_by: List[str], aggregations: Dict) -> bool:
+    """Whether the input is large enough, and the aggregations mergeable, for _parallel_aggregate"""
+    if len(df) < PARALLEL_AGGREGATION_MIN_ROWS:
+        return False
+    if not all(isinstance(func, str) and func in MERGEABLE_AGGREGATIONS for func in aggregations.values()):
+        return False
+    # Unobserved categories would be dropped by the merge
+    return not any(isinstance(df[column].dtype, pd.CategoricalDtype) for column in group_by)
+
+
+def _parallel_aggregate(df: pd.DataFrame, group_by: List[str], aggregations: Dict[str, str],
+                        workers: int) -> pd.DataFrame:
+    """
+    Aggregate across a process pool via mergeable partial states
+    
+    The rows are split into one contiguous range per worker. Each worker
+    reduces its range to partial states per group (sums, counts, minima,
+    maxima and second moments) with _partial_aggregates, and the states of
+    groups spanning several ranges are merged and finalized into the frame
+    the single-process path would return.
+    
+    Each worker is sent its range of only the grouped and aggregated
+    columns. The pool is the long-lived one of _aggregation_pool, so workers
+    start once per server process rather than once per request.
+    """
+    ranges = [(len(df) * i // workers, len(df) * (i + 1) // workers) for i in range(workers)]
+    frame = df[list(dict.fromkeys(list(group_by) + list(aggregations)))]
+    
+    pool = _aggregation_pool(workers)
+    try:
+        partials = list(pool.map(
+            _partial_aggregates,
+            [frame.iloc[start:stop] for start, stop in ranges], [group_by] * workers, [aggregations] * workers
+        ))
+    except BrokenProcessPool:
+        # A worker died (e.g. killed for memory); start a new pool next time
+        _discard_aggregation_pool(pool)
+        raise
+    
+    states = _merge_partial_aggregates(pd.concat(partials))
+    
+    result = pd.DataFrame({
+        column: _finalize_aggregate(states, column, func) for column, func in aggregations.items()
+    }, index=states.index)
+    
+    if not group_by:
+        # Same shape and scalar types as df.agg(aggregations).to_frame().T
+        values = {column: result[column].iloc[0] for column in aggregations}
+        values.update({column: int(values[column]) for column, func in aggregations.items() if func == 'size'})
+        return pd.Series(values).to_frame().T
+    return result.reset_index()
+
+
+def _aggregation_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Process pool for _parallel_aggregate with at least workers processes,
+    created on first use and kept for later requests
+    
+    Workers are started with forkserver where available, else spawn, never
+    by forking the (multi-threaded) server process. A request for more
+    workers than the pool has replaces it; requests already running on the
+    old pool finish on it.
+    """
+    global _aggregation_executor, _aggregation_workers
+    with _aggregation_pool_lock:
+        if _aggregation_executor is None or _aggregation_workers < workers:
+            if _aggregation_executor is not None:
+                _aggregation_executor.shutdown(wait=False)
+            method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            _aggregation_executor = ProcessPoolExecutor(max_workers=workers,
+                                                        mp_context=multiprocessing.get_context(method))
+            _aggregation_workers = workers
+        return _aggregation_executor
+
+
+def _discard_aggregation_pool(pool: ProcessPoolExecutor) -> None:
+    global _aggregation_executor
+    with _aggregation_pool_lock:
+        if _aggregation_executor is pool:
+            _aggregation_executor = None
+    pool.shutdown(wait=False)
+
+
+def _partial_aggregates(frame: pd.DataFrame, group_by: List[str], aggregations: Dict[str, str]) -> pd.DataFrame:
+    """
+    Mergeable partial states of one partition, indexed by group key
+    
+    State columns are named '<column>|<state>' for the states the requested
+    aggregations need: sum, count, size, min, max and m2 (sum of squared
+    deviations from the partition mean).
+    """
+    keys = group_by if group_by else np.zeros(len(frame), dtype=np.int8)
+    grouped = frame.groupby(keys)
+    
+    states = {}
+    for column, func in aggregations.items():
+        values = grouped[column]
+        for state in _AGGREGATE_STATES[func]:
+            name = f'{column}|{state}'
+            if state == 'm2':
+                states[name] = values.var(ddof=0) * values.count()
+            else:
+                states[name] = getattr(values, state)()
+    return pd.DataFrame(states)
+
+
+def _merge_partial_aggregates(states: pd.DataFrame) -> pd.DataFrame:
+    """
+    Combine partial states that share a group key
+    
+    Sums, counts and sizes add, minima and maxima reduce, and second moments
+    use the pairwise update of Chan et al.:
+    m2 = sum(m2_i) + sum(n_i * (mean_i - mean) ** 2).
+    """
+    grouped = states.groupby(level=list(range(states.index.nlevels)))
+    merged = {}
+    for name in states.columns:
+        column, state = name.rsplit('|', 1)
+        if state in ('sum', 'count', 'size'):
+            merged[name] = grouped[name].sum()
+        elif state in ('min', 'max'):
+            merged[name] = getattr(grouped[name], state)()
+        else:
+            count, total = states[f'{column}|count'], states[f'{column}|sum']
+            with np.errstate(invalid='ignore', divide='ignore'):
+                partial_mean = total / count
+                mean = grouped[f'{column}|sum'].transform('sum') / grouped[f'{column}|count'].transform('sum')
+            spread = (count * (partial_mean - mean) ** 2).where(count > 0, 0.0)
+            merged[name] = grouped[name].sum() + spread.groupby(level=list(range(states.index.nlevels))).sum()
+    return pd.DataFrame(merged)
+
+
+def _finalize_aggregate(states: pd.DataFrame, column: str, func: str) -> pd.Series:
+    """Final value of one aggregation from merged partial states"""
+    if func in ('sum', 'count', 'size', 'min', 'max'):
+        return states[f'{column}|{func}']
+    
+    count = states[f'{column}|count']
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if func == 'mean':
+            return states[f'{column}|sum'] / count
+        variance = (states[f'{column}|m2'] / (count - 1)).where(count > 1)
+    return variance if func == 'var' else np.sqrt(variance)
+
+
+# Process pool of _parallel_aggregate and its size, see _aggregation_pool
+_aggregation_executor = None
+_aggregation_workers = 0
+_aggregation_pool_lock = threading.Lock()
+
+# Partial states each mergeable aggregation is computed from
+_AGGREGATE_STATES = {
+    'sum': ('sum',),
+    'count': ('count',),
+    'size': ('size',),
+    'min': ('min',),
+    'max': ('max',),
+    'mean': ('sum', 'count'),
+    'var': ('sum', 'count', 'm2'),
+    'std': ('sum', 'count', 'm2')
+}
 
 
-def transform_dataframe(data: List[Dict], transformations: List[Dict] = None) -> Dict:
+def transform_dataframe(data: Union[List[Dict], Dict], transformations: List[Dict] = None,
+                        data_format: str = 'records', data_key: str = None,
+                        dataset_id: str = None, store_result: bool = False,
+                        explain: bool = False, compact: Union[bool, str] = False) -> Dict:
     """
     Transform dataframe with custom operations
     
+    The transformations are compiled by plan_transformations: steps whose
+    output is overwritten before it is read are skipped, independent
+    calculations share one input frame of the columns they reference (each
+    expression is still its own DataFrame.eval), consecutive string functions
+    on a column run in one pass, and the output DataFrame is assembled once.
+    
     Args:
-        data: List of dictionaries representing rows
+        data: Rows in any format accepted by load_dataframe
         transformations: List of transformation dictionaries
+        data_format: Output format of 'data': 'records', 'columnar', 'split' or 'arrow'
+        data_key: Identity of the input data for the result cache, see process_dataframe
+        dataset_id: ID of a registered dataset to use instead of data
+        store_result: Also register the result, returning its 'datasetId'
+        explain: Return the compiled plan instead of running it
+        compact: Compact the input first, see process_dataframe
     
     Returns:
-        Dictionary with transformed data
+        Dictionary with transformed data, or with the plan when explain is set
+    
+    Raises:
+        ValueError: If the dataset registry is disabled and dataset_id or
+                    store_result is given
+        DatasetNotFoundError: If dataset_id is unknown or expired
     """
     if transformations is None:
         transformations = []
+    data, data_key = _resolve_input(data, dataset_id, data_key, store_result)
+    
+    if explain:
+        df = load_dataframe(data)
+        return {'plan': plan_transformations(transformations, list(df.columns))}
+    
+    def compute(df):
+        plan = plan_transformations(transformations, list(df.columns))
+        if plan is None:
+            for transform in transformations:
+                with _step_span('transform', transform.get('type')):
+                    df = _apply_transformation(df, transform)
+            return df
+        return _execute_transformations(df, plan)
+    
+    df = _cached_result('transform', data, data_key, {'transformations': transformations}, compute, compact)
+    
+    # Convert back to the requested wire format
+    result = dump_dataframe(df, data_format)
+    
+    output = {
+        'data': result,
+        'shape': list(df.shape),
+        'columns': list(df.columns),
+        'dtypes': {col: str(dtype) for col, dtype in df.dtypes.items()}
+    }
+    if compact:
+        output['memory'] = _memory_output(df)
+    if store_result:
+        output['datasetId'] = _require_registry().register(df)['dataset_id']
+    return output
+
+
+def plan_transformations(transformations: List[Dict], columns: List[str]) -> Optional[Dict]:
+    """
+    Compile a transform_dataframe transformation list into an execution plan
+    
+    Each transformation's reads and writes are tracked, including the columns
+    a calculate expression references, so that:
+    - steps whose output column is overwritten before anything reads it are
+      eliminated, along with unknown transformations and functions
+    - consecutive 'calculate' steps that do not read each other's outputs form
+      one step, whose expressions are evaluated one by one against the same
+      input columns (built, and their integers widened, once for the step)
+    - string functions (upper, lower, strip) on a column are fused into one
+      'string' step as long as nothing touches the column in between
     
-    # Convert to DataFrame
-    df = pd.DataFrame(data)
+    Steps are 'constant' (add_column), 'calculate' (column to expression),
+    'string' (column and functions), 'numeric' (abs or round), 'fill_na',
+    'convert_type' and 'drop_na'.
     
-    # Apply transformations
-    for transform in transformations:
+    Args:
+        transformations: List of transformation dictionaries
+        columns: Column names of the input DataFrame
+    
+    Returns:
+        Dictionary with 'steps', the 'eliminated' transformations and the
+        output 'columns' in order, or None if the transformations need the
+        step-by-step interpreter
+    """
+    if len(set(columns)) != len(columns):
+        return None
+    
+    order = list(columns)
+    eliminated = []
+    records = []  # (index, transform, written column, read columns, overwrites the whole column)
+    
+    for index, transform in enumerate(transformations):
         transform_type = transform.get('type')
         
         if transform_type == 'add_column':
-            # Add a new column
-            column_name = transform.get('name')
-            value = transform.get('value')
-            df[column_name] = value
-        
+            records.append((index, transform, transform.get('name'), [], True))
         elif transform_type == 'calculate':
-            # Calculate new column based on expression
-            column_name = transform.get('name')
-            expression = transform.get('expression')
-            # Safely evaluate mathematical expressions
-            df[column_name] = df.eval(expression)
-        
-        elif transform_type == 'fill_na':
-            # Fill missing values
+            reads = _expression_columns(transform.get('expression'), order)
+            records.append((index, transform, transform.get('name'), reads, True))
+        elif transform_type in ('fill_na', 'convert_type'):
             column = transform.get('column')
-            fill_value = transform.get('value', 0)
-            df[column] = df[column].fillna(fill_value)
-        
+            records.append((index, transform, column, [column], False))
+        elif transform_type == 'apply_function':
+            if transform.get('function') not in _STRING_FUNCTIONS + _NUMERIC_FUNCTIONS:
+                eliminated.append({'index': index, 'type': transform_type, 'reason': 'unknown function'})
+                continue
+            column = transform.get('column')
+            records.append((index, transform, column, [column], False))
         elif transform_type == 'drop_na':
-            # Drop rows with missing values
             subset = transform.get('columns')
-            df = df.dropna(subset=subset)
+            reads = list(order) if subset is None else [subset] if isinstance(subset, str) else list(subset)
+            records.append((index, transform, None, reads, False))
+        else:
+            eliminated.append({'index': index, 'type': transform_type, 'reason': 'unknown transformation'})
+            continue
         
-        elif transform_type == 'convert_type':
-            # Convert column type
-            column = transform.get('column')
-            dtype = transform.get('dtype')
-            df[column] = df[column].astype(dtype)
+        _, _, written, _, overwrites = records[-1]
+        if overwrites and written not in order:
+            order.append(written)
+    
+    # Backwards: a write is dead if the column is overwritten before it is read
+    overwritten = set()
+    live = []
+    for record in reversed(records):
+        index, transform, written, reads, overwrites = record
+        if written is not None and written in overwritten:
+            eliminated.append({'index': index, 'type': transform.get('type'), 'reason': 'overwritten before use'})
+            continue
+        if overwrites:
+            overwritten.add(written)
+        overwritten.difference_update(reads)
+        live.append(record)
+    live.reverse()
+    
+    steps = []
+    last_touch = {}  # column -> position in steps of the last step reading or writing it
+    for index, transform, written, reads, overwrites in live:
+        transform_type = transform.get('type')
+        function = transform.get('function')
         
+        if transform_type == 'apply_function' and function in _STRING_FUNCTIONS:
+            position = last_touch.get(written)
+            if position is not None and steps[position]['step'] == 'string' and steps[position]['column'] == written:
+                steps[position]['functions'].append(function)
+                continue
+            step = {'step': 'string', 'column': written, 'functions': [function]}
         elif transform_type == 'apply_function':
-            # Apply custom function to column
-            column = transform.get('column')
-            function_name = transform.get('function')
+            step = {'step': 'numeric', 'column': written, 'function': function, 'decimals': transform.get('decimals', 0)}
+        elif transform_type == 'calculate':
+            last = steps[-1] if steps else None
+            if (last is not None and last['step'] == 'calculate' and written not in last['columns']
+                    and not set(reads) & set(last['columns'])):
+                last['columns'][written] = transform.get('expression')
+                for column in reads + [written]:
+                    last_touch[column] = len(steps) - 1
+                continue
+            step = {'step': 'calculate', 'columns': {written: transform.get('expression')}}
+        elif transform_type == 'add_column':
+            step = {'step': 'constant', 'column': written, 'value': transform.get('value')}
+        elif transform_type == 'fill_na':
+            step = {'step': 'fill_na', 'column': written, 'value': transform.get('value', 0)}
+        elif transform_type == 'convert_type':
+            step = {'step': 'convert_type', 'column': written, 'dtype': transform.get('dtype')}
+        else:
+            step = {'step': 'drop_na', 'columns': transform.get('columns')}
+        
+        steps.append(step)
+        for column in reads + ([written] if written is not None else []):
+            last_touch[column] = len(steps) - 1
+    
+    eliminated.sort(key=lambda entry: entry['index'])
+    return {'steps': steps, 'eliminated': eliminated, 'columns': order}
+
+
+def _expression_columns(expression: Any, columns: Iterable[str]) -> List[str]:
+    """Columns a DataFrame.eval expression may reference (a superset is harmless)"""
+    if not isinstance(expression, str):
+        return []
+    names = set(_QUOTED_NAME_PATTERN.findall(expression))
+    names.update(_IDENTIFIER_PATTERN.findall(_QUOTED_NAME_PATTERN.sub(' ', expression)))
+    return [column for column in columns if column in names]
+
+
+def _execute_transformations(df: pd.DataFrame, plan: Dict) -> pd.DataFrame:
+    """
+    Run a plan from plan_transformations
+    
+    Columns are held as separate Series (add_column values stay scalars until
+    something reads them), calculations are evaluated on a frame of just the
+    columns they reference, and the output DataFrame is built once.
+    """
+    index = df.index
+    values = {column: df[column] for column in df.columns}
+    
+    def column_values(name):
+        value = values[name]
+        if not isinstance(value, pd.Series):
+            # Broadcast through DataFrame assignment, so dtypes match df[name] = value
+            frame = pd.DataFrame(index=index)
+            frame[name] = value
+            value = values[name] = frame[name]
+        return value
+    
+    for step in plan['steps']:
+        kind = step['step']
+        
+        with _step_span('transform', kind):
+            if kind == 'constant':
+                values[step['column']] = step['value']
+            
+            elif kind == 'calculate':
+                referenced = set()
+                for expression in step['columns'].values():
+                    referenced.update(_expression_columns(expression, values))
+                inputs = _widen_integers(pd.DataFrame({name: column_values(name) for name in values if name in referenced},
+                                                      index=index, copy=False))
+                # All expressions read the columns as they were before this step. Each
+                # is its own eval: a multi-line eval runs the lines one at a time
+                # too, on a copy of inputs
+                values.update({name: inputs.eval(expression) for name, expression in step['columns'].items()})
+            
+            elif kind == 'string':
+                values[step['column']] = _apply_string_functions(column_values(step['column']), step['functions'])
+            
+            elif kind == 'numeric':
+                column = column_values(step['column'])
+                values[step['column']] = column.abs() if step['function'] == 'abs' else column.round(step['decimals'])
+            
+            elif kind == 'fill_na':
+                values[step['column']] = _fill_missing(column_values(step['column']), step['value'])
+            
+            elif kind == 'convert_type':
+                values[step['column']] = column_values(step['column']).astype(step['dtype'])
             
-            if function_name == 'upper':
-                df[column] = df[column].str.upper()
-            elif function_name == 'lower':
-                df[column] = df[column].str.lower()
-            elif function_name == 'strip':
-                df[column] = df[column].str.strip()
-            elif function_name == 'abs':
-                df[column] = df[column].abs()
-            elif function_name == 'round':
-                decimals = transform.get('decimals', 0)
-                df[column] = df[column].round(decimals)
-    
-    # Convert back to list of dictionaries
-    result = df.to_dict('records')
+            elif kind == 'drop_na':
+                subset = step['columns']
+                subset = list(values) if subset is None else [subset] if isinstance(subset, str) else subset
+                keep = np.ones(len(index), dtype=bool)
+                for name in subset:
+                    keep &= column_values(name).notna().to_numpy()
+                if not keep.all():
+                    positions = np.flatnonzero(keep)
+                    index = index[positions]
+                    values = {
+                        name: value.iloc[positions].set_axis(index) if isinstance(value, pd.Series) else value
+                        for name, value in values.items()
+                    }
     
-    return {
-        'data': result,
-        'shape': list(df.shape),
-        'columns': list(df.columns),
-        'dtypes': {col: str(dtype) for col, dtype in df.dtypes.items()}
-    }
+    return pd.DataFrame({name: column_values(name) for name in plan['columns']}, index=index, copy=False)
+
 
+def _apply_string_functions(column: pd.Series, functions: List[str]) -> pd.Series:
+    """
+    Apply a chain of str methods to a column, in one pass when possible
+    
+    Same result as calling column.str.<function>() for each function in turn.
+    Columns of strings (or missing values) whose values repeat, as report
+    text columns usually do, are factorized and the chain runs once per
+    distinct value. Other columns use the pandas methods one at a time: for
+    mixed types the .str results depend on each value's type, and mostly
+    unique strings gain nothing from factorizing. Categoricals of strings
+    run the chain once per category.
+    """
+    methods = [_STRING_METHODS[function] for function in functions]
+    
+    def apply(value):
+        for method in methods:
+            value = method(value)
+        return value
+    
+    if isinstance(column.dtype, pd.CategoricalDtype) and \
+            pd.api.types.infer_dtype(column.cat.categories, skipna=True) == 'string':
+        # Objects with NaN for missing values, like .str on a categorical
+        transformed = np.empty(len(column.cat.categories) + 1, dtype=object)
+        transformed[:-1] = [apply(value) for value in column.cat.categories]
+        transformed[-1] = np.nan
+        return pd.Series(transformed[column.cat.codes.to_numpy()], index=column.index, name=column.name)
+    
+    if (column.dtype != object or pd.api.types.infer_dtype(column, skipna=True) not in ('string', 'empty')
+            or not _has_repeated_values(column.to_numpy())):
+        for function in functions:
+            column = getattr(column.str, function)()
+        return column
+    
+    values = column.to_numpy()
+    codes, uniques = pd.factorize(values)
+    # One extra slot for missing values (code -1), which are then restored as they were
+    transformed = np.empty(len(uniques) + 1, dtype=object)
+    transformed[:-1] = [apply(value) for value in uniques]
+    result = transformed[codes]
+    missing = codes == -1
+    result[missing] = values[missing]
+    return pd.Series(result, index=column.index, name=column.name)
 
-def calculate_statistics(data: List[Dict], columns: List[str] = None) -> Dict:
+
+def _has_repeated_values(values: np.ndarray) -> bool:
+    """Whether at most half of an evenly spaced sample of about 1000 values is distinct"""
+    sample = values[::max(1, len(values) // 1000)]
+    return len(set(sample)) <= len(sample) // 2
+
+
+def _fill_missing(column: pd.Series, value: Any) -> pd.Series:
+    """column.fillna(value), first adding value to the categories of a categorical column"""
+    if (isinstance(column.dtype, pd.CategoricalDtype) and pd.api.types.is_scalar(value)
+            and not pd.isna(value) and value not in column.cat.categories):
+        column = column.cat.add_categories([value])
+    return column.fillna(value)
+
+
+def _widen_integers(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    df with integer columns narrower than 64 bits widened, as numexpr does,
+    so expressions on downcast columns cannot overflow
+    """
+    positions = [i for i, dtype in enumerate(df.dtypes)
+                 if isinstance(dtype, np.dtype) and dtype.kind in 'iu' and dtype.itemsize < 8]
+    if not positions:
+        return df
+    df = df.copy(deep=False)
+    for position in positions:
+        column = df.iloc[:, position]
+        df.isetitem(position, column.astype(np.int64 if column.dtype.kind == 'i' else np.uint64))
+    return df
+
+
+def _apply_transformation(df: pd.DataFrame, transform: Dict) -> pd.DataFrame:
+    """Apply a single transform_dataframe transformation"""
+    transform_type = transform.get('type')
+    
+    if transform_type == 'add_column':
+        # Add a new column
+        column_name = transform.get('name')
+        value = transform.get('value')
+        df[column_name] = value
+    
+    elif transform_type == 'calculate':
+        # Calculate new column based on expression
+        column_name = transform.get('name')
+        expression = transform.get('expression')
+        # Safely evaluate mathematical expressions
+        df[column_name] = _widen_integers(df).eval(expression)
+    
+    elif transform_type == 'fill_na':
+        # Fill missing values
+        column = transform.get('column')
+        fill_value = transform.get('value', 0)
+        df[column] = _fill_missing(df[column], fill_value)
+    
+    elif transform_type == 'drop_na':
+        # Drop rows with missing values
+        subset = transform.get('columns')
+        df = df.dropna(subset=subset)
+    
+    elif transform_type == 'convert_type':
+        # Convert column type
+        column = transform.get('column')
+        dtype = transform.get('dtype')
+        df[column] = df[column].astype(dtype)
+    
+    elif transform_type == 'apply_function':
+        # Apply custom function to column
+        column = transform.get('column')
+        function_name = transform.get('function')
+        
+        if function_name == 'upper':
+            df[column] = df[column].str.upper()
+        elif function_name == 'lower':
+            df[column] = df[column].str.lower()
+        elif function_name == 'strip':
+            df[column] = df[column].str.strip()
+        elif function_name == 'abs':
+            df[column] = df[column].abs()
+        elif function_name == 'round':
+            decimals = transform.get('decimals', 0)
+            df[column] = df[column].round(decimals)
+    
+    return df
+
+
+def stream_dataframe(chunks: Iterable, operations: List[Dict] = None) -> Iterator[pd.DataFrame]:
+    """
+    Apply row-local operations to a dataset one chunk at a time
+    
+    Only one chunk is held in memory at a time, so peak memory is bounded by
+    the chunk size rather than the dataset size. Accepts the process_dataframe
+    operations filter, select and rename and all transform_dataframe
+    transformations. Operations that need the whole dataset (sort, head) are
+    rejected.
+    
+    Args:
+        chunks: Iterable of DataFrames (e.g. from read_ndjson_chunks or
+                read_csv_chunks) or of data in any format accepted by
+                load_dataframe. DataFrame chunks may be modified in place.
+        operations: List of operation dictionaries to apply to every chunk
+    
+    Returns:
+        Iterator of processed, non-empty DataFrame chunks
+    
+    Raises:
+        ValueError: If an operation cannot be applied chunk by chunk
+    """
+    if operations is None:
+        operations = []
+    
+    for op in operations:
+        if op.get('type') not in STREAMABLE_OPERATIONS:
+            raise ValueError(f"Operation {op.get('type')!r} cannot be streamed; "
+                             f"supported operations: {', '.join(STREAMABLE_OPERATIONS)}")
+    
+    return _stream_chunks(chunks, operations)
+
+
+def _stream_chunks(chunks: Iterable, operations: List[Dict]) -> Iterator[pd.DataFrame]:
+    for chunk in chunks:
+        with span('stream.chunk') as step:
+            df = chunk if isinstance(chunk, pd.DataFrame) else load_dataframe(chunk)
+            step.rows = len(df)
+            
+            for op in operations:
+                if op.get('type') in ('filter', 'select', 'rename'):
+                    # Shallow copy so later column assignments don't act on a slice
+                    df = _apply_operation(df, op).copy(deep=False)
+                else:
+                    df = _apply_transformation(df, op)
+        
+        if len(df):
+            yield df
+
+
+def read_ndjson_chunks(source: Union[str, IO], chunk_size: int = 10000) -> Iterator[pd.DataFrame]:
+    """
+    Read newline-delimited JSON records in DataFrame chunks
+    
+    Args:
+        source: Path or file-like object with one JSON object per line
+        chunk_size: Rows per chunk
+    """
+    return iter(pd.read_json(source, lines=True, chunksize=chunk_size))
+
+
+def read_csv_chunks(source: Union[str, IO], chunk_size: int = 10000) -> Iterator[pd.DataFrame]:
+    """
+    Read CSV rows in DataFrame chunks
+    
+    Args:
+        source: Path or file-like object with a header row
+        chunk_size: Rows per chunk
+    """
+    return iter(pd.read_csv(source, chunksize=chunk_size))
+
+
+def calculate_statistics(data: Union[List[Dict], Dict], columns: List[str] = None,
+                         quantiles: List[float] = None) -> Dict:
     """
     Calculate statistical measures for numeric columns
     
+    The columns are copied once into a float block; count, mean, std, min and
+    max are column-wise reductions over that block, and median and quantiles
+    are found by partial selection rather than a full sort.
+    
     Args:
-        data: List of dictionaries representing rows
+        data: Rows in any format accepted by load_dataframe
         columns: Specific columns to analyze (None for all numeric columns)
+        quantiles: Optional quantiles in [0, 1] to add, e.g. [0.25, 0.75]
     
     Returns:
-        Dictionary with statistical measures
+        Dictionary with statistical measures, plus 'quantiles' (quantile to
+        column to value) when quantiles are requested
+    
+    Raises:
+        TypeError: If a requested column is not numeric
     """
-    df = pd.DataFrame(data)
+    df = load_dataframe(data)
     
     if columns:
         df = df[columns]
+        non_numeric = [column for column, dtype in df.dtypes.items()
+                       if not (pd.api.types.is_numeric_dtype(dtype) or pd.api.types.is_bool_dtype(dtype))]
+        if non_numeric:
+            raise TypeError(f"Cannot calculate statistics for non-numeric columns: {non_numeric}")
     else:
         # Select only numeric columns
         df = df.select_dtypes(include=[np.number])
     
+    names = list(df.columns)
+    block = _float_block(df)
+    moments = _column_moments(df, block)
+    
+    with np.errstate(invalid='ignore', divide='ignore'):
+        std = np.where(moments['count'] > 1, np.sqrt(moments['m2'] / (moments['count'] - 1)), np.nan)
+    
+    quantiles = list(quantiles or [])
+    points = _column_quantiles(block, [0.5] + quantiles)
+    
     stats = {
-        'mean': df.mean().to_dict(),
-        'median': df.median().to_dict(),
-        'std': df.std().to_dict(),
-        'min': df.min().to_dict(),
-        'max': df.max().to_dict(),
-        'count': df.count().to_dict()
+        'mean': _by_column(names, moments['mean']),
+        'median': _by_column(names, points[0]),
+        'std': _by_column(names, std),
+        'min': dict(zip(names, moments['min'])),
+        'max': dict(zip(names, moments['max'])),
+        'count': {name: int(count) for name, count in zip(names, moments['count'])}
     }
+    if quantiles:
+        stats['quantiles'] = {str(q): _by_column(names, values) for q, values in zip(quantiles, points[1:])}
     
     return stats
+
+
+class StatisticsAccumulator:
+    """
+    Mergeable running statistics (count, mean, std, min, max) per column
+    
+    Chunks are reduced with the same column-wise kernel as calculate_statistics
+    and combined with the parallel (Chan et al.) form of Welford's update, so
+    partial results from chunks, processes or workers can be merged in any
+    order. Median and quantiles are not mergeable and are not tracked.
+    
+    Example:
+        >>> accumulator = StatisticsAccumulator()
+        >>> for chunk in read_csv_chunks('extract.csv'):
+        ...     accumulator.update(chunk)
+        >>> accumulator.result()['mean']
+    """
+    
+    def __init__(self, columns: List[str] = None):
+        """
+        Args:
+            columns: Columns to track (None for the numeric columns of each chunk)
+        """
+        self.columns = columns
+        self._state = {}  # column -> [count, mean, m2, min, max]
+    
+    def update(self, data: Union[pd.DataFrame, List[Dict], Dict]) -> 'StatisticsAccumulator':
+        """Add a chunk, as a DataFrame or in any format accepted by load_dataframe"""
+        df = data if isinstance(data, pd.DataFrame) else load_dataframe(data)
+        df = df[self.columns] if self.columns else df.select_dtypes(include=[np.number])
+        
+        moments = _column_moments(df, _float_block(df))
+        for i, column in enumerate(df.columns):
+            self._merge_column(column, [
+                int(moments['count'][i]), float(moments['mean'][i]), float(moments['m2'][i]),
+                moments['min'][i], moments['max'][i]
+            ])
+        return self
+    
+    def merge(self, other: 'StatisticsAccumulator') -> 'StatisticsAccumulator':
+        """Fold another accumulator's statistics into this one"""
+        for column, state in other._state.items():
+            self._merge_column(column, list(state))
+        return self
+    
+    def result(self) -> Dict:
+        """Statistics in the calculate_statistics format, without median"""
+        stats = {'mean': {}, 'std': {}, 'min': {}, 'max': {}, 'count': {}}
+        for column, (count, mean, m2, minimum, maximum) in self._state.items():
+            stats['mean'][column] = mean if count else np.nan
+            stats['std'][column] = float(np.sqrt(m2 / (count - 1))) if count > 1 else np.nan
+            stats['min'][column] = minimum
+            stats['max'][column] = maximum
+            stats['count'][column] = count
+        return stats
+    
+    def to_dict(self) -> Dict:
+        """JSON-serializable partial state, for merging across processes"""
+        return {'columns': self.columns, 'state': {column: list(state) for column, state in self._state.items()}}
+    
+    @classmethod
+    def from_dict(cls, payload: Dict) -> 'StatisticsAccumulator':
+        """Rebuild an accumulator from to_dict output"""
+        accumulator = cls(payload.get('columns'))
+        accumulator._state = {column: list(state) for column, state in payload['state'].items()}
+        return accumulator
+    
+    def _merge_column(self, column: str, incoming: List) -> None:
+        count_b, mean_b, m2_b, min_b, max_b = incoming
+        if column not in self._state or self._state[column][0] == 0:
+            self._state[column] = incoming
+            return
+        if count_b == 0:
+            return
+        
+        count_a, mean_a, m2_a, min_a, max_a = self._state[column]
+        count = count_a + count_b
+        delta = mean_b - mean_a
+        self._state[column] = [
+            count,
+            mean_a + delta * count_b / count,
+            m2_a + m2_b + delta * delta * count_a * count_b / count,
+            min(min_a, min_b),
+            max(max_a, max_b)
+        ]
+
+
+def _float_block(df: pd.DataFrame) -> np.ndarray:
+    """All columns as one float64 array with NaN for missing values, one column per array column"""
+    return np.asfortranarray(df.to_numpy(dtype=np.float64, na_value=np.nan))
+
+
+def _column_moments(df: pd.DataFrame, block: np.ndarray) -> Dict[str, Any]:
+    """
+    Count, mean, sum of squared deviations (m2), min and max of every column
+    
+    Column-wise numpy reductions over the float block: the deviations from the
+    mean are computed in one scratch array, zeroed where values are missing,
+    and m2 is their dot product with themselves. NaN values are skipped. As
+    with pandas' DataFrame.min/max, min and max stay integers (or booleans)
+    only when no selected column is a float column; they are read back from
+    the float results, which hold integers up to 2**53 exactly.
+    """
+    missing = np.isnan(block)
+    count = len(block) - missing.sum(axis=0)
+    
+    deviation = np.where(missing, 0.0, block)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = deviation.sum(axis=0) / count
+    np.subtract(deviation, mean, out=deviation)
+    np.copyto(deviation, 0.0, where=missing)
+    m2 = np.einsum('ij,ij->j', deviation, deviation)
+    del deviation
+    
+    minimum = np.fmin.reduce(block, axis=0) if len(block) else np.full(block.shape[1], np.nan)
+    maximum = np.fmax.reduce(block, axis=0) if len(block) else np.full(block.shape[1], np.nan)
+    minimum, maximum = minimum.tolist(), maximum.tolist()
+    if not any(pd.api.types.is_float_dtype(dtype) for dtype in df.dtypes):
+        for i, dtype in enumerate(df.dtypes):
+            if not count[i]:
+                continue
+            if max(abs(minimum[i]), abs(maximum[i])) > 2 ** 53:
+                # Beyond float precision, read the integers themselves
+                values = df.iloc[:, i].dropna().to_numpy()
+                minimum[i], maximum[i] = values.min().item(), values.max().item()
+            else:
+                exact = bool if pd.api.types.is_bool_dtype(dtype) else int
+                minimum[i], maximum[i] = exact(minimum[i]), exact(maximum[i])
+    
+    return {'count': count, 'mean': mean, 'm2': m2, 'min': minimum, 'max': maximum}
+
+
+def _column_quantiles(block: np.ndarray, quantiles: List[float]) -> np.ndarray:
+    """
+    Linearly interpolated quantiles of every column, skipping NaN, found with
+    one partial selection per column
+    
+    Returns:
+        Array of shape (len(quantiles), columns)
+    """
+    result = np.full((len(quantiles), block.shape[1]), np.nan)
+    for i in range(block.shape[1]):
+        values = block[:, i]
+        values = values[~np.isnan(values)]
+        if len(values):
+            result[:, i] = np.quantile(values, quantiles)
+    return result
+
+
+def _by_column(names: List[str], values: np.ndarray) -> Dict[str, float]:
+    return {name: float(value) for name, value in zip(names, values)}
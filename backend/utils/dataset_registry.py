@@ -0,0 +1,336 @@
+"""
+Server-side registry of uploaded tables, referenced by dataset ID.
+
+A table is parsed once into a typed DataFrame and reused by every operation
+that names its ID. Datasets expire after a period without access (TTL) and
+the least recently used ones are evicted when the registry exceeds its memory
+budget. With a directory, datasets are also written as Arrow IPC files that
+any process sharing the directory (e.g. other gunicorn workers) can
+memory-map; eviction from memory then only drops this process's copy.
+"""
+
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+from utils.column_index import ColumnIndexes
+from utils.result_cache import dataframe_nbytes
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # the shared directory is optional
+    pa = None
+    feather = None
+
+
+_FILE_SUFFIX = '.arrow'
+
+_NAME_METADATA_KEY = b'etl2report.dataset_name'
+
+
+class DatasetNotFoundError(LookupError):
+    """Raised for dataset IDs that were never registered, were dropped, or expired."""
+
+    def __init__(self, dataset_id: str):
+        super().__init__(f"Dataset not found or expired: {dataset_id}")
+        self.dataset_id = dataset_id
+
+
+class _Dataset:
+    __slots__ = ('dataset_id', 'name', 'df', 'nbytes', 'persisted', 'last_access', 'indexes')
+
+    def __init__(self, dataset_id: str, name: Optional[str], df: pd.DataFrame, persisted: bool, now: float,
+                 index_after: Optional[int]):
+        self.dataset_id = dataset_id
+        self.name = name
+        self.df = df
+        self.nbytes = dataframe_nbytes(df)
+        self.persisted = persisted
+        self.last_access = now
+        self.indexes = ColumnIndexes(df, index_after) if index_after is not None else None
+
+
+class DatasetRegistry:
+    """
+    Registered DataFrames by ID, bounded by idle time and memory.
+
+    Registered DataFrames are shared by every request that uses them, so
+    callers must not modify them in place. Since they never change, each
+    dataset keeps column indexes for repeated filters (see ColumnIndexes)
+    until it is dropped, evicted or expires.
+    """
+
+    def __init__(self, max_bytes: int = 1024 ** 3, ttl_seconds: Optional[float] = 3600,
+                 directory: Optional[str] = None, clock: Callable[[], float] = time.time,
+                 index_after: Optional[int] = 3):
+        """
+        Args:
+            max_bytes: Memory budget for the DataFrames held by this process
+            ttl_seconds: Idle time after which a dataset expires, None for never
+            directory: Directory for shared Arrow files (requires pyarrow),
+                       None to keep datasets in this process only
+            clock: Wall-clock time source, replaceable for testing
+            index_after: Filters on a column before it is indexed, None to
+                         never index (indexes are not counted in max_bytes)
+
+        Raises:
+            ValueError: If max_bytes is not positive, or directory is set but
+                        pyarrow is not installed
+        """
+        if max_bytes <= 0:
+            raise ValueError("max_bytes must be a positive integer")
+        if directory is not None and pa is None:
+            raise ValueError("A dataset registry directory requires pyarrow (pip install pyarrow)")
+
+        self._datasets = OrderedDict()  # dataset_id -> _Dataset, least recently used first
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._max_bytes = max_bytes
+        self._ttl = ttl_seconds
+        self._directory = directory
+        self._clock = clock
+        self._index_after = index_after
+        self.evictions = 0
+        self.expirations = 0
+
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def register(self, df: pd.DataFrame, name: Optional[str] = None) -> Dict:
+        """
+        Add a DataFrame under a new ID
+
+        Returns:
+            Dataset description, see info
+
+        Raises:
+            ValueError: If the DataFrame alone exceeds the memory budget
+        """
+        nbytes = dataframe_nbytes(df)
+        if nbytes > self._max_bytes:
+            raise ValueError(f"Dataset of {nbytes} bytes exceeds the registry budget of {self._max_bytes} bytes")
+
+        dataset_id = uuid.uuid4().hex
+        persisted = self._directory is not None and self._write(dataset_id, name, df)
+        now = self._clock()
+        with self._lock:
+            self._expire(now)
+            self._insert(_Dataset(dataset_id, name, df, persisted, now, self._index_after))
+        if self._directory is not None:
+            self._expire_files(now)
+        return self._describe(dataset_id, name, df, now)
+
+    def get(self, dataset_id: str) -> pd.DataFrame:
+        """
+        The DataFrame of a dataset, refreshing its TTL
+
+        Raises:
+            DatasetNotFoundError: If the ID is unknown or expired
+        """
+        return self._get(dataset_id).df
+
+    def indexes(self, dataset_id: str) -> Optional[ColumnIndexes]:
+        """
+        The column indexes of a dataset, None when indexing is disabled
+
+        Raises:
+            DatasetNotFoundError: If the ID is unknown or expired
+        """
+        return self._get(dataset_id).indexes
+
+    def _get(self, dataset_id: str) -> _Dataset:
+        now = self._clock()
+        with self._lock:
+            self._expire(now)
+            dataset = self._datasets.get(dataset_id)
+            if dataset is not None:
+                dataset.last_access = now
+                self._datasets.move_to_end(dataset_id)
+
+        if dataset is None:
+            dataset = self._load(dataset_id, now)
+        elif dataset.persisted:
+            self._touch(dataset_id, now)
+        return dataset
+
+    def info(self, dataset_id: str) -> Dict:
+        """
+        Description of a dataset: dataset_id, name, shape, columns, dtypes,
+        bytes and expires_in (seconds, None without a TTL)
+
+        Raises:
+            DatasetNotFoundError: If the ID is unknown or expired
+        """
+        df = self.get(dataset_id)
+        with self._lock:
+            dataset = self._datasets.get(dataset_id)
+            name = dataset.name if dataset is not None else None
+        return self._describe(dataset_id, name, df, self._clock())
+
+    def drop(self, dataset_id: str) -> bool:
+        """
+        Remove a dataset, including its shared file
+
+        Returns:
+            Whether the dataset existed
+        """
+        with self._lock:
+            existed = self._remove(dataset_id) is not None
+        if self._directory is not None:
+            try:
+                os.remove(self._path(dataset_id))
+                existed = True
+            except FileNotFoundError:
+                pass
+        return existed
+
+    def list(self) -> List[Dict]:
+        """Descriptions (see info) of the datasets held by this process"""
+        now = self._clock()
+        with self._lock:
+            self._expire(now)
+            datasets = list(self._datasets.values())
+        return [self._describe(dataset.dataset_id, dataset.name, dataset.df, now, dataset.last_access)
+                for dataset in datasets]
+
+    def clear(self) -> None:
+        """Drop every dataset held by this process (shared files are left to expire)"""
+        with self._lock:
+            self._datasets.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict:
+        """
+        Returns:
+            Dictionary with size, bytes, max_bytes, ttl_seconds, evictions,
+            expirations, shared (whether a directory is configured), and
+            indexes, index_bytes and indexed_lookups over the datasets held
+        """
+        with self._lock:
+            indexes = [dataset.indexes.stats() for dataset in self._datasets.values() if dataset.indexes is not None]
+            return {
+                'size': len(self._datasets),
+                'bytes': self._bytes,
+                'max_bytes': self._max_bytes,
+                'ttl_seconds': self._ttl,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'shared': self._directory is not None,
+                'indexes': sum(stats['indexes'] for stats in indexes),
+                'index_bytes': sum(stats['bytes'] for stats in indexes),
+                'indexed_lookups': sum(stats['lookups'] for stats in indexes)
+            }
+
+    def _describe(self, dataset_id: str, name: Optional[str], df: pd.DataFrame, now: float,
+                  last_access: Optional[float] = None) -> Dict:
+        if last_access is None:
+            last_access = now
+        return {
+            'dataset_id': dataset_id,
+            'name': name,
+            'shape': list(df.shape),
+            'columns': list(df.columns),
+            'dtypes': {col: str(dtype) for col, dtype in df.dtypes.items()},
+            'bytes': dataframe_nbytes(df),
+            'expires_in': None if self._ttl is None else max(0.0, last_access + self._ttl - now)
+        }
+
+    def _insert(self, dataset: _Dataset) -> None:
+        """Add a dataset and evict down to the budget. Caller holds the lock."""
+        self._remove(dataset.dataset_id)
+        self._datasets[dataset.dataset_id] = dataset
+        self._bytes += dataset.nbytes
+        while self._bytes > self._max_bytes and len(self._datasets) > 1:
+            _, evicted = self._datasets.popitem(last=False)
+            self._bytes -= evicted.nbytes
+            self.evictions += 1
+
+    def _remove(self, dataset_id: str) -> Optional[_Dataset]:
+        """Remove a dataset from memory. Caller holds the lock."""
+        dataset = self._datasets.pop(dataset_id, None)
+        if dataset is not None:
+            self._bytes -= dataset.nbytes
+        return dataset
+
+    def _expire(self, now: float) -> None:
+        """Drop datasets idle for longer than the TTL. Caller holds the lock."""
+        if self._ttl is None:
+            return
+        # Least recently used first, so stop at the first live dataset
+        while self._datasets:
+            dataset = next(iter(self._datasets.values()))
+            if now - dataset.last_access <= self._ttl:
+                break
+            self._remove(dataset.dataset_id)
+            self.expirations += 1
+
+    # Shared directory
+
+    def _path(self, dataset_id: str) -> str:
+        return os.path.join(self._directory, dataset_id + _FILE_SUFFIX)
+
+    def _write(self, dataset_id: str, name: Optional[str], df: pd.DataFrame) -> bool:
+        """Write the shared Arrow file; False if Arrow cannot represent the DataFrame"""
+        path = self._path(dataset_id)
+        temporary = f'{path}.{os.getpid()}.tmp'
+        try:
+            table = pa.Table.from_pandas(df)
+            if name is not None:
+                table = table.replace_schema_metadata({**table.schema.metadata, _NAME_METADATA_KEY: name.encode()})
+            feather.write_feather(table, temporary, compression='uncompressed')
+            os.replace(temporary, path)
+            return True
+        except (OSError, ValueError, TypeError, pa.ArrowException):
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            return False
+
+    def _load(self, dataset_id: str, now: float) -> _Dataset:
+        """Memory-map a dataset registered by another process"""
+        if self._directory is None or not _is_dataset_id(dataset_id):
+            raise DatasetNotFoundError(dataset_id)
+        path = self._path(dataset_id)
+        try:
+            if self._ttl is not None and now - os.path.getmtime(path) > self._ttl:
+                raise DatasetNotFoundError(dataset_id)
+            table = feather.read_table(path, memory_map=True)
+        except (OSError, pa.ArrowException):
+            raise DatasetNotFoundError(dataset_id)
+
+        name = (table.schema.metadata or {}).get(_NAME_METADATA_KEY)
+        dataset = _Dataset(dataset_id, name.decode() if name else None, table.to_pandas(), True, now,
+                           self._index_after)
+        self._touch(dataset_id, now)
+        with self._lock:
+            self._insert(dataset)
+        return dataset
+
+    def _touch(self, dataset_id: str, now: float) -> None:
+        """Record an access on the shared file, which other processes use for the TTL"""
+        try:
+            os.utime(self._path(dataset_id), (now, now))
+        except OSError:
+            pass
+
+    def _expire_files(self, now: float) -> None:
+        """Delete shared files idle for longer than the TTL"""
+        if self._ttl is None:
+            return
+        for entry in os.scandir(self._directory):
+            if entry.name.endswith(_FILE_SUFFIX):
+                try:
+                    if now - entry.stat().st_mtime > self._ttl:
+                        os.remove(entry.path)
+                except OSError:
+                    pass  # removed by another process
+
+
+def _is_dataset_id(dataset_id: str) -> bool:
+    """Whether dataset_id has the form register generates (guards the file path)"""
+    return isinstance(dataset_id, str) and len(dataset_id) == 32 and all(c in '0123456789abcdef' for c in dataset_id)
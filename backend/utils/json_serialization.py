@@ -0,0 +1,168 @@
+"""
+JSON encoding for API responses, with orjson when it is installed.
+
+Both encoders accept what the dataframe utilities return without converting
+it first: NumPy scalars and arrays, pandas Timestamps and Timedeltas, and
+missing values (NaN, infinity, NaT and NA all become null). Dates are written
+as HTTP dates, as Flask's default provider writes them, so responses only
+differ between the encoders in whitespace and string escaping.
+"""
+
+import dataclasses
+import decimal
+import json
+import math
+import uuid
+from datetime import date
+from typing import Any
+
+import numpy as np
+import pandas as pd
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.http import http_date
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the standard library encoder is used without it
+    orjson = None
+
+JSON_ENCODERS = ('auto', 'orjson', 'stdlib')
+
+# Encoder used by dumps, see use_json_encoder
+_encoder = 'orjson' if orjson is not None else 'stdlib'
+
+# Types _finite returns unchanged, checked by exact type before the other cases
+_KEPT = frozenset((str, int, bool, type(None)))
+
+
+def use_json_encoder(name: str = 'auto') -> str:
+    """
+    Choose the encoder dumps (and so JSONProvider) uses
+
+    Args:
+        name: 'orjson', 'stdlib', or 'auto' for orjson when it is installed
+
+    Returns:
+        The encoder now in use
+
+    Raises:
+        ValueError: If name is unknown, or is 'orjson' and orjson is not installed
+    """
+    global _encoder
+    if name not in JSON_ENCODERS:
+        raise ValueError(f"JSON encoder must be one of {', '.join(JSON_ENCODERS)}, got {name!r}")
+    if name == 'orjson' and orjson is None:
+        raise ValueError("The orjson JSON encoder requires orjson; install it with 'pip install orjson'")
+    _encoder = name if name != 'auto' else 'orjson' if orjson is not None else 'stdlib'
+    return _encoder
+
+
+def json_encoder() -> str:
+    """Name of the encoder in use, 'orjson' or 'stdlib'"""
+    return _encoder
+
+
+def dumps(value: Any, sort_keys: bool = False, indent: bool = False) -> bytes:
+    """
+    Encode value as UTF-8 JSON
+
+    Args:
+        value: Value to encode; see the module docstring for the types
+               handled beyond the JSON ones
+        sort_keys: Sort the keys of every object
+        indent: Indent nested values by two spaces
+
+    Returns:
+        The JSON document
+
+    Raises:
+        TypeError: If value holds an object neither encoder can represent
+    """
+    if _encoder == 'orjson':
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(value, default=_default, option=option)
+        except TypeError:
+            pass  # e.g. integers beyond 64 bits, which the standard library encodes
+    return _stdlib_dumps(value, sort_keys, indent)
+
+
+def _stdlib_dumps(value: Any, sort_keys: bool, indent: bool) -> bytes:
+    """
+    Encode with the standard library, writing NaN and infinity as null as
+    orjson does: non-finite floats are replaced with None first (see
+    _finite), and json.dumps is called with allow_nan=False so any left over
+    raise instead of being written as the invalid tokens NaN and Infinity.
+    """
+    return json.dumps(_finite(value), default=_default, allow_nan=False, sort_keys=sort_keys,
+                      indent=2 if indent else None,
+                      separators=(',', ': ') if indent else (',', ':')).encode('utf-8')
+
+
+def _finite(value: Any, _isfinite=math.isfinite) -> Any:
+    """
+    value with every non-finite float replaced by None. Containers are copied
+    as lists and dicts; strings, integers, booleans and None are kept without a
+    call, which keeps the pass cheap next to the encode. Float arrays become
+    object arrays with None where they were not finite.
+    """
+    kind = type(value)
+    if kind is dict:
+        return {key: item if type(item) in _KEPT else _finite(item) for key, item in value.items()}
+    if kind is list or kind is tuple:
+        return [item if type(item) in _KEPT else _finite(item) for item in value]
+    if isinstance(value, float):
+        return value if _isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: _finite(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite(item) for item in value]
+    if isinstance(value, np.ndarray) and value.dtype.kind == 'f':
+        return np.where(np.isfinite(value), value.astype(object), None)
+    return value
+
+
+def _default(value: Any) -> Any:
+    """Encodable form of the values neither encoder handles itself"""
+    if value is pd.NaT or value is pd.NA:
+        return None
+    if isinstance(value, np.generic):
+        value = value.item()
+        if isinstance(value, float) and not math.isfinite(value):
+            return None
+        return value
+    if isinstance(value, np.ndarray):
+        return value.tolist()  # orjson encodes numeric arrays itself
+    if isinstance(value, date):
+        return http_date(value)
+    if isinstance(value, pd.Timedelta):
+        return value.isoformat()
+    if isinstance(value, (decimal.Decimal, uuid.UUID)):
+        return str(value)
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)
+    if hasattr(value, '__html__'):
+        return str(value.__html__())
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class JSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider encoding with dumps, so jsonify uses orjson when it is
+    installed. Keys are sorted and responses indented as with Flask's default
+    provider; loads is unchanged.
+    """
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return dumps(obj, sort_keys=kwargs.get('sort_keys', self.sort_keys),
+                     indent=kwargs.get('indent') is not None).decode('utf-8')
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(dumps(obj, sort_keys=self.sort_keys, indent=indent) + b'\n',
+                                        mimetype=self.mimetype)
@@ -0,0 +1,166 @@
+"""
+Thread-safe, size-bounded LRU cache with hit/miss/eviction counters.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class LRUCache:
+    """
+    Least-recently-used cache bounded by entry count and, optionally, by the
+    total size of its values.
+
+    All operations take an internal lock, so one instance can be shared by the
+    threads of a gunicorn worker. Values are computed outside the lock; two
+    threads missing on the same key at once may both compute it.
+    """
+
+    def __init__(self, max_size: int = 1024, max_bytes: Optional[int] = None,
+                 sizeof: Optional[Callable[[Any], int]] = None):
+        """
+        Args:
+            max_size: Maximum number of entries. Must be a positive integer.
+            max_bytes: Maximum total size of the values, as measured by sizeof.
+                       None for no size bound.
+            sizeof: Size of a value in bytes. Required with max_bytes.
+
+        Raises:
+            ValueError: If max_size is not a positive integer, or max_bytes is
+                        given without sizeof.
+        """
+        if max_bytes is not None and sizeof is None:
+            raise ValueError("sizeof is required with max_bytes")
+
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+        self._max_size = 0
+        self._max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.resize(max_size)
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size
+
+    def resize(self, max_size: int) -> None:
+        """
+        Change the maximum number of entries, evicting the oldest ones if needed.
+
+        Raises:
+            ValueError: If max_size is not a positive integer.
+        """
+        try:
+            max_size = int(max_size)
+        except (TypeError, ValueError):
+            raise ValueError("max_size must be an integer")
+
+        if max_size <= 0:
+            raise ValueError("max_size must be a positive integer")
+
+        with self._lock:
+            self._max_size = max_size
+            self._evict()
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Return the cached value for key, computing and storing it on a miss.
+
+        Args:
+            key: Hashable cache key.
+            compute: Zero-argument callable producing the value. Exceptions
+                     propagate and nothing is stored.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def lookup(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for key (counting a hit or miss), or default."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return default
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """
+        Store value under key as the most recently used entry.
+
+        A value larger than max_bytes on its own is not stored.
+        """
+        size = self._sizeof(value) if self._sizeof is not None else 0
+        with self._lock:
+            self._discard(key)
+            if self._max_bytes is not None and size > self._max_bytes:
+                return
+            self._entries[key] = value
+            self._sizes[key] = size
+            self._bytes += size
+            self._evict()
+
+    def discard(self, key: Hashable) -> None:
+        """Remove key if present."""
+        with self._lock:
+            self._discard(key)
+
+    def clear(self) -> None:
+        """Remove all entries and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns:
+            Dictionary with hits, misses, evictions, size and max_size, plus
+            bytes and max_bytes when the cache is bounded by size in bytes.
+        """
+        with self._lock:
+            stats = {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+                'max_size': self._max_size
+            }
+            if self._max_bytes is not None:
+                stats['bytes'] = self._bytes
+                stats['max_bytes'] = self._max_bytes
+            return stats
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _discard(self, key: Hashable) -> None:
+        """Remove key if present. Caller holds the lock."""
+        if key in self._entries:
+            del self._entries[key]
+            self._bytes -= self._sizes.pop(key)
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until within max_size and max_bytes. Caller holds the lock."""
+        while len(self._entries) > self._max_size or (
+                self._max_bytes is not None and self._bytes > self._max_bytes):
+            key, _ = self._entries.popitem(last=False)
+            self._bytes -= self._sizes.pop(key)
+            self.evictions += 1
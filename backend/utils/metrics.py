@@ -0,0 +1,277 @@
+"""
+Latency histograms, timing spans and row counters for the backend, exposed in
+the Prometheus text format, plus opt-in profiling of a single request.
+
+Spans time the hot paths of the utilities (ingest, each operation,
+serialization, number formatting) and count the rows they handle. They cost
+one flag check while metrics are disabled and no request is being profiled.
+Metrics live in the process that records them: with several gunicorn workers,
+each worker exposes its own.
+"""
+
+import bisect
+import contextvars
+import cProfile
+import pstats
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Upper bounds in seconds, from formatting one number to a large ingest
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PROMETHEUS_MIMETYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label combination, as in Prometheus"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str],
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._series = {}  # labels -> [counts per bucket and +Inf (not cumulative), sum]
+
+    def observe(self, labels: Tuple[str, ...], value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = sorted((labels, list(counts), total) for labels, (counts, total) in self._series.items())
+        for labels, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{self.name}_bucket{_labels(self.labelnames + ("le",), labels + (le,))} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels(self.labelnames, labels)} {total!r}')
+            lines.append(f'{self.name}_count{_labels(self.labelnames, labels)} {cumulative}')
+        return lines
+
+
+class Counter:
+    """Monotonic counter per label combination"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}  # labels -> total
+
+    def inc(self, labels: Tuple[str, ...], amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            values = sorted(self._values.items())
+        lines.extend(f'{self.name}{_labels(self.labelnames, labels)} {value!r}' for labels, value in values)
+        return lines
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    if not names:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for value in values)
+    return '{' + ','.join(f'{name}="{value}"' for name, value in zip(names, escaped)) + '}'
+
+
+REQUEST_SECONDS = Histogram('etl2report_request_duration_seconds',
+                            'Time to handle a request, by route, method and status',
+                            ('route', 'method', 'status'))
+SPAN_SECONDS = Histogram('etl2report_span_duration_seconds',
+                         'Time spent in an instrumented step, by span name', ('span',))
+SPAN_ROWS = Counter('etl2report_span_rows_total', 'Rows handled by an instrumented step, by span name', ('span',))
+
+_METRICS = (REQUEST_SECONDS, SPAN_SECONDS, SPAN_ROWS)
+
+_enabled = False
+
+# Span totals of the request being profiled in this context, if any
+_profile_spans = contextvars.ContextVar('etl2report_profile_spans', default=None)
+
+
+def enable_metrics() -> None:
+    """Start recording request latencies and spans in this process"""
+    global _enabled
+    _enabled = True
+
+
+def disable_metrics() -> None:
+    """Stop recording; metrics recorded so far are kept"""
+    global _enabled
+    _enabled = False
+
+
+def metrics_enabled() -> bool:
+    return _enabled
+
+
+def clear_metrics() -> None:
+    """Reset every histogram and counter"""
+    for metric in _METRICS:
+        metric.clear()
+
+
+def observe_request(route: str, method: str, status: int, seconds: float) -> None:
+    """Record the latency of a handled request, if metrics are enabled"""
+    if _enabled:
+        REQUEST_SECONDS.observe((route, method, str(status)), seconds)
+
+
+def render_metrics() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    lines = []
+    for metric in _METRICS:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+def span(name: str, rows: Optional[int] = None):
+    """
+    Context manager timing a step under name
+
+    The duration goes to the span histogram and rows, when given (or set on
+    the returned span before it exits), to the rows counter. Spans nest:
+    each records its own inclusive time.
+
+    Example:
+        with span('ingest') as s:
+            df = pd.DataFrame(records)
+            s.rows = len(df)
+    """
+    totals = _profile_spans.get()
+    if not _enabled and totals is None:
+        return _NULL_SPAN
+    return _Span(name, rows, totals)
+
+
+class _Span:
+    __slots__ = ('name', 'rows', '_totals', '_start')
+
+    def __init__(self, name: str, rows: Optional[int], totals: Optional[Dict]):
+        self.name = name
+        self.rows = rows
+        self._totals = totals
+
+    def __enter__(self) -> '_Span':
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> bool:
+        seconds = time.perf_counter() - self._start
+        if _enabled:
+            SPAN_SECONDS.observe((self.name,), seconds)
+            if self.rows:
+                SPAN_ROWS.inc((self.name,), self.rows)
+        if self._totals is not None:
+            total = self._totals.setdefault(self.name, [0, 0.0, None])
+            total[0] += 1
+            total[1] += seconds
+            if self.rows is not None:
+                total[2] = (total[2] or 0) + self.rows
+        return False
+
+
+class _NullSpan:
+    """Span that records nothing; rows may be set on it and are ignored"""
+    rows = None
+
+    def __enter__(self) -> '_NullSpan':
+        return self
+
+    def __exit__(self, *exc_info) -> bool:
+        return False
+
+    def __setattr__(self, name, value) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class RequestProfile:
+    """
+    cProfile statistics and span totals of one request.
+
+    start and stop must be called in the same thread and context (e.g. in
+    Flask's before_request and after_request); spans recorded in between are
+    summed by name.
+    """
+
+    def __init__(self):
+        self._profiler = cProfile.Profile()
+        self._spans = {}  # name -> [calls, seconds, rows or None]
+        self._token = None
+        self._start = None
+        self.seconds = None
+
+    def start(self) -> 'RequestProfile':
+        self._token = _profile_spans.set(self._spans)
+        self._start = time.perf_counter()
+        self._profiler.enable()
+        return self
+
+    def stop(self) -> 'RequestProfile':
+        self._profiler.disable()
+        self.seconds = time.perf_counter() - self._start
+        _profile_spans.reset(self._token)
+        return self
+
+    def summary(self, limit: int = 25) -> Dict:
+        """
+        Args:
+            limit: Number of functions to list
+
+        Returns:
+            Dictionary with total_seconds, spans (name, calls, seconds and
+            rows, None for spans that count none, in order of first
+            completion) and the limit functions with the
+            most cumulative time (function, calls, total_seconds,
+            cumulative_seconds)
+        """
+        stats = pstats.Stats(self._profiler).stats
+        functions = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+        return {
+            'total_seconds': self.seconds,
+            'spans': [
+                {'name': name, 'calls': calls, 'seconds': seconds, 'rows': rows}
+                for name, (calls, seconds, rows) in self._spans.items()
+            ],
+            'functions': [
+                {
+                    'function': pstats.func_std_string(function),
+                    'calls': calls,
+                    'total_seconds': total,
+                    'cumulative_seconds': cumulative
+                }
+                for function, (_, calls, total, cumulative, _) in functions
+            ]
+        }
+
+    def server_timing(self) -> str:
+        """Span totals as a Server-Timing header value, in milliseconds"""
+        entries = [f'total;dur={self.seconds * 1000:.3f}']
+        entries.extend(f'{name};dur={seconds * 1000:.3f}'
+                       for name, (_, seconds, _) in self._spans.items())
+        return ', '.join(entries)
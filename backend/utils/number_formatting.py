@@ -3,9 +3,92 @@ Number formatting utilities for handling significant figures and rounding.
 Python implementation matching the JavaScript numberFormatting.js functionality.
 """
 
-from sigfig import round as sigfig_round
-from decimal import Decimal
+import math
+import re
 import numpy as np
+import pandas as pd
+
+try:
+    from utils.lru_cache import LRUCache
+    from utils.metrics import span
+except ImportError:  # run as a script (python utils/number_formatting.py), with utils/ on sys.path
+    from lru_cache import LRUCache
+    from metrics import span
+
+# Largest sig_figs handled by the vectorized path: the scaled mantissa must stay
+# well inside float64's exact integer range (2**53).
+_MAX_VECTOR_SIG_FIGS = 15
+
+# Powers of ten that are exactly representable as float64, so scaling by them
+# introduces at most one rounding error.
+_MAX_EXACT_POW10 = 22
+_POW10 = 10.0 ** np.arange(_MAX_EXACT_POW10 + 1)
+
+# Relative distance from a .5 tie below which the vectorized result is not
+# trusted and the value is re-formatted by the scalar path.
+_TIE_TOLERANCE = 1e-15
+
+# Translation tables for format_scientific_notation_indicator exponents
+_TO_SUPERSCRIPT = str.maketrans('0123456789+-=()', '⁰¹²³⁴⁵⁶⁷⁸⁹⁺⁻⁼⁽⁾')
+_FROM_SUPERSCRIPT = str.maketrans('⁰¹²³⁴⁵⁶⁷⁸⁹⁺⁻⁼⁽⁾', '0123456789+-=()')
+_TIMES_TEN_PATTERN = re.compile(' [xX] 10')
+_EXPONENT_PATTERN = re.compile('[eE]')
+
+# Opt-in memoization of formatted strings, see enable_format_cache
+_format_cache = None
+
+def enable_format_cache(max_size: int = 10000) -> LRUCache:
+    """
+    Memoize format_with_sig_figs, format_with_rounding and format_batch results
+    in a size-bounded LRU cache shared by all threads of this process.
+    Calling it again resizes the existing cache.
+
+    Args:
+        max_size (int): Maximum number of cached strings. Must be a positive integer.
+
+    Returns:
+        LRUCache: The active cache.
+    """
+    global _format_cache
+    if _format_cache is None:
+        _format_cache = LRUCache(max_size)
+    else:
+        _format_cache.resize(max_size)
+    return _format_cache
+
+def disable_format_cache() -> None:
+    """Stop memoizing and drop all cached strings."""
+    global _format_cache
+    _format_cache = None
+
+def clear_format_cache() -> None:
+    """Drop all cached strings and reset the counters, if the cache is enabled."""
+    if _format_cache is not None:
+        _format_cache.clear()
+
+def format_cache_stats():
+    """
+    Returns:
+        dict | None: hits, misses, evictions, size and max_size of the cache,
+                     or None when it is disabled.
+    """
+    if _format_cache is None:
+        return None
+    return _format_cache.stats()
+
+def _format_cache_key(mode: str, value: float, precision: int, notation: str):
+    # -0.0 == 0.0 but formats differently, so the sign is part of the key
+    return (mode, value, math.copysign(1.0, value), precision, notation)
+
+def _cached(mode: str, value: float, precision: int, notation: str, compute):
+    """
+    Run compute through the format cache when it is enabled. NaN is never cached.
+    Results are cached with the 'E' indicator; callers apply any other one.
+    """
+    if _format_cache is None or value != value:
+        return compute()
+    key = _format_cache_key(mode, value, precision, notation)
+    return _format_cache.get_or_compute(key, compute)
 
 def format_scientific_notation_indicator(value: str, scientific_notation_indicator='E') -> str:
     """
@@ -16,48 +99,32 @@ def format_scientific_notation_indicator(value: str, scientific_notation_indicat
         scientific_notation_indicator (str): The indicator to use for scientific notation (default 'E').
     """
     
-    def to_superscript(text):
-        superscript_map = {
-            "0": "⁰", "1": "¹", "2": "²", "3": "³", "4": "⁴",
-            "5": "⁵", "6": "⁶", "7": "⁷", "8": "⁸", "9": "⁹",
-            "+": "⁺", "-": "⁻", "=": "⁼", "(": "⁽", ")": "⁾"
-        }
-        return ''.join(superscript_map.get(char, char) for char in str(text))
-    
-    def from_superscript(text):
-        reverse_map = {
-            "⁰": "0", "¹": "1", "²": "2", "³": "3", "⁴": "4",
-            "⁵": "5", "⁶": "6", "⁷": "7", "⁸": "8", "⁹": "9",
-            "⁺": "+", "⁻": "-", "⁼": "=", "⁽": "(", "⁾": ")"
-        }
-        return ''.join(reverse_map.get(char, char) for char in str(text))
-    
-    exponent_part = ''
-
-    # Check for existing scientific notation formats
-    patterns = [
-        ('e', 1, to_superscript, 'E'),
-        ('E', 1, to_superscript, 'e'),
-        (' x 10', 5, from_superscript, None)
-    ]
-    
-    for pattern, offset, transform, simple_replacement in patterns:
-        index = value.lower().find(pattern.lower()) if pattern == ' x 10' else value.find(pattern)
+    # Check for existing scientific notation formats, in priority order:
+    # 'e', then 'E', then ' x 10' (case-insensitive)
+    index = value.find('e')
+    if index > -1:
+        if scientific_notation_indicator == 'E':
+            return value.replace('e', 'E')
+        offset, table = 1, _TO_SUPERSCRIPT
+    else:
+        index = value.find('E')
         if index > -1:
-            if simple_replacement and scientific_notation_indicator == simple_replacement:
-                return value.replace(pattern, simple_replacement)
-            exponent_part = value[index + offset:]
-            exponent_change_function = transform
-            break
+            if scientific_notation_indicator == 'e':
+                return value.replace('E', 'e')
+            offset, table = 1, _TO_SUPERSCRIPT
+        else:
+            match = _TIMES_TEN_PATTERN.search(value)
+            if match is None:
+                # No scientific notation found
+                return value
+            index = match.start()
+            offset, table = 5, _FROM_SUPERSCRIPT
 
+    exponent_part = value[index + offset:]
     if exponent_part == '':
-        # No scientific notation found
         return value
 
-
-    value = value[:index] + scientific_notation_indicator + exponent_change_function(exponent_part)
-        
-    return value
+    return value[:index] + scientific_notation_indicator + exponent_part.translate(table)
 
 def format_with_rounding(value: float, decimal_places: int, use_scientific_notation: bool = False) -> str:
     """
@@ -86,8 +153,8 @@ def format_with_rounding(value: float, decimal_places: int, use_scientific_notat
         raise ValueError("decimal_places must be an integer")
     
     notation = 'scientific' if use_scientific_notation else 'standard'
-
-    return sigfig_round(value, decimals=decimal_places, output_type=str, warn=False, notation= notation)
+    return _cached('rounding', value, decimal_places, notation,
+                   lambda: _round_decimals(value, decimal_places, use_scientific_notation))
 
 def format_with_sig_figs(value: float, sig_figs: int, force_scientific: bool = False, scientific_notation_indicator='E') -> str:
     """
@@ -98,6 +165,9 @@ def format_with_sig_figs(value: float, sig_figs: int, force_scientific: bool = F
     Args:
         value (float): The number to format. Must be convertible to float.
         sig_figs (int): The number of significant figures. Must be a positive integer.
+        force_scientific (bool): Always use scientific notation.
+        scientific_notation_indicator (str): Indicator of scientific results, see
+            format_scientific_notation_indicator (default 'E').
         
     Returns:
         str: The number formatted to the specified significant figures.
@@ -122,16 +192,340 @@ def format_with_sig_figs(value: float, sig_figs: int, force_scientific: bool = F
     if sig_figs <= 0:
         raise ValueError("sig_figs must be a positive integer")
 
-    if force_scientific:
-        return sigfig_round(value, sig_figs, output_type=str, warn=False, notation='scientific')
-    
-    standard_rounded_value = sigfig_round(value, sig_figs, output_type=str, warn=False, notation='standard')
-    counted_sig_figs = count_sig_figs(standard_rounded_value)
-    if counted_sig_figs < sig_figs:
-        # If the rounded value has fewer significant figures, use scientific notation
-        return sigfig_round(value, sig_figs, output_type=str, warn=False, notation='scientific')
-    
-    return standard_rounded_value
+    notation = 'scientific' if force_scientific else 'auto'
+    formatted = _cached('sig_figs', value, sig_figs, notation, lambda: _round_sig_figs(value, sig_figs, force_scientific))
+    return _apply_indicator(formatted, scientific_notation_indicator)
+
+def _round_sig_figs(value: float, sig_figs: int, force_scientific: bool) -> str:
+    """Uncached body of format_with_sig_figs for already validated arguments."""
+    parts = _decompose(value)
+    if parts is None:
+        return value  # NaN passes through unchanged, as sigfig does
+    negative, coefficient, exponent = parts
+
+    if coefficient == 0:
+        digits, max_power = '0' * sig_figs, 0
+        # Standard zero ('0.00') has no significant figures, except that the
+        # minus sign of '-0.00' counts as one
+        scientific = force_scientific or not negative
+        return _compose_sig_figs(digits, max_power, negative, scientific)
+
+    max_power = exponent + len(str(coefficient)) - 1
+    rounded = _round_half_up(coefficient, max_power - sig_figs + 1 - exponent)
+    if rounded == 10 ** sig_figs:
+        # Rounding 9.99 up to 10.0 carries into the next power of ten
+        rounded //= 10
+        max_power += 1
+    digits = str(rounded)
+
+    scientific = force_scientific or _loses_sig_figs(digits, max_power, negative)
+    return _compose_sig_figs(digits, max_power, negative, scientific)
+
+def _round_decimals(value: float, decimal_places: int, use_scientific_notation: bool) -> str:
+    """Uncached body of format_with_rounding for already validated arguments."""
+    parts = _decompose(value)
+    if parts is None:
+        return value  # NaN passes through unchanged, as sigfig does
+    negative, coefficient, exponent = parts
+
+    last_power = -decimal_places
+    max_power = exponent + len(str(coefficient)) - 1 if coefficient else 0
+    rounded = _round_half_up(coefficient, last_power - exponent)
+
+    if rounded == 0:
+        # Zero keeps its sign only when it was already zero at a precision at least
+        # as fine as the requested one; it prints as many zeros as decimal places
+        negative = negative and last_power <= max_power
+        zero_power = max(max_power, last_power)
+        if use_scientific_notation:
+            return _compose_sig_figs('0' * (zero_power - last_power + 1), zero_power, negative, True)
+        return _compose_sig_figs('0' * (max(0, -last_power) + 1), 0, negative, False)
+
+    digits = str(rounded)
+    return _compose_sig_figs(digits, last_power + len(digits) - 1, negative, use_scientific_notation)
+
+def _decompose(value: float):
+    """
+    Split a float into the exact decimal of its shortest repr, which is the number
+    sigfig rounds.
+
+    Returns:
+        tuple | None: (negative, coefficient, exponent) with value equal to
+            (-1 if negative else 1) * coefficient * 10**exponent, or None for NaN.
+
+    Raises:
+        ValueError: If value is infinite.
+    """
+    if value != value:
+        return None
+    if math.isinf(value):
+        raise ValueError("value must be a finite number")
+
+    text = repr(value)
+    negative = text[0] == '-'
+    mantissa, _, exponent = text.lstrip('-').partition('e')
+    integer_part, _, fraction_part = mantissa.partition('.')
+    coefficient = int(integer_part + fraction_part)
+    exponent = (int(exponent) if exponent else 0) - len(fraction_part)
+    return negative, coefficient, exponent
+
+def _round_half_up(coefficient: int, drop: int) -> int:
+    """
+    Round a non-negative integer to a multiple of 10**drop, halves away from zero,
+    and express it in units of 10**drop. A negative drop appends zeros instead.
+    """
+    if drop <= 0:
+        return coefficient * 10 ** -drop
+    unit = 10 ** drop
+    quotient, remainder = divmod(coefficient, unit)
+    return quotient + (2 * remainder >= unit)
+
+def _loses_sig_figs(digits: str, exponent: int, negative: bool) -> bool:
+    """
+    Whether standard notation of a non-zero rounded value shows fewer significant
+    figures than len(digits), as measured by count_sig_figs.
+
+    Only integers (no decimal point) can: their trailing zeros are not counted.
+    count_sig_figs also counts a leading minus sign, so negative values tolerate
+    one trailing zero.
+    """
+    if exponent - len(digits) + 1 < 0:
+        return False
+    trailing_zeros = len(digits) - len(digits.rstrip('0'))
+    return trailing_zeros > (1 if negative else 0)
+
+def _scale_by_pow10(magnitude: np.ndarray, shift: np.ndarray):
+    """
+    Multiply each magnitude by 10**shift using only exactly representable powers.
+
+    Returns:
+        tuple: (scaled values, boolean mask of entries whose shift was in range).
+    """
+    in_range = np.abs(shift) <= _MAX_EXACT_POW10
+    up = _POW10[np.clip(shift, 0, _MAX_EXACT_POW10)]
+    down = _POW10[np.clip(-shift, 0, _MAX_EXACT_POW10)]
+    scaled = np.where(shift >= 0, magnitude * up, magnitude / down)
+    return scaled, in_range
+
+def _compose_sig_figs(digits: str, exponent: int, negative: bool, scientific: bool) -> str:
+    """
+    Build the string sigfig would print for a rounded mantissa.
+
+    Args:
+        digits (str): The significant digits, exactly sig_figs long.
+        exponent (int): Power of ten of the first digit.
+        negative (bool): Whether to prefix a minus sign.
+        scientific (bool): Whether to use scientific notation.
+    """
+    sign = '-' if negative else ''
+    if scientific:
+        mantissa = digits[0] + '.' + digits[1:] if len(digits) > 1 else digits
+        return f'{sign}{mantissa}E{exponent}'
+
+    last_power = exponent - len(digits) + 1
+    if last_power >= 0:
+        return sign + digits + '0' * last_power
+    if exponent >= 0:
+        return sign + digits[:exponent + 1] + '.' + digits[exponent + 1:]
+    return sign + '0.' + '0' * (-exponent - 1) + digits
+
+def format_sig_figs_array(values, sig_figs: int, force_scientific: bool = False):
+    """
+    Format every value of an array with the specified significant figures.
+    Produces exactly the same strings as format_with_sig_figs, but derives the
+    exponent and rounded mantissa with vectorized NumPy math. Values that the
+    float math cannot round unambiguously (near .5 ties, NaN/inf, extreme
+    exponents) are handed to format_with_sig_figs one by one.
+
+    Args:
+        values (array-like): A NumPy array, pandas Series or sequence of numbers.
+        sig_figs (int): The number of significant figures. Must be a positive integer.
+        force_scientific (bool): Always use scientific notation.
+
+    Returns:
+        np.ndarray | pd.Series: Formatted strings in an object array with the
+            shape of values, or a Series with the same index and name when
+            values is a Series.
+
+    Raises:
+        ValueError: If values are not numeric, sig_figs is not an integer,
+                   or sig_figs is not positive.
+    """
+
+    try:
+        array = np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        raise ValueError("values must be numeric")
+
+    try:
+        sig_figs = int(sig_figs)
+    except (TypeError, ValueError):
+        raise ValueError("sig_figs must be an integer")
+
+    if sig_figs <= 0:
+        raise ValueError("sig_figs must be a positive integer")
+
+    flat = array.ravel()
+    negative = np.signbit(flat)
+    magnitude = np.abs(flat)
+    finite = np.isfinite(flat)
+    zero = magnitude == 0
+    nonzero = finite & ~zero
+
+    exponent = np.zeros(flat.size, dtype=np.int64)
+    exponent[nonzero] = np.floor(np.log10(magnitude[nonzero]))
+
+    if sig_figs > _MAX_VECTOR_SIG_FIGS:
+        fallback = np.ones(flat.size, dtype=bool)
+        mantissa = np.zeros(flat.size)
+    else:
+        lower, upper = _POW10[sig_figs - 1], _POW10[sig_figs]
+        with np.errstate(over='ignore', invalid='ignore'):
+            scaled, in_range = _scale_by_pow10(magnitude, sig_figs - 1 - exponent)
+            # log10 can be off by one next to exact powers of ten
+            exponent[nonzero & (scaled < lower)] -= 1
+            exponent[nonzero & (scaled >= upper)] += 1
+            scaled, in_range = _scale_by_pow10(magnitude, sig_figs - 1 - exponent)
+
+            floor = np.floor(scaled)
+            near_tie = np.abs(scaled - floor - 0.5) <= scaled * _TIE_TOLERANCE
+            mantissa = floor + (scaled - floor > 0.5)
+            fallback = ~finite | (nonzero & (~in_range | near_tie | (scaled < lower) | (scaled >= upper)))
+
+        # Rounding 9.99 up to 10.0 carries into the next power of ten
+        carry = mantissa >= upper
+        mantissa[carry] = lower
+        exponent[carry] += 1
+
+    vectorized = ~fallback
+    mantissa = np.where(vectorized & ~zero, mantissa, 0).astype(np.int64)
+    last_power = exponent - sig_figs + 1
+    # sigfig's standard output would drop significant trailing zeros; count_sig_figs
+    # also counts a leading minus sign, so negative values tolerate one more zero
+    trailing_zero_limit = np.where(negative, 100, 10)
+    scientific = np.where(
+        zero,
+        ~negative,
+        (last_power >= 0) & (mantissa % trailing_zero_limit == 0)
+    ) | force_scientific
+
+    result = np.empty(flat.size, dtype=object)
+    for i in np.flatnonzero(vectorized):
+        digits = str(mantissa[i]).zfill(sig_figs) if not zero[i] else '0' * sig_figs
+        result[i] = _compose_sig_figs(digits, int(exponent[i]), bool(negative[i]), bool(scientific[i]))
+    for i in np.flatnonzero(fallback):
+        result[i] = format_with_sig_figs(float(flat[i]), sig_figs, force_scientific)
+
+    result = result.reshape(array.shape)
+    if isinstance(values, pd.Series):
+        return pd.Series(result, index=values.index, name=values.name)
+    return result
+
+def format_sig_figs_columns(df: pd.DataFrame, sig_figs, columns=None, force_scientific: bool = False) -> pd.DataFrame:
+    """
+    Format DataFrame columns with significant figures using format_sig_figs_array.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to format. It is not modified.
+        sig_figs (int | dict): Significant figures for every column, or a
+            mapping of column name to significant figures.
+        columns (list): Columns to format (default: the sig_figs mapping keys,
+            otherwise all numeric columns).
+        force_scientific (bool): Always use scientific notation.
+
+    Returns:
+        pd.DataFrame: A copy of df with the selected columns as formatted strings.
+    """
+    if columns is None:
+        if isinstance(sig_figs, dict):
+            columns = list(sig_figs)
+        else:
+            columns = list(df.select_dtypes(include=[np.number]).columns)
+
+    formatted = df.copy()
+    for column in columns:
+        column_sig_figs = sig_figs[column] if isinstance(sig_figs, dict) else sig_figs
+        formatted[column] = format_sig_figs_array(df[column], column_sig_figs, force_scientific)
+    return formatted
+
+def format_batch(items: list) -> list:
+    """
+    Format many numbers in one call.
+    Significant-figure items sharing the same precision and notation are formatted
+    together with format_sig_figs_array; rounding items use format_with_rounding.
+
+    Args:
+        items (list): Dictionaries with the keys
+            - 'value': The number to format.
+            - 'mode': 'sig_figs' or 'rounding'.
+            - 'precision': Significant figures or decimal places, depending on mode.
+            - 'force_scientific' (optional): Use scientific notation.
+            - 'indicator' (optional): Scientific notation indicator passed to
+              format_scientific_notation_indicator (default 'E').
+
+    Returns:
+        list: One dictionary per item, in order, holding either 'formatted'
+              or 'error' (the ValueError message for that item).
+    """
+    with span('format.batch', rows=len(items)):
+        results = [None] * len(items)
+        sig_fig_groups = {}
+
+        for index, item in enumerate(items):
+            try:
+                try:
+                    value = float(item.get('value'))
+                except (TypeError, ValueError):
+                    raise ValueError("value must be a number")
+                if not np.isfinite(value):
+                    raise ValueError("value must be a finite number")
+
+                mode = item.get('mode')
+                force_scientific = bool(item.get('force_scientific', False))
+                if mode == 'sig_figs':
+                    try:
+                        sig_figs = int(item.get('precision'))
+                    except (TypeError, ValueError):
+                        raise ValueError("sig_figs must be an integer")
+                    if sig_figs <= 0:
+                        raise ValueError("sig_figs must be a positive integer")
+                    sig_fig_groups.setdefault((sig_figs, force_scientific), []).append((index, value))
+                elif mode == 'rounding':
+                    formatted = format_with_rounding(value, item.get('precision'), force_scientific)
+                    results[index] = {'formatted': _apply_indicator(formatted, item.get('indicator'))}
+                else:
+                    raise ValueError(f"mode must be 'sig_figs' or 'rounding', got {mode!r}")
+            except ValueError as e:
+                results[index] = {'error': str(e)}
+
+        for (sig_figs, force_scientific), members in sig_fig_groups.items():
+            notation = 'scientific' if force_scientific else 'auto'
+            misses = []
+            for index, value in members:
+                formatted = None
+                if _format_cache is not None:
+                    key = _format_cache_key('sig_figs', value, sig_figs, notation)
+                    formatted = _format_cache.lookup(key)
+                if formatted is None:
+                    misses.append((index, value))
+                else:
+                    results[index] = {'formatted': _apply_indicator(formatted, items[index].get('indicator'))}
+
+            if not misses:
+                continue
+            values = np.array([value for _, value in misses], dtype=np.float64)
+            for (index, value), formatted in zip(misses, format_sig_figs_array(values, sig_figs, force_scientific)):
+                if _format_cache is not None:
+                    _format_cache.put(_format_cache_key('sig_figs', value, sig_figs, notation), formatted)
+                results[index] = {'formatted': _apply_indicator(formatted, items[index].get('indicator'))}
+
+        return results
+
+def _apply_indicator(value: str, scientific_notation_indicator) -> str:
+    """Swap the 'E' produced by the formatters for another indicator, if one was requested (NaN passes through)."""
+    if not scientific_notation_indicator or scientific_notation_indicator == 'E' or not isinstance(value, str):
+        return value
+    return format_scientific_notation_indicator(value, scientific_notation_indicator)
 
 def count_sig_figs(value: str) -> int:
     """
@@ -149,69 +543,32 @@ def count_sig_figs(value: str) -> int:
              - Scientific notation exponent is ignored for counting
     """
     
-    def count_integer_sig_figs(value: str) -> int:
-        """Count significant figures in an integer by removing trailing zeros."""
-        sig_figs = len(value)
-        while value.endswith('0'):
-            sig_figs -= 1
-            value = value[:-1]
-        return sig_figs
-    
-    def count_decimal_sig_figs(value_list) -> int:
-        """
-        Count significant figures in a decimal number split by decimal point.
-        
-        Args:
-            value_list: A list with [integer_part, decimal_part] from split('.')
-            
-        Returns:
-            int: Total significant figures from both parts.
-        """
-        integer_part = value_list[0]
-        if integer_part.count('0') == len(integer_part):
-            # Integer part is all zeros (e.g., '0' or '000'), don't count them
-            sig_figs = 0
-        else:
-            # Count all digits in integer part (all are significant)
-            sig_figs = len(integer_part)
-        
-        # Count significant figures in decimal part
-        decimal_part = value_list[1]
-        if sig_figs > 0:
-            # leading zeros are bound - all digits count
-            return sig_figs + len(decimal_part)
-        
-        if decimal_part.count('0') == len(decimal_part):
-            # Decimal part is all zeros (e.g., '.000'), count all of them
-            return sig_figs + len(decimal_part)
-        
-        # Reverse the decimal part to count from right to left,
-        # removing trailing zeros (which are still significant in decimal)
-        decimal_part_reversed_str = decimal_part[::-1]
-        sig_figs += count_integer_sig_figs(decimal_part_reversed_str)
-        
-        return sig_figs
-    
     # Remove leading and trailing spaces
     value_str = str(value).strip()
 
     # Remove scientific notation exponent (e.g., 'e5' or 'E-4') for counting
     # Only count significant figures in the coefficient
-    try:
-        eIndex = value_str.lower().index('e')
-        value_str = value_str[:eIndex]
-    except ValueError:
-        pass  # No 'e' in the string, continue with full value
+    match = _EXPONENT_PATTERN.search(value_str)
+    end = match.start() if match else len(value_str)
 
     # Split by decimal point to handle integer and decimal parts separately
-    value_split = value_str.split('.')
+    point = value_str.find('.', 0, end)
+    if point == -1:
+        # No decimal point found, treat as integer: trailing zeros are not significant
+        return len(value_str[:end].rstrip('0'))
 
-    if len(value_split) == 1:
-        # No decimal point found, treat as integer
-        return count_integer_sig_figs(value_split[0])
-    
-    # Has decimal point, use decimal counting logic
-    return count_decimal_sig_figs(value_split)
+    integer_part = value_str[:point]
+    next_point = value_str.find('.', point + 1, end)
+    decimal_part = value_str[point + 1:end if next_point == -1 else next_point]
+
+    if integer_part.strip('0'):
+        # leading zeros are bound - all digits count
+        return len(integer_part) + len(decimal_part)
+
+    # Integer part is all zeros (e.g., '0' or '000'): count the decimal part from its
+    # first non-zero digit, or all of it when it is all zeros (e.g., '.000')
+    significant = decimal_part.lstrip('0')
+    return len(significant) if significant else len(decimal_part)
     
     
 
@@ -247,4 +604,53 @@ if __name__ == "__main__":
     assert format_with_sig_figs(0.25, 1) == '0.3', 'rounding up to odd'
     
     # force scientific notation
-    assert format_with_sig_figs(1000, 1, True) == '1E3'
\ No newline at end of file
+    assert format_with_sig_figs(1000, 1, True) == '1E3'
+    # vectorized formatting matches the scalar path
+    assert list(format_sig_figs_array([1000, 0.15, 0.25, 105.004560, -110, 0.0], 3)) == \
+        ['1.00E3', '0.150', '0.250', '105', '-110', '0.00E0']
+    assert list(format_sig_figs_array(pd.Series([1000, 9.99]), 1, True)) == ['1E3', '1E1']
+    assert format_sig_figs_columns(pd.DataFrame({'a': [1000.0], 'b': ['x']}), 2).to_dict('records') == \
+        [{'a': '1.0E3', 'b': 'x'}]
+
+    rng = np.random.default_rng(0)
+    corpus = np.concatenate([
+        rng.lognormal(0, 8, 2000) * rng.choice([-1, 1], 2000),
+        np.round(rng.normal(0, 100, 2000), 2),
+        rng.integers(-10000, 10000, 2000).astype(float),
+    ])
+    for corpus_sig_figs in (1, 2, 3, 6, 15, 17):
+        expected = [format_with_sig_figs(v, corpus_sig_figs) for v in corpus]
+        assert list(format_sig_figs_array(corpus, corpus_sig_figs)) == expected, corpus_sig_figs
+
+    assert format_batch([
+        {'value': 1000, 'mode': 'sig_figs', 'precision': 3},
+        {'value': 0.00123, 'mode': 'sig_figs', 'precision': 2, 'force_scientific': True, 'indicator': ' x 10'},
+        {'value': 123.456789, 'mode': 'rounding', 'precision': 2},
+        {'value': 'abc', 'mode': 'sig_figs', 'precision': 2},
+    ]) == [
+        {'formatted': '1.00E3'},
+        {'formatted': '1.2 x 10⁻³'},
+        {'formatted': '123.46'},
+        {'error': 'value must be a number'},
+    ]
+
+    # memoization returns the same strings and keeps -0.0 apart from 0.0
+    cache = enable_format_cache(2)
+    assert format_with_sig_figs(0.0, 2) == '0.0E0'
+    assert format_with_sig_figs(-0.0, 2) == '-0.0'
+    assert format_with_sig_figs(0.0, 2) == '0.0E0'
+    assert format_with_rounding(2.675, 2) == '2.68'
+    assert format_cache_stats() == {'hits': 1, 'misses': 3, 'evictions': 1, 'size': 2, 'max_size': 2}
+    assert format_batch([{'value': 2.675, 'mode': 'sig_figs', 'precision': 2}] * 2) == [{'formatted': '2.7'}] * 2
+    # one cached string serves every indicator
+    clear_format_cache()
+    assert format_with_sig_figs(0.00123, 2, True) == '1.2E-3'
+    assert format_with_sig_figs(0.00123, 2, True, ' x 10') == '1.2 x 10⁻³'
+    assert format_batch([{'value': 0.00123, 'mode': 'sig_figs', 'precision': 2, 'force_scientific': True,
+                          'indicator': 'e'}]) == [{'formatted': '1.2e-3'}]
+    assert format_cache_stats()['misses'] == 1 and format_cache_stats()['size'] == 1
+    assert math.isnan(format_with_sig_figs(float('nan'), 2, False, ' x 10'))
+    clear_format_cache()
+    assert len(cache) == 0 and cache.hits == 0
+    disable_format_cache()
+    assert format_cache_stats() is None
@@ -0,0 +1,251 @@
+"""
+Content-addressed cache of dataframe operation results.
+
+Results are keyed by a fingerprint of the input data plus the canonicalized
+operation parameters, and kept as DataFrames so one entry serves every wire
+format. The memory tier is an LRU bounded by the DataFrames' memory usage;
+the optional disk tier writes each result to an Arrow IPC file and survives
+restarts.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Union
+
+import pandas as pd
+
+from utils.lru_cache import LRUCache
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # the disk tier is optional
+    pa = None
+    feather = None
+
+
+_DISK_SUFFIX = '.arrow'
+
+# Schema metadata key of a result's DataFrame.attrs (JSON), which Arrow does not keep
+_ATTRS_METADATA_KEY = b'etl2report.attrs'
+
+
+def fingerprint_data(data: Union[bytes, bytearray, memoryview, Any]) -> str:
+    """
+    Content fingerprint of input data
+
+    Byte strings (Arrow IPC streams, raw request bodies) are hashed directly.
+    Anything else is hashed through its canonical JSON encoding, which costs
+    about as much as parsing it; callers holding the raw request body should
+    fingerprint that instead.
+
+    Returns:
+        Hex digest
+    """
+    if not isinstance(data, (bytes, bytearray, memoryview)):
+        data = _canonical_json(data).encode()
+    return hashlib.blake2b(data, digest_size=20).hexdigest()
+
+
+def result_key(kind: str, data_key: str, params: Dict) -> str:
+    """
+    Cache key of one operation on one input
+
+    Args:
+        kind: Operation family, e.g. 'process' or 'aggregate'
+        data_key: Fingerprint or client-supplied identity of the input data
+        params: Operation parameters; dictionary key order does not matter,
+                list order does
+
+    Returns:
+        Hex digest
+    """
+    payload = _canonical_json([kind, data_key, params]).encode()
+    return hashlib.blake2b(payload, digest_size=20).hexdigest()
+
+
+def _canonical_json(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, separators=(',', ':'), default=str)
+
+
+def dataframe_nbytes(df: pd.DataFrame) -> int:
+    """Memory used by a DataFrame, including the contents of object columns"""
+    return int(df.memory_usage(deep=True).sum())
+
+
+class ResultCache:
+    """
+    Two-tier cache of DataFrames: memory LRU plus optional Arrow files on disk.
+
+    Lookups try memory, then disk (promoting a disk hit back into memory).
+    New results are written to both tiers. Results whose columns Arrow cannot
+    represent stay memory-only. Cached DataFrames are shared, so callers must
+    not modify them in place.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 ** 2, directory: Optional[str] = None,
+                 max_disk_bytes: int = 2 * 1024 ** 3, max_entries: int = 10000):
+        """
+        Args:
+            max_bytes: Memory budget for cached DataFrames
+            directory: Directory for the disk tier, None for memory only
+            max_disk_bytes: Disk budget for the Arrow files
+            max_entries: Maximum number of results held in memory
+
+        Raises:
+            ValueError: If directory is set but pyarrow is not installed, or a
+                        budget is not a positive integer
+        """
+        if max_bytes <= 0 or max_disk_bytes <= 0:
+            raise ValueError("max_bytes and max_disk_bytes must be positive integers")
+        if directory is not None and pa is None:
+            raise ValueError("The result cache disk tier requires pyarrow (pip install pyarrow)")
+
+        self._memory = LRUCache(max_entries, max_bytes=max_bytes, sizeof=dataframe_nbytes)
+        self._directory = directory
+        self._max_disk_bytes = max_disk_bytes
+        self._disk = OrderedDict()  # key -> file size, least recently used first
+        self._disk_bytes = 0
+        self._disk_lock = threading.Lock()
+        self.disk_hits = 0
+        self.disk_misses = 0
+        self.disk_evictions = 0
+
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            self._index_directory()
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        """Cached result for key, or None"""
+        df = self._memory.lookup(key)
+        if df is None and self._directory is not None:
+            df = self._read(key)
+            if df is not None:
+                self._memory.put(key, df)
+        return df
+
+    def put(self, key: str, df: pd.DataFrame) -> None:
+        """Store a result in memory and, when enabled, on disk"""
+        self._memory.put(key, df)
+        if self._directory is not None:
+            self._write(key, df)
+
+    def get_or_compute(self, key: str, compute: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        """Cached result for key, computing and storing it on a miss"""
+        df = self.get(key)
+        if df is None:
+            df = compute()
+            self.put(key, df)
+        return df
+
+    def clear(self) -> None:
+        """Drop both tiers, deleting the Arrow files, and reset the counters"""
+        self._memory.clear()
+        with self._disk_lock:
+            for key in self._disk:
+                self._remove_file(key)
+            self._disk.clear()
+            self._disk_bytes = 0
+            self.disk_hits = 0
+            self.disk_misses = 0
+            self.disk_evictions = 0
+
+    def stats(self) -> Dict[str, Dict]:
+        """
+        Returns:
+            Dictionary with 'memory' (LRUCache.stats) and 'disk' (enabled,
+            hits, misses, evictions, size, bytes and max_bytes)
+        """
+        with self._disk_lock:
+            disk = {
+                'enabled': self._directory is not None,
+                'hits': self.disk_hits,
+                'misses': self.disk_misses,
+                'evictions': self.disk_evictions,
+                'size': len(self._disk),
+                'bytes': self._disk_bytes,
+                'max_bytes': self._max_disk_bytes
+            }
+        return {'memory': self._memory.stats(), 'disk': disk}
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self._directory, key + _DISK_SUFFIX)
+
+    def _index_directory(self) -> None:
+        """Pick up files left by an earlier process, oldest access first"""
+        entries = []
+        for name in os.listdir(self._directory):
+            if name.endswith(_DISK_SUFFIX):
+                stat = os.stat(os.path.join(self._directory, name))
+                entries.append((stat.st_mtime, name[:-len(_DISK_SUFFIX)], stat.st_size))
+        with self._disk_lock:
+            for _, key, size in sorted(entries):
+                self._disk[key] = size
+                self._disk_bytes += size
+            self._evict_disk()
+
+    def _read(self, key: str) -> Optional[pd.DataFrame]:
+        with self._disk_lock:
+            if key not in self._disk:
+                self.disk_misses += 1
+                return None
+            self._disk.move_to_end(key)
+            self.disk_hits += 1
+        try:
+            table = feather.read_table(self._path(key), memory_map=True)
+        except (OSError, pa.ArrowException):
+            # Removed or truncated behind our back
+            with self._disk_lock:
+                self._forget(key)
+            return None
+        df = table.to_pandas()
+        attrs = (table.schema.metadata or {}).get(_ATTRS_METADATA_KEY)
+        if attrs:
+            df.attrs = json.loads(attrs)
+        return df
+
+    def _write(self, key: str, df: pd.DataFrame) -> None:
+        path = self._path(key)
+        temporary = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            table = pa.Table.from_pandas(df)
+            if df.attrs:
+                attrs = json.dumps(df.attrs, default=str).encode()
+                table = table.replace_schema_metadata({**table.schema.metadata, _ATTRS_METADATA_KEY: attrs})
+            feather.write_feather(table, temporary, compression='uncompressed')
+            os.replace(temporary, path)
+        except (OSError, ValueError, TypeError, pa.ArrowException):
+            # Not representable in Arrow (e.g. mixed-type object columns) or disk trouble
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            return
+
+        size = os.path.getsize(path)
+        with self._disk_lock:
+            if key in self._disk:
+                self._disk_bytes -= self._disk.pop(key)
+            self._disk[key] = size
+            self._disk_bytes += size
+            self._evict_disk()
+
+    def _forget(self, key: str) -> None:
+        """Drop key from the disk index. Caller holds the disk lock."""
+        if key in self._disk:
+            self._disk_bytes -= self._disk.pop(key)
+
+    def _remove_file(self, key: str) -> None:
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def _evict_disk(self) -> None:
+        """Delete least recently used files until within max_disk_bytes. Caller holds the disk lock."""
+        while self._disk and self._disk_bytes > self._max_disk_bytes:
+            key, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            self._remove_file(key)
+            self.disk_evictions += 1
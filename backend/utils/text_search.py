@@ -0,0 +1,147 @@
+"""
+Substring and keyword search over text columns.
+
+contains tests one term, literally unless a regex is requested (compiled
+patterns are cached). contains_any tests many keywords in one pass: the
+keywords are compiled into a trie-shaped pattern, which pyarrow's RE2 engine
+runs as an automaton (in the manner of Aho-Corasick) over Arrow string
+arrays, and Python's re module walks with one step per character of the
+longest keyword. Columns already backed by Arrow strings are searched in
+place; object columns of strings are converted to Arrow for contains_any
+when pyarrow is installed.
+"""
+
+import re
+from typing import Callable, Dict, Iterable
+
+import numpy as np
+import pandas as pd
+
+from utils.lru_cache import LRUCache
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # Arrow-backed search is optional
+    pa = None
+    pc = None
+
+
+# Compiled re patterns by (kind, pattern or keywords)
+_pattern_cache = LRUCache(256)
+
+
+def contains(values: pd.Series, pattern: str, regex: bool = False) -> np.ndarray:
+    """
+    Boolean mask of the values containing pattern
+
+    Args:
+        values: Text column; missing and non-string values never match
+        pattern: Substring to find, or a regular expression with regex
+        regex: Treat pattern as a regular expression (RE2 syntax for
+               Arrow-backed columns, as in pandas, re syntax otherwise)
+
+    Returns:
+        Boolean array, one entry per value
+    """
+    arrow_values = _arrow_strings(values)
+    if arrow_values is not None:
+        search = pc.match_substring_regex if regex else pc.match_substring
+        return _to_mask(search(arrow_values, pattern))
+
+    if regex:
+        compiled = _compiled('regex', pattern, lambda: re.compile(pattern))
+        return _object_mask(values, lambda value: compiled.search(value) is not None)
+    return _object_mask(values, lambda value: pattern in value)
+
+
+def contains_any(values: pd.Series, keywords: Iterable[str]) -> np.ndarray:
+    """
+    Boolean mask of the values containing at least one of the keywords
+
+    Args:
+        values: Text column; missing and non-string values never match
+        keywords: Substrings to find (literal, not regular expressions)
+
+    Returns:
+        Boolean array, one entry per value
+    """
+    keywords = tuple(sorted(set(keywords)))
+    if not keywords:
+        return np.zeros(len(values), dtype=bool)
+    pattern = keyword_pattern(keywords)
+
+    arrow_values = _arrow_strings(values)
+    if arrow_values is None and pa is not None and values.dtype == object \
+            and pd.api.types.infer_dtype(values, skipna=True) == 'string':
+        arrow_values = pa.array(values.to_numpy(), type=pa.string(), from_pandas=True)
+    if arrow_values is not None:
+        return _to_mask(pc.match_substring_regex(arrow_values, pattern))
+
+    compiled = _compiled('keywords', keywords, lambda: re.compile(pattern))
+    return _object_mask(values, lambda value: compiled.search(value) is not None)
+
+
+def keyword_pattern(keywords: Iterable[str]) -> str:
+    """
+    Regular expression matching any of the keywords, shaped as a trie
+
+    Keywords sharing a prefix share a branch, e.g. ['lead', 'leak', 'zinc']
+    gives '(?:lea(?:d|k)|zinc)', so a match attempt follows one path per
+    character instead of trying every keyword. A keyword that extends
+    another is dropped, since the shorter one already matches.
+    """
+    trie = {}
+    for keyword in sorted(set(keywords), key=len):
+        node = trie
+        for char in keyword:
+            if None in node:
+                break  # a prefix of this keyword is a keyword
+            node = node.setdefault(char, {})
+        else:
+            node.clear()
+            node[None] = True
+    return _trie_pattern(trie)
+
+
+def pattern_cache_stats() -> Dict[str, int]:
+    """Statistics of the compiled pattern cache, see LRUCache.stats"""
+    return _pattern_cache.stats()
+
+
+def _trie_pattern(node: Dict) -> str:
+    if None in node:
+        return ''
+    branches = [re.escape(char) + _trie_pattern(child) for char, child in sorted(node.items())]
+    if len(branches) == 1:
+        return branches[0]
+    return '(?:' + '|'.join(branches) + ')'
+
+
+def _compiled(kind: str, key, compile_pattern: Callable[[], re.Pattern]) -> re.Pattern:
+    return _pattern_cache.get_or_compute((kind, key), compile_pattern)
+
+
+def _arrow_strings(values: pd.Series):
+    """The Arrow array behind an Arrow-backed string column, else None"""
+    if pa is None:
+        return None
+    dtype = values.dtype
+    if isinstance(dtype, pd.StringDtype) and dtype.storage == 'pyarrow':
+        return pa.array(values.array)
+    if isinstance(dtype, pd.ArrowDtype) and (pa.types.is_string(dtype.pyarrow_dtype)
+                                             or pa.types.is_large_string(dtype.pyarrow_dtype)):
+        return pa.array(values.array)
+    return None
+
+
+def _to_mask(matches) -> np.ndarray:
+    """Arrow boolean result as a numpy mask, with missing values as False"""
+    return pc.fill_null(matches, False).to_numpy(zero_copy_only=False)
+
+
+def _object_mask(values: pd.Series, match: Callable[[str], bool]) -> np.ndarray:
+    return np.fromiter(
+        (isinstance(value, str) and match(value) for value in values.to_numpy(dtype=object)),
+        dtype=bool, count=len(values)
+    )
@@ -0,0 +1,4 @@
+"""
+Micro-benchmarks for the Lambda modules.
+Run from the etl2report directory, e.g. python -m benchmarks.textract_compact
+"""
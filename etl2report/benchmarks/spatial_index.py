@@ -0,0 +1,90 @@
+"""
+Compare SpatialIndex queries with linear scans of the blocks.
+
+Queries run on the AnalyzeDocument fixture (tests/assets): rectangles of
+template-field size with and without a block type filter, nearest LINE to a
+point, and the blocks overlapping a given block. Each scan returns what the
+index does and is checked against it before timing; the scans get the
+boxes of the blocks precomputed, as the index has them.
+
+Usage (from the etl2report directory):
+    python -m benchmarks.spatial_index
+"""
+
+import json
+import math
+import os
+import random
+import timeit
+
+from textract_spatial import SpatialIndex
+
+FIXTURE = os.path.join(os.path.dirname(__file__), '..', 'tests', 'assets', 'analyzeDocResponse.json')
+
+
+def box(block: dict) -> tuple:
+    bounds = block['Geometry']['BoundingBox']
+    return bounds['Left'], bounds['Top'], bounds['Left'] + bounds['Width'], bounds['Top'] + bounds['Height']
+
+
+def scan_rect(blocks: list, boxes: list, page: int, rect: tuple, block_types=None) -> list:
+    return [block for block, (left, top, right, bottom) in zip(blocks, boxes)
+            if block['Page'] == page and (block_types is None or block['BlockType'] in block_types)
+            and left <= rect[2] and rect[0] <= right and top <= rect[3] and rect[1] <= bottom]
+
+
+def scan_nearest(blocks: list, boxes: list, page: int, x: float, y: float, block_types=None) -> dict:
+    best = None
+    for position, (block, (left, top, right, bottom)) in enumerate(zip(blocks, boxes)):
+        if block['Page'] != page or (block_types is not None and block['BlockType'] not in block_types):
+            continue
+        distance = math.hypot(max(left - x, 0.0, x - right), max(top - y, 0.0, y - bottom))
+        if best is None or (distance, position) < best:
+            best = (distance, position)
+    return blocks[best[1]]
+
+
+def main() -> None:
+    with open(FIXTURE) as f:
+        blocks = json.load(f)['Blocks']
+    boxes = [box(block) for block in blocks]
+    rng = random.Random(0)
+    rects = []
+    for _ in range(200):
+        left, top = rng.uniform(0, 0.8), rng.uniform(0, 0.95)
+        rects.append((rng.choice([1, 2, 3]), (left, top, left + rng.uniform(0.05, 0.2), top + rng.uniform(0.01, 0.05))))
+    points = [(rng.choice([1, 2, 3]), rng.random(), rng.random()) for _ in range(200)]
+    targets = rng.sample([block for block in blocks if block['BlockType'] in ('WORD', 'LINE', 'CELL')], 200)
+
+    build = min(timeit.repeat(lambda: SpatialIndex(blocks), number=1, repeat=5))
+    index = SpatialIndex(blocks)
+    cases = {
+        'blocks_in_rect': (
+            lambda: [scan_rect(blocks, boxes, page, rect) for page, rect in rects],
+            lambda: [index.blocks_in_rect(page, rect[0], rect[1], rect[2] - rect[0], rect[3] - rect[1])
+                     for page, rect in rects]),
+        'blocks_in_rect WORD': (
+            lambda: [scan_rect(blocks, boxes, page, rect, {'WORD'}) for page, rect in rects],
+            lambda: [index.blocks_in_rect(page, rect[0], rect[1], rect[2] - rect[0], rect[3] - rect[1],
+                                          block_types=['WORD']) for page, rect in rects]),
+        'nearest_block LINE': (
+            lambda: [scan_nearest(blocks, boxes, page, x, y, {'LINE'}) for page, x, y in points],
+            lambda: [index.nearest_block(page, x, y, block_types=['LINE']) for page, x, y in points]),
+        'blocks_overlapping': (
+            lambda: [[block for block in scan_rect(blocks, boxes, target['Page'], box(target)) if block is not target]
+                     for target in targets],
+            lambda: [index.blocks_overlapping(target['Id']) for target in targets]),
+    }
+
+    print(f'{len(blocks)} blocks, index built in {build * 1000:.1f} ms')
+    print(f'{"query (x200)":>22}{"scan (ms)":>12}{"index (ms)":>12}{"speedup":>9}')
+    for name, (scan, query) in cases.items():
+        assert [[id(block) for block in result] if isinstance(result, list) else id(result) for result in query()] \
+            == [[id(block) for block in result] if isinstance(result, list) else id(result) for result in scan()]
+        before = min(timeit.repeat(scan, number=1, repeat=3))
+        after = min(timeit.repeat(query, number=1, repeat=3))
+        print(f'{name:>22}{before * 1000:>12.1f}{after * 1000:>12.2f}{before / after:>8.1f}x')
+
+
+if __name__ == '__main__':
+    main()
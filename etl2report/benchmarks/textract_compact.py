@@ -0,0 +1,55 @@
+"""
+Compare Textract JSON with the compact block form of textract_compact.
+
+Sizes are of the AnalyzeDocument fixture (tests/assets) as stored, as compact
+JSON, and as the JSON of its blocks and of the compact form, raw and gzipped.
+Parse times compare json.loads of the Textract JSON with loads_compact, alone
+and followed by expand_blocks. The round trip is checked to restore the
+blocks before timing.
+
+Usage (from the etl2report directory):
+    python -m benchmarks.textract_compact
+"""
+
+import gzip
+import json
+import os
+import timeit
+
+from textract_compact import compact_blocks, dumps_compact, expand_blocks, loads_compact
+
+FIXTURE = os.path.join(os.path.dirname(__file__), '..', 'tests', 'assets', 'analyzeDocResponse.json')
+
+
+def best(function, repeat: int = 5) -> float:
+    return min(timeit.repeat(function, number=1, repeat=repeat))
+
+
+def main() -> None:
+    with open(FIXTURE, 'rb') as f:
+        fixture = f.read()
+    blocks = json.loads(fixture)['Blocks']
+    textract = json.dumps(blocks, separators=(',', ':')).encode('utf-8')
+    compact = dumps_compact(compact_blocks(blocks))
+    assert expand_blocks(loads_compact(compact)) == blocks
+
+    print(f'{len(blocks)} blocks')
+    print(f'{"":>24}{"bytes":>12}{"gzipped":>12}')
+    for name, data in (('fixture (as stored)', fixture), ('textract blocks', textract), ('compact', compact)):
+        print(f'{name:>24}{len(data):>12}{len(gzip.compress(data)):>12}')
+    print(f'{"size reduction":>24}{len(textract) / len(compact):>11.1f}x'
+          f'{len(gzip.compress(textract)) / len(gzip.compress(compact)):>11.1f}x')
+
+    parse = best(lambda: json.loads(textract))
+    print(f'\n{"":>24}{"ms":>12}{"speedup":>12}')
+    print(f'{"json.loads":>24}{parse * 1000:>12.2f}')
+    for name, function in (('loads_compact', lambda: loads_compact(compact)),
+                           ('loads_compact + expand', lambda: expand_blocks(loads_compact(compact))),
+                           ('compact_blocks', lambda: compact_blocks(blocks))):
+        elapsed = best(function)
+        speedup = f'{parse / elapsed:>11.1f}x' if name.startswith('loads') else ''
+        print(f'{name:>24}{elapsed * 1000:>12.2f}{speedup}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,32 @@
+import gzip
+import io
 import json
 import os
+import random
+import time
 from typing import Any
 import boto3
 from botocore.exceptions import ClientError
-from lambda_utils import create_response, get_client_with_assumed_role
+from lambda_utils import create_response, dumps_json, get_client_with_assumed_role
+from textract_compact import BlockCompactor, dumps_compact
+from textract_index import BlockIndexBuilder
+
+# collectAll mode: retries of a throttled GetDocumentAnalysis call, and the
+# bounds of the delay between calls, which doubles on each throttle and halves
+# after each success
+TEXTRACT_MAX_RETRIES = int(os.environ.get('TEXTRACT_MAX_RETRIES', 8))
+TEXTRACT_BACKOFF_BASE_SECONDS = float(os.environ.get('TEXTRACT_BACKOFF_BASE_SECONDS', 0.5))
+TEXTRACT_BACKOFF_MAX_SECONDS = float(os.environ.get('TEXTRACT_BACKOFF_MAX_SECONDS', 8))
+
+# collectAll mode: time allowed to collect every page, within API Gateway's
+# 29 second integration timeout, and time kept back from the Lambda timeout
+COLLECT_ALL_TIMEOUT_SECONDS = float(os.environ.get('COLLECT_ALL_TIMEOUT_SECONDS', 25))
+COLLECT_ALL_RESERVE_SECONDS = 3
+
+THROTTLING_ERROR_CODES = ('ProvisionedThroughputExceededException', 'ThrottlingException')
+
+# collectAll mode: formats the collected results can be written in
+RESULT_FORMATS = ('textract', 'compact')
 
 
 def lambda_handler(event: dict[str, Any], context: Any) -> dict[str, Any]:
@@ -14,11 +37,24 @@ def lambda_handler(event: dict[str, Any], context: Any) -> dict[str, Any]:
     It expects the following in the request body:
     - jobId: The Textract job ID from start_document_analysis
     - nextToken (optional): Token for retrieving the next page of results
+    - collectAll (optional): Once the job is complete, page through every
+      result inside this invocation and write them to S3 instead of returning
+      one page (see collect_all_results)
+    - resultBucket: S3 bucket for the collected results (required with collectAll)
+      (written to users/{user_id}/textract-results/{jobId}.json.gz, or
+      {jobId}.compact.json.gz for the compact format)
+    - resultFormat (optional): 'textract' (default) to write the results as
+      Textract returns them, or 'compact' for the columnar form of
+      textract_compact
+    - includeIndex (optional): Also write the block graph index of
+      textract_index (lookup by Id, page ranges, blocks by type and resolved
+      relationships) as BlockIndex beside the blocks
     
     The function will:
     1. Get the document analysis status and results
     2. Handle pagination if results span multiple pages
-    3. Return complete or partial results with nextToken if more pages exist
+    3. Return complete or partial results with nextToken if more pages exist,
+       or with collectAll, the location of all results in S3
     
     Returns:
     - jobStatus: Current status of the job (IN_PROGRESS, SUCCEEDED, FAILED, PARTIAL_SUCCESS)
@@ -27,6 +63,12 @@ def lambda_handler(event: dict[str, Any], context: Any) -> dict[str, Any]:
     - documentMetadata: Document information (page count, etc.)
     - nextToken: Token for retrieving the next page (if more results exist)
     - analyzeDocumentModelVersion: Version of the Textract model used
+    
+    With collectAll, a complete job returns jobStatus, totalBlocks, pages,
+    resultBucket, resultKey, resultUrl (a presigned GET URL for the gzipped
+    results), resultFormat, blockIndex (whether the index was written) and
+    resultCached (whether they were already in S3) instead of blocks and
+    nextToken.
     """
     
     try:
@@ -54,22 +96,43 @@ def lambda_handler(event: dict[str, Any], context: Any) -> dict[str, Any]:
         # Extract required parameters
         job_id = body.get('jobId')
         next_token = body.get('nextToken')
+        collect_all = bool(body.get('collectAll'))
         
         # Validate required parameters
         if not job_id:
             return create_response(400, {'error': 'Missing required parameter: jobId'})
         
+        if collect_all:
+            result_bucket = body.get('resultBucket')
+            if not result_bucket:
+                return create_response(400, {'error': 'Missing required parameter: resultBucket (required with collectAll)'})
+            result_format = body.get('resultFormat', 'textract')
+            if result_format not in RESULT_FORMATS:
+                return create_response(400, {'error': f'Invalid resultFormat: {result_format}. Must be "textract" or "compact"'})
+            # The key is derived from the tenant and job, never taken from the request
+            suffix = '.compact.json.gz' if result_format == 'compact' else '.json.gz'
+            result_key = f'users/{user_id}/textract-results/{job_id}{suffix}'
+            include_index = bool(body.get('includeIndex'))
+            
+            s3_role_arn = os.environ.get('S3_TENANT_ROLE_ARN')
+            if not s3_role_arn:
+                return create_response(500, {'error': 'S3_TENANT_ROLE_ARN environment variable not set'})
+        
         # Prepare GetDocumentAnalysis parameters
         get_params: dict[str, Any] = {
             'JobId': job_id
         }
         
-        # Add NextToken if provided for pagination
-        if next_token:
+        # Add NextToken if provided for pagination (collectAll always starts from the first page)
+        if next_token and not collect_all:
             get_params['NextToken'] = next_token
         
         # Get the document analysis results
-        response = textract_client.get_document_analysis(**get_params)
+        if collect_all:
+            backoff = AdaptiveBackoff(collect_deadline(context))
+            response = backoff.call(textract_client.get_document_analysis, **get_params)
+        else:
+            response = textract_client.get_document_analysis(**get_params)
         
         # Extract relevant fields from response
         job_status = response.get('JobStatus')
@@ -98,6 +161,20 @@ def lambda_handler(event: dict[str, Any], context: Any) -> dict[str, Any]:
         
         # Job succeeded - include analysis results
         if job_status in ['SUCCEEDED', 'PARTIAL_SUCCESS']:
+            if collect_all:
+                # S3 is only touched once the job is complete: results
+                # collected by an earlier request are served as they are,
+                # unless the index is wanted and they were written without it
+                s3_client = get_client_with_assumed_role('s3', s3_role_arn, user_id)
+                cached = get_collected_results(s3_client, result_bucket, result_key)
+                if cached is not None and (cached['blockIndex'] or not include_index):
+                    return create_response(200, cached)
+                response_data.update(collect_all_results(
+                    textract_client, s3_client, job_id, response, backoff,
+                    result_bucket, result_key, result_format, include_index
+                ))
+                return create_response(200, response_data)
+            
             # Add document metadata
             if 'DocumentMetadata' in response:
                 response_data['documentMetadata'] = response['DocumentMetadata']
@@ -133,6 +210,12 @@ def lambda_handler(event: dict[str, Any], context: Any) -> dict[str, Any]:
     except json.JSONDecodeError:
         return create_response(400, {'error': 'Invalid JSON in request body'})
     
+    except CollectTimeout as e:
+        return create_response(504, {
+            'error': 'Timed out collecting results; page through them with nextToken instead',
+            'pagesFetched': e.pages
+        })
+    
     except ClientError as e:
         error_code = e.response.get('Error', {}).get('Code', 'Unknown')
         error_message = e.response.get('Error', {}).get('Message', str(e))
@@ -147,7 +230,7 @@ def lambda_handler(event: dict[str, Any], context: Any) -> dict[str, Any]:
                 'error': 'Invalid job ID',
                 'details': error_message
             })
-        elif error_code == 'AccessDeniedException':
+        elif error_code in ('AccessDeniedException', 'AccessDenied'):
             return create_response(403, {
                 'error': 'Access denied',
                 'details': error_message
@@ -157,7 +240,7 @@ def lambda_handler(event: dict[str, Any], context: Any) -> dict[str, Any]:
                 'error': 'Textract service error',
                 'details': error_message
             })
-        elif error_code == 'ProvisionedThroughputExceededException':
+        elif error_code in THROTTLING_ERROR_CODES:
             return create_response(429, {
                 'error': 'Rate limit exceeded',
                 'details': error_message
@@ -179,3 +262,246 @@ def lambda_handler(event: dict[str, Any], context: Any) -> dict[str, Any]:
             'error': 'Internal server error',
             'details': str(e)
         })
+
+
+def collect_all_results(
+    textract_client: Any,
+    s3_client: Any,
+    job_id: str,
+    first_page: dict[str, Any],
+    backoff: 'AdaptiveBackoff',
+    bucket: str,
+    key: str,
+    result_format: str = 'textract',
+    include_index: bool = False
+) -> dict[str, Any]:
+    """
+    Page through every GetDocumentAnalysis result of a complete job and write
+    them to S3 as one gzipped JSON object.
+    
+    Pages are fetched in this invocation with the same (cached) Textract client,
+    so there is one assumed-role session for the whole document. NextToken
+    chains the pages, so they are fetched one after another, paced by backoff.
+    Each page's blocks are encoded and compressed as soon as it arrives; only
+    the compressed output is kept, and it is uploaded with a single PUT.
+    
+    The object has the shape of a GetDocumentAnalysis response (and of the
+    files Textract writes to its output location): Blocks from every page,
+    DocumentMetadata, JobStatus, AnalyzeDocumentModelVersion and Warnings
+    merged across pages. In the compact format, the blocks are instead added
+    to a BlockCompactor page by page, and the object is the compact form (see
+    textract_compact) with the same fields beside it. It is stored with
+    Content-Encoding gzip, so browsers decompress it as they fetch it. With
+    include_index, a BlockIndexBuilder indexes the pages as they arrive and
+    the index is written as BlockIndex.
+    
+    Args:
+        textract_client: Textract client used for the first page
+        s3_client: S3 client for the tenant
+        job_id: Textract job ID
+        first_page: GetDocumentAnalysis response already fetched
+        backoff: AdaptiveBackoff the first page was fetched with
+        bucket: S3 bucket to write to
+        key: S3 key to write to
+        result_format: 'textract' or 'compact'
+        include_index: Write the block graph index beside the blocks
+        
+    Returns:
+        Response fields: totalBlocks, pages, resultBucket, resultKey,
+        resultUrl, resultCached, resultFormat, blockIndex, documentMetadata, analyzeDocumentModelVersion
+        and warnings (when present)
+        
+    Raises:
+        CollectTimeout: If the pages cannot all be fetched before the deadline
+    """
+    buffer = io.BytesIO()
+    warnings: dict[str, set] = {}
+    total_blocks = 0
+    pages = 0
+    page = first_page
+    compactor = BlockCompactor() if result_format == 'compact' else None
+    index_builder = BlockIndexBuilder() if include_index else None
+    
+    with gzip.GzipFile(fileobj=buffer, mode='wb', compresslevel=6, mtime=0) as artifact:
+        if compactor is None:
+            artifact.write(b'{"Blocks":[')
+        while True:
+            blocks = page.get('Blocks') or []
+            if index_builder is not None:
+                index_builder.add(blocks)
+            if compactor is not None:
+                compactor.add(blocks)
+            elif blocks:
+                if total_blocks:
+                    artifact.write(b',')
+                artifact.write(dumps_json(blocks)[1:-1].encode('utf-8'))
+            total_blocks += len(blocks)
+            pages += 1
+            for warning in page.get('Warnings', []):
+                warnings.setdefault(warning['ErrorCode'], set()).update(warning.get('Pages', []))
+            
+            next_token = page.get('NextToken')
+            if not next_token:
+                break
+            try:
+                page = backoff.call(textract_client.get_document_analysis, JobId=job_id, NextToken=next_token)
+            except CollectTimeout:
+                raise CollectTimeout(pages) from None
+        
+        summary: dict[str, Any] = {'JobStatus': first_page.get('JobStatus')}
+        for field in ('DocumentMetadata', 'AnalyzeDocumentModelVersion'):
+            if field in first_page:
+                summary[field] = first_page[field]
+        if warnings:
+            summary['Warnings'] = [
+                {'ErrorCode': code, 'Pages': sorted(warning_pages)} for code, warning_pages in warnings.items()
+            ]
+        if index_builder is not None:
+            summary['BlockIndex'] = index_builder.index()
+        if compactor is None:
+            artifact.write(b'],' + dumps_json(summary)[1:].encode('utf-8'))
+        else:
+            artifact.write(dumps_compact({**summary, **compactor.compact()}))
+    
+    s3_client.put_object(
+        Bucket=bucket,
+        Key=key,
+        Body=buffer.getvalue(),
+        ContentType='application/json',
+        ContentEncoding='gzip',
+        Metadata={
+            'job-status': str(summary['JobStatus']),
+            'result-format': result_format,
+            'block-index': 'true' if include_index else 'false',
+            'total-blocks': str(total_blocks),
+            'pages': str(pages)
+        }
+    )
+    print(f"Collected {total_blocks} blocks from {pages} pages of job {job_id} "
+          f"({buffer.tell()} bytes gzipped, {backoff.retries} throttling retries) to s3://{bucket}/{key}")
+    
+    result: dict[str, Any] = result_location(s3_client, bucket, key, summary['JobStatus'], total_blocks, pages)
+    result['resultCached'] = False
+    result['resultFormat'] = result_format
+    result['blockIndex'] = include_index
+    if 'DocumentMetadata' in summary:
+        result['documentMetadata'] = summary['DocumentMetadata']
+    if 'AnalyzeDocumentModelVersion' in summary:
+        result['analyzeDocumentModelVersion'] = summary['AnalyzeDocumentModelVersion']
+    if 'Warnings' in summary:
+        result['warnings'] = summary['Warnings']
+    return result
+
+
+def get_collected_results(s3_client: Any, bucket: str, key: str) -> dict[str, Any] | None:
+    """
+    Location of results collected by an earlier collectAll request, if any.
+    
+    Returns:
+        Response fields as from collect_all_results (without the document
+        fields, which are in the object), or None if nothing is stored at key
+    """
+    try:
+        head = s3_client.head_object(Bucket=bucket, Key=key)
+    except ClientError as e:
+        # Without s3:ListBucket, S3 answers HEAD of a missing key with 403
+        # rather than 404; either way the results are collected again
+        if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound', '403', 'Forbidden', 'AccessDenied'):
+            return None
+        raise
+    
+    metadata = head.get('Metadata', {})
+    result = result_location(
+        s3_client, bucket, key, metadata.get('job-status', 'SUCCEEDED'),
+        int(metadata.get('total-blocks', 0)), int(metadata.get('pages', 0))
+    )
+    result['resultCached'] = True
+    result['resultFormat'] = metadata.get('result-format', 'textract')
+    result['blockIndex'] = metadata.get('block-index') == 'true'
+    return result
+
+
+def result_location(
+    s3_client: Any,
+    bucket: str,
+    key: str,
+    job_status: str,
+    total_blocks: int,
+    pages: int
+) -> dict[str, Any]:
+    """Response fields locating collected results, with a presigned GET URL."""
+    expiration = int(os.environ.get('PRESIGNED_URL_EXPIRATION', '3600'))
+    return {
+        'jobStatus': job_status,
+        'hasMoreResults': False,
+        'totalBlocks': total_blocks,
+        'pages': pages,
+        'resultBucket': bucket,
+        'resultKey': key,
+        'resultUrl': s3_client.generate_presigned_url(
+            'get_object',
+            Params={'Bucket': bucket, 'Key': key},
+            ExpiresIn=expiration
+        )
+    }
+
+
+def collect_deadline(context: Any) -> float:
+    """time.monotonic() value by which collectAll must have fetched every page."""
+    seconds = COLLECT_ALL_TIMEOUT_SECONDS
+    if context is not None and hasattr(context, 'get_remaining_time_in_millis'):
+        seconds = min(seconds, context.get_remaining_time_in_millis() / 1000 - COLLECT_ALL_RESERVE_SECONDS)
+    return time.monotonic() + seconds
+
+
+class CollectTimeout(Exception):
+    """Raised when collecting every page would run past the deadline."""
+    
+    def __init__(self, pages: int = 0):
+        super().__init__(f'Timed out collecting results after {pages} pages')
+        self.pages = pages
+
+
+class AdaptiveBackoff:
+    """
+    Calls an AWS operation, retrying throttling errors with jittered exponential
+    backoff and pacing later calls by the current delay.
+    
+    The delay doubles on each throttle (from TEXTRACT_BACKOFF_BASE_SECONDS up to
+    TEXTRACT_BACKOFF_MAX_SECONDS) and halves after each success, so a run of
+    pages slows to the rate Textract allows and speeds back up once it is no
+    longer throttled. A wait that would pass the deadline raises CollectTimeout.
+    """
+    
+    def __init__(self, deadline: float):
+        self.deadline = deadline
+        self.delay = 0.0
+        self.retries = 0
+    
+    def call(self, operation: Any, **params: Any) -> dict[str, Any]:
+        self._wait(self.delay)
+        attempt = 0
+        while True:
+            try:
+                response = operation(**params)
+                break
+            except ClientError as e:
+                error_code = e.response.get('Error', {}).get('Code')
+                if error_code not in THROTTLING_ERROR_CODES or attempt >= TEXTRACT_MAX_RETRIES:
+                    raise
+                attempt += 1
+                self.retries += 1
+                self.delay = min(TEXTRACT_BACKOFF_MAX_SECONDS, max(self.delay * 2, TEXTRACT_BACKOFF_BASE_SECONDS))
+                print(f"{error_code}: retry {attempt} of {TEXTRACT_MAX_RETRIES} within {self.delay:.2f}s")
+                self._wait(random.uniform(self.delay / 2, self.delay))
+        
+        self.delay /= 2
+        if self.delay < TEXTRACT_BACKOFF_BASE_SECONDS / 4:
+            self.delay = 0.0
+        return response
+    
+    def _wait(self, seconds: float) -> None:
+        if time.monotonic() + seconds > self.deadline:
+            raise CollectTimeout()
+        if seconds > 0:
+            time.sleep(seconds)
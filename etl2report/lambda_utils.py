@@ -8,10 +8,30 @@ including JWT token extraction and standardized error response creation.
 import json
 import base64
 import os
+import threading
 import boto3
-from datetime import datetime, timezone
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
 from typing import Any
 
+try:
+    import orjson
+except ImportError:  # Optional: package orjson with the function (or in a layer) for faster responses
+    orjson = None
+
+# Assumed-role sessions kept across warm invocations, least recently used first:
+# (role_arn, tenant_id, role_session_name) -> {'expiration': datetime, 'credentials': dict,
+# 'clients': {(service_name, region_name): client}}
+_assumed_role_cache: OrderedDict = OrderedDict()
+_assumed_role_lock = threading.Lock()
+_sts_client = None
+
+# Maximum cached assumed-role sessions (tenants) and how long before their
+# credentials expire that they are renewed
+ASSUMED_ROLE_CACHE_SIZE = int(os.environ.get('ASSUMED_ROLE_CACHE_SIZE', 100))
+ASSUMED_ROLE_REFRESH_SECONDS = int(os.environ.get('ASSUMED_ROLE_REFRESH_SECONDS', 300))
+
+
 def create_response(status_code: int, body: dict[str, Any]) -> dict[str, Any]:
     """
     Create a standardized Lambda proxy response.
@@ -40,10 +60,34 @@ def create_response(status_code: int, body: dict[str, Any]) -> dict[str, Any]:
             'Access-Control-Allow-Headers': os.environ.get('CORS_ALLOW_HEADERS', 'Content-Type,Authorization'),
             'Access-Control-Allow-Methods': os.environ.get('CORS_ALLOW_METHODS', 'POST,OPTIONS')
         },
-        'body': json.dumps(body)
+        'body': dumps_json(body)
     }
 
 
+def dumps_json(value: Any) -> str:
+    """
+    Serialize a response body to a JSON string.
+    
+    Uses orjson when it is installed, which encodes large payloads such as
+    Textract block lists several times faster than the standard library, and
+    json.dumps otherwise or for values orjson rejects (e.g. integers beyond
+    64 bits). For values json.dumps accepts, the encodings differ only in
+    whitespace and string escaping, and in NaN, which orjson writes as null.
+    
+    Args:
+        value: JSON-serializable value
+        
+    Returns:
+        JSON string
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+        except TypeError:
+            pass
+    return json.dumps(value)
+
+
 def extract_user_from_token(authorization: str) -> str | None:
     """
     Extract user ID from the Authorization header.
@@ -104,7 +148,9 @@ def get_client_with_assumed_role(
     service_name: str,
     role_arn: str,
     tenant_id: str,
-    role_session_name: str | None = None
+    role_session_name: str | None = None,
+    sts_client: Any = None,
+    region_name: str | None = None
 ) -> Any:
     """
     Create a boto3 client with credentials from an assumed IAM role.
@@ -112,11 +158,21 @@ def get_client_with_assumed_role(
     This function assumes an IAM role and tags the session with a tenant ID,
     enabling multi-tenant resource isolation through IAM policies and session tags.
     
+    The temporary credentials and the clients built from them are cached per
+    role, tenant and session name (and the clients per service and region)
+    for as long as the Lambda container stays warm, so repeated requests from
+    a tenant skip the STS round-trip and client construction. Credentials are renewed ASSUMED_ROLE_REFRESH_SECONDS before
+    they expire, and at most ASSUMED_ROLE_CACHE_SIZE sessions are kept, evicting
+    the least recently used.
+    
     Args:
         service_name: AWS service name (e.g., 's3', 'textract', 'dynamodb')
         role_arn: ARN of the IAM role to assume (e.g., 'arn:aws:iam::123456789012:role/S3TenantRole')
         tenant_id: Tenant identifier to tag the session with
         role_session_name: Name for the role session (default: generated from tenant_id)
+        sts_client: STS client to assume the role with (default: one shared
+                    across invocations), e.g. a client wrapped in a botocore Stubber
+        region_name: Region of the client (default: the region of the environment)
         
     Returns:
         boto3 client for the specified service with assumed role credentials
@@ -128,18 +184,65 @@ def get_client_with_assumed_role(
         >>> s3_client = get_client_with_assumed_role('s3', 'arn:aws:iam::123456789012:role/S3TenantRole', 'user-123')
         >>> s3_client.list_buckets()
     """
-    # Initialize STS client
-    sts = boto3.client('sts')
-    
     # Generate session name from tenant_id if not provided
     if not role_session_name:
         role_session_name = tenant_id
     
+    key = (role_arn, tenant_id, role_session_name)
+    refresh_at = datetime.now(timezone.utc) + timedelta(seconds=ASSUMED_ROLE_REFRESH_SECONDS)
+    with _assumed_role_lock:
+        session = _assumed_role_cache.get(key)
+        if session is not None and session['expiration'] > refresh_at:
+            _assumed_role_cache.move_to_end(key)
+            client = session['clients'].get((service_name, region_name))
+            if client is not None:
+                return client
+        else:
+            session = None
+    
+    if session is None:
+        session = _assume_role(role_arn, tenant_id, role_session_name, sts_client)
+    
+    # Create a client with the temporary credentials
+    creds = session['credentials']
+    client = boto3.client(
+        service_name,
+        aws_access_key_id=creds['AccessKeyId'],
+        aws_secret_access_key=creds['SecretAccessKey'],
+        aws_session_token=creds['SessionToken'],
+        region_name=region_name
+    )
+    print(f"Created {service_name} client with assumed role for tenant: {tenant_id}")
+    
+    with _assumed_role_lock:
+        session['clients'][(service_name, region_name)] = client
+        _assumed_role_cache[key] = session
+        _assumed_role_cache.move_to_end(key)
+        while len(_assumed_role_cache) > ASSUMED_ROLE_CACHE_SIZE:
+            _assumed_role_cache.popitem(last=False)
+    return client
+
+
+def clear_assumed_role_cache() -> None:
+    """Drop all cached assumed-role credentials and clients."""
+    with _assumed_role_lock:
+        _assumed_role_cache.clear()
+
+
+def _assume_role(role_arn: str, tenant_id: str, role_session_name: str, sts_client: Any = None) -> dict[str, Any]:
+    """Assume the role for a tenant, returning a new cache entry without clients."""
+    global _sts_client
+    if sts_client is None:
+        # Initialize the shared STS client on first use
+        if _sts_client is None:
+            _sts_client = boto3.client('sts')
+        sts_client = _sts_client
+    
     # Log the role assumption attempt for debugging
     print(f"Attempting to assume role: {role_arn} with session name: {role_session_name} and TenantID tag: {tenant_id}")
     
     # Assume the role and tag the session with the tenant_id
-    assumed_role = sts.assume_role(
+    assumed_role = sts_client.assume_role(
         RoleArn=role_arn,
         RoleSessionName=role_session_name,
         Tags=[{'Key': 'TenantID', 'Value': tenant_id}]
@@ -147,14 +250,9 @@ def get_client_with_assumed_role(
     
     # Extract temporary credentials
     creds = assumed_role['Credentials']
-    
-    # Create and return a client with the temporary credentials
-    client = boto3.client(
-        service_name,
-        aws_access_key_id=creds['AccessKeyId'],
-        aws_secret_access_key=creds['SecretAccessKey'],
-        aws_session_token=creds['SessionToken']
-    )
-    
-    print(f"Created {service_name} client with assumed role for tenant: {tenant_id}")
-    return client
+    expiration = creds['Expiration']
+    if isinstance(expiration, str):
+        expiration = datetime.fromisoformat(expiration.replace('Z', '+00:00'))
+    if expiration.tzinfo is None:
+        expiration = expiration.replace(tzinfo=timezone.utc)
+    return {'expiration': expiration, 'credentials': creds, 'clients': {}}
@@ -132,7 +132,8 @@ export default function NewTemplate() {
                 (progress) => {
                     // Update user on progress
                     console.log('Textract progress:', progress);
-                }
+                },
+                outputBucket // Collect all result pages into one object in this bucket
             );
 
             // Store Textract blocks in Redux for bounding box rendering
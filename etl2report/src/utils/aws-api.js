@@ -211,7 +211,19 @@ export async function startTextractAnalysis(bucket, key, outputBucket, outputKey
     }
 }
 
-export async function getTextractResults(jobId, nextToken = null) {
+/**
+ * Get the status and results of a Textract job, one page at a time or, with
+ * collectAll, all pages assembled by the Lambda into one gzipped S3 object.
+ * 
+ * @param {string} jobId - The Textract job ID
+ * @param {string} nextToken - Token of the page to get (optional)
+ * @param {Object} options - Optional: { collectAll: true, resultBucket } to
+ *   collect every page into resultBucket once the job is complete, with
+ *   includeIndex: true to also write the block graph index (BlockIndex)
+ * @returns {Promise<Object>} Job status with one page of blocks, or with
+ *   resultUrl (a presigned URL of the collected results) in collectAll mode
+ */
+export async function getTextractResults(jobId, nextToken = null, options = {}) {
     try {
         // Get the auth session details
         const { token } = await getAuthSession();
@@ -239,6 +251,15 @@ export async function getTextractResults(jobId, nextToken = null) {
         if (nextToken) {
             requestBody.nextToken = nextToken;
         }
+        
+        // Ask the Lambda to collect all pages into S3
+        if (options.collectAll) {
+            requestBody.collectAll = true;
+            requestBody.resultBucket = options.resultBucket;
+            if (options.includeIndex) {
+                requestBody.includeIndex = true;
+            }
+        }
 
         // Call the API Gateway endpoint
         const response = await fetch(apiEndpoint, {
@@ -267,7 +288,10 @@ export async function getTextractResults(jobId, nextToken = null) {
             nextToken: data.nextToken,
             hasMoreResults: data.hasMoreResults || false,
             analyzeDocumentModelVersion: data.analyzeDocumentModelVersion,
-            warnings: data.warnings
+            warnings: data.warnings,
+            totalBlocks: data.totalBlocks,
+            resultUrl: data.resultUrl,
+            resultKey: data.resultKey
         };
     } catch (error) {
         console.error('Error getting Textract results:', error);
@@ -282,18 +306,33 @@ export async function getTextractResults(jobId, nextToken = null) {
  * @param {number} pollInterval - Polling interval in milliseconds (default: 5000)
  * @param {number} maxAttempts - Maximum number of polling attempts (default: 60)
  * @param {function} onProgress - Optional callback for progress updates
+ * @param {string} resultBucket - Optional S3 bucket; when given, the Lambda
+ *   collects all pages into one gzipped object there, which is fetched directly,
+ *   instead of each page being requested separately
  * @returns {Promise<Object>} Complete Textract results
  */
-export async function pollTextractResults(jobId, pollInterval = 5000, maxAttempts = 60, onProgress = null) {
+export async function pollTextractResults(jobId, pollInterval = 5000, maxAttempts = 60, onProgress = null, resultBucket = null) {
     try {
         let attempts = 0;
+        let collectOptions = resultBucket ? { collectAll: true, resultBucket: resultBucket } : {};
         
         // Poll until job completes or max attempts reached
         while (attempts < maxAttempts) {
             attempts++;
             
             // Get current job status
-            const result = await getTextractResults(jobId);
+            let result;
+            try {
+                result = await getTextractResults(jobId, null, collectOptions);
+            } catch (error) {
+                if (!collectOptions.collectAll) {
+                    throw error;
+                }
+                // Fall back to requesting each page (e.g. if collecting timed out)
+                console.warn('Collecting Textract results failed, fetching pages instead:', error);
+                collectOptions = {};
+                result = await getTextractResults(jobId);
+            }
             
             // Call progress callback if provided
             if (onProgress) {
@@ -316,6 +355,28 @@ export async function pollTextractResults(jobId, pollInterval = 5000, maxAttempt
                 throw new Error(`Textract job failed: ${result.statusMessage || 'Unknown error'}`);
             }
             
+            // Job succeeded and the Lambda collected all pages - fetch them from S3
+            if (result.resultUrl) {
+                const artifactResponse = await fetch(result.resultUrl);
+                if (!artifactResponse.ok) {
+                    throw new Error(`Failed to fetch collected Textract results: ${artifactResponse.status}`);
+                }
+                const textractData = await artifactResponse.json();
+                const blocks = textractData.Blocks || [];
+                
+                return {
+                    success: true,
+                    jobStatus: textractData.JobStatus || result.jobStatus,
+                    statusMessage: result.statusMessage,
+                    blocks: blocks,
+                    documentMetadata: textractData.DocumentMetadata,
+                    analyzeDocumentModelVersion: textractData.AnalyzeDocumentModelVersion,
+                    warnings: textractData.Warnings,
+                    blockIndex: textractData.BlockIndex,
+                    totalBlocks: blocks.length
+                };
+            }
+            
             // Job succeeded - now collect all paginated results
             if (result.jobStatus === 'SUCCEEDED' || result.jobStatus === 'PARTIAL_SUCCESS') {
                 let allBlocks = result.blocks || [];
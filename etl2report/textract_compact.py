@@ -0,0 +1,422 @@
+"""
+Columnar, array-backed form of Textract blocks and the expander back to
+Textract's shape.
+
+A block list becomes one column per field instead of one object per block:
+- Id: an ID table, in which block i has ID ids[i]; IDs that relationships
+  refer to but that are not among the blocks follow the blocks' IDs
+- BlockType, TextType, SelectionStatus and EntityTypes: interned, with one
+  integer code per block into a table of the distinct values
+- Page, RowIndex, ColumnIndex, RowSpan and ColumnSpan: integer arrays
+- Confidence, Geometry.BoundingBox, Geometry.Polygon and
+  Geometry.RotationAngle: float32 arrays (float64 if a value is not exactly
+  representable as float32); Polygon points are stored as CSR offsets into
+  one array of x, y pairs
+- Relationships: CSR arrays, with per-block offsets into relationship groups,
+  a type code per group, and per-group offsets into one array of integer
+  indexes into the ID table
+- Text: a list of strings
+
+A column holding a field only some blocks have lists those blocks in rows.
+Values a column cannot represent (an unexpected type or shape, a field
+Textract may add later) are kept as they are in extra, by block, so
+expand_blocks(compact_blocks(blocks)) == blocks for any block list.
+
+dumps_compact writes the arrays as base64 of their little-endian bytes inside
+a JSON document, so loading it parses a few long strings instead of an object
+per block and point.
+"""
+
+import base64
+import json
+import sys
+from array import array
+from typing import Any, Iterable
+
+from lambda_utils import dumps_json
+
+COMPACT_FORMAT = 'textract-blocks-compact'
+COMPACT_VERSION = 1
+
+# Fields stored as interned codes; EntityTypes values are lists of strings
+CODED_FIELDS = ('BlockType', 'TextType', 'SelectionStatus', 'EntityTypes')
+INTEGER_FIELDS = ('Page', 'RowIndex', 'ColumnIndex', 'RowSpan', 'ColumnSpan')
+FLOAT_FIELDS = ('Confidence',)
+TEXT_FIELDS = ('Text',)
+GEOMETRY_KEYS = ('BoundingBox', 'Polygon', 'RotationAngle')
+BOUNDING_BOX_KEYS = ('Width', 'Height', 'Left', 'Top')
+
+# Order of the keys in expanded blocks, as Textract writes them
+BLOCK_KEY_ORDER = (
+    'BlockType', 'Confidence', 'Text', 'TextType', 'RowIndex', 'ColumnIndex', 'RowSpan', 'ColumnSpan',
+    'Geometry', 'Id', 'Relationships', 'EntityTypes', 'SelectionStatus', 'Page'
+)
+
+
+class BlockCompactor:
+    """
+    Builds the compact form of a block list added in parts, e.g. one
+    GetDocumentAnalysis page at a time, so the blocks of earlier parts need
+    not be kept.
+
+    Example:
+        >>> compactor = BlockCompactor()
+        >>> compactor.add(page['Blocks'])
+        >>> compact = compactor.compact()
+    """
+
+    def __init__(self):
+        self.count = 0
+        self._ids: list[str | None] = []
+        self._columns: dict[str, dict[str, Any]] = {}
+        self._extra: dict[int, dict[str, Any]] = {}
+        # Relationships, resolved to ID table indexes once every block is known
+        self._relationship_rows = array('I')
+        self._relationship_offsets = array('I', [0])
+        self._relationship_types: list[str] = []
+        self._relationship_id_offsets = array('I', [0])
+        self._relationship_ids: list[str] = []
+
+    def add(self, blocks: Iterable[dict[str, Any]]) -> 'BlockCompactor':
+        for block in blocks:
+            self._add_block(block)
+        return self
+
+    def compact(self) -> dict[str, Any]:
+        """
+        Returns:
+            Compact form of the blocks added so far: format, version, count,
+            ids, columns and extra (see the module docstring)
+        """
+        ids = list(self._ids)
+        id_index = {block_id: i for i, block_id in enumerate(ids) if block_id is not None}
+        relationship_ids = array('I')
+        for block_id in self._relationship_ids:
+            index = id_index.get(block_id)
+            if index is None:
+                index = id_index[block_id] = len(ids)
+                ids.append(block_id)
+            relationship_ids.append(index)
+
+        columns: dict[str, Any] = {}
+        for name, column in self._columns.items():
+            columns[name] = _finish_column(column, self.count)
+        if len(self._relationship_rows):
+            types, type_codes = _intern(self._relationship_types)
+            columns['Relationships'] = _with_rows({
+                'offsets': _int_array(self._relationship_offsets),
+                'types': types,
+                'codes': type_codes,
+                'idOffsets': _int_array(self._relationship_id_offsets),
+                'ids': _int_array(relationship_ids)
+            }, self._relationship_rows, self.count)
+
+        return {
+            'format': COMPACT_FORMAT,
+            'version': COMPACT_VERSION,
+            'count': self.count,
+            'ids': ids,
+            'columns': columns,
+            'extra': {str(i): fields for i, fields in self._extra.items()}
+        }
+
+    def _add_block(self, block: dict[str, Any]) -> None:
+        row = self.count
+        self.count += 1
+        extra = {}
+
+        block_id = block.get('Id')
+        self._ids.append(block_id if isinstance(block_id, str) else None)
+
+        for key, value in block.items():
+            if key == 'Id':
+                stored = isinstance(value, str)
+            elif key in CODED_FIELDS:
+                stored = self._add_coded(key, row, value)
+            elif key in INTEGER_FIELDS:
+                stored = _is_uint32(value) and self._add_values(key, row, [value])
+            elif key in FLOAT_FIELDS:
+                stored = _is_number(value) and self._add_values(key, row, [value])
+            elif key in TEXT_FIELDS:
+                stored = isinstance(value, str) and self._add_values(key, row, [value])
+            elif key == 'Geometry':
+                stored = self._add_geometry(row, value)
+            elif key == 'Relationships':
+                stored = self._add_relationships(row, value)
+            else:
+                stored = False
+            if not stored:
+                extra[key] = value
+
+        if extra:
+            self._extra[row] = extra
+
+    def _column(self, name: str, kind: str) -> dict[str, Any]:
+        column = self._columns.get(name)
+        if column is None:
+            column = self._columns[name] = {'kind': kind, 'rows': array('I'), 'values': []}
+        return column
+
+    def _add_coded(self, name: str, row: int, value: Any) -> bool:
+        if name == 'EntityTypes':
+            if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+                return False
+            value = tuple(value)
+        elif not isinstance(value, str):
+            return False
+        column = self._column(name, 'coded')
+        column['rows'].append(row)
+        column['values'].append(value)
+        return True
+
+    def _add_values(self, name: str, row: int, values: list[Any], kind: str | None = None) -> bool:
+        if kind is None:
+            kind = 'integer' if name in INTEGER_FIELDS else 'float' if name in FLOAT_FIELDS else 'text'
+        column = self._column(name, kind)
+        column['rows'].append(row)
+        column['values'].extend(values)
+        return True
+
+    def _add_geometry(self, row: int, geometry: Any) -> bool:
+        if not isinstance(geometry, dict) or not geometry:
+            return False
+        if tuple(geometry) != tuple(key for key in GEOMETRY_KEYS if key in geometry):
+            return False  # unknown keys, or known ones in another order
+        box = geometry.get('BoundingBox')
+        polygon = geometry.get('Polygon')
+        angle = geometry.get('RotationAngle')
+        if 'BoundingBox' in geometry and not (
+                isinstance(box, dict) and tuple(box) == BOUNDING_BOX_KEYS
+                and all(_is_number(box[key]) for key in BOUNDING_BOX_KEYS)):
+            return False
+        if 'Polygon' in geometry and not (isinstance(polygon, list) and all(
+                isinstance(point, dict) and tuple(point) == ('X', 'Y') and _is_number(point['X'])
+                and _is_number(point['Y']) for point in polygon)):
+            return False
+        if 'RotationAngle' in geometry and not _is_number(angle):
+            return False
+
+        if 'BoundingBox' in geometry:
+            self._add_values('Geometry.BoundingBox', row, [box[key] for key in BOUNDING_BOX_KEYS], 'float')
+        if 'Polygon' in geometry:
+            column = self._column('Geometry.Polygon', 'points')
+            column.setdefault('offsets', array('I', [0]))
+            column['rows'].append(row)
+            for point in polygon:
+                column['values'].append(point['X'])
+                column['values'].append(point['Y'])
+            column['offsets'].append(len(column['values']) // 2)
+        if 'RotationAngle' in geometry:
+            self._add_values('Geometry.RotationAngle', row, [angle], 'float')
+        return True
+
+    def _add_relationships(self, row: int, relationships: Any) -> bool:
+        if not isinstance(relationships, list) or not all(
+                isinstance(group, dict) and tuple(group) == ('Type', 'Ids') and isinstance(group['Type'], str)
+                and isinstance(group['Ids'], list) and all(isinstance(item, str) for item in group['Ids'])
+                for group in relationships):
+            return False
+        self._relationship_rows.append(row)
+        for group in relationships:
+            self._relationship_types.append(group['Type'])
+            self._relationship_ids.extend(group['Ids'])
+            self._relationship_id_offsets.append(len(self._relationship_ids))
+        self._relationship_offsets.append(len(self._relationship_types))
+        return True
+
+
+def compact_blocks(blocks: Iterable[dict[str, Any]]) -> dict[str, Any]:
+    """
+    Convert Textract blocks to their compact, columnar form.
+
+    Args:
+        blocks: Textract blocks (the Blocks of an AnalyzeDocument or
+                GetDocumentAnalysis response)
+
+    Returns:
+        Compact form, see the module docstring; expand_blocks restores the blocks
+    """
+    return BlockCompactor().add(blocks).compact()
+
+
+def expand_blocks(compact: dict[str, Any]) -> list[dict[str, Any]]:
+    """
+    Convert the compact form back to Textract blocks.
+
+    Args:
+        compact: Result of compact_blocks (or of loads_compact)
+
+    Returns:
+        Blocks equal to those compacted
+
+    Raises:
+        ValueError: If compact is not in a supported compact format
+    """
+    if compact.get('format') != COMPACT_FORMAT or compact.get('version') != COMPACT_VERSION:
+        raise ValueError(f"Unsupported compact block format: {compact.get('format')} "
+                         f"version {compact.get('version')}")
+    count = compact['count']
+    ids = compact['ids']
+    columns = compact['columns']
+    fields: list[dict[str, Any]] = [{} for _ in range(count)]
+
+    for name, column in columns.items():
+        rows = column['rows'] if 'rows' in column else range(count)
+        if name == 'Relationships':
+            types, codes = column['types'], column['codes']
+            offsets, id_offsets, id_indexes = column['offsets'], column['idOffsets'], column['ids']
+            for i, row in enumerate(rows):
+                fields[row]['Relationships'] = [
+                    {'Type': types[codes[group]],
+                     'Ids': [ids[index] for index in id_indexes[id_offsets[group]:id_offsets[group + 1]]]}
+                    for group in range(offsets[i], offsets[i + 1])
+                ]
+        elif name == 'Geometry.Polygon':
+            values, offsets = _floats(column), column['offsets']
+            for i, row in enumerate(rows):
+                fields[row][name] = [
+                    {'X': values[2 * point], 'Y': values[2 * point + 1]}
+                    for point in range(offsets[i], offsets[i + 1])
+                ]
+        elif name == 'Geometry.BoundingBox':
+            values = _floats(column)
+            for i, row in enumerate(rows):
+                width, height, left, top = values[4 * i:4 * i + 4]
+                fields[row][name] = {'Width': width, 'Height': height, 'Left': left, 'Top': top}
+        elif 'table' in column:
+            table, codes = column['table'], column['codes']
+            for i, row in enumerate(rows):
+                value = table[codes[i]]
+                fields[row][name] = list(value) if isinstance(value, (list, tuple)) else value
+        else:
+            values = column['values'] if name in INTEGER_FIELDS or name in TEXT_FIELDS else _floats(column)
+            for i, row in enumerate(rows):
+                fields[row][name] = values[i]
+
+    extra = compact.get('extra', {})
+    blocks = []
+    for i, block_fields in enumerate(fields):
+        geometry = {}
+        for key in GEOMETRY_KEYS:
+            value = block_fields.pop('Geometry.' + key, None)
+            if value is not None:
+                geometry[key] = value
+        if geometry:
+            block_fields['Geometry'] = geometry
+        if i < len(ids) and ids[i] is not None:
+            block_fields['Id'] = ids[i]
+        block_extra = extra.get(str(i))
+        if block_extra:
+            block_fields.update(block_extra)
+        block = {key: block_fields.pop(key) for key in BLOCK_KEY_ORDER if key in block_fields}
+        block.update(block_fields)
+        blocks.append(block)
+    return blocks
+
+
+def dumps_compact(compact: dict[str, Any]) -> bytes:
+    """
+    Serialize the compact form (and any other top-level fields beside it) to
+    JSON, with each array as {'dtype': typecode, 'data': base64 of its
+    little-endian bytes}.
+    """
+    columns = {
+        name: {key: _encode_array(value) if isinstance(value, array) else value for key, value in column.items()}
+        for name, column in compact['columns'].items()
+    }
+    return dumps_json({**compact, 'columns': columns}).encode('utf-8')
+
+
+def loads_compact(data: bytes | str) -> dict[str, Any]:
+    """Parse the output of dumps_compact back to the compact form."""
+    compact = json.loads(data)
+    compact['columns'] = {
+        name: {key: _decode_array(value) if isinstance(value, dict) else value for key, value in column.items()}
+        for name, column in compact['columns'].items()
+    }
+    return compact
+
+
+def _finish_column(column: dict[str, Any], count: int) -> dict[str, Any]:
+    kind, values = column['kind'], column['values']
+    if kind == 'coded':
+        table, codes = _intern(values)
+        finished = {'table': [list(value) if isinstance(value, tuple) else value for value in table],
+                    'codes': codes}
+    elif kind == 'integer':
+        finished = {'values': _int_array(values)}
+    elif kind == 'text':
+        finished = {'values': values}
+    else:
+        floats, ints = _float_array(values)
+        finished = {'values': floats}
+        if len(ints):
+            finished['ints'] = ints
+        if kind == 'points':
+            finished['offsets'] = _int_array(column['offsets'])
+    return _with_rows(finished, column['rows'], count)
+
+
+def _with_rows(column: dict[str, Any], rows: array, count: int) -> dict[str, Any]:
+    """column with rows, unless every block has the field"""
+    if len(rows) != count:
+        column['rows'] = _int_array(rows)
+    return column
+
+
+def _intern(values: list[Any]) -> tuple[list[Any], array]:
+    table: dict[Any, int] = {}
+    codes = [table.setdefault(value, len(table)) for value in values]
+    return list(table), _int_array(codes)
+
+
+def _int_array(values: Iterable[int]) -> array:
+    """values in the smallest unsigned array type that holds them"""
+    values = values if isinstance(values, array) else array('I', values)
+    largest = max(values, default=0)
+    typecode = 'B' if largest < 1 << 8 else 'H' if largest < 1 << 16 else 'I'
+    return values if values.typecode == typecode else array(typecode, values)
+
+
+def _float_array(values: list[float]) -> tuple[array, array]:
+    """
+    values as float32, or float64 if any is not exactly representable as
+    float32, and the positions of the values that were ints
+    """
+    floats = array('f', values)
+    if floats.tolist() != values:
+        floats = array('d', values)
+    ints = array('I', (i for i, value in enumerate(values) if type(value) is int))
+    return floats, _int_array(ints)
+
+
+def _floats(column: dict[str, Any]) -> list[float | int]:
+    """Values of a float column as Python numbers, with ints restored"""
+    values = column['values'].tolist()
+    for i in column.get('ints', ()):
+        values[i] = int(values[i])
+    return values
+
+
+def _is_number(value: Any) -> bool:
+    return type(value) in (int, float) and value == value and abs(value) != float('inf') \
+        and (type(value) is float or abs(value) < 1 << 24)
+
+
+def _is_uint32(value: Any) -> bool:
+    return type(value) is int and 0 <= value < 1 << 32
+
+
+def _encode_array(values: array) -> dict[str, str]:
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return {'dtype': values.typecode, 'data': base64.b64encode(values.tobytes()).decode('ascii')}
+
+
+def _decode_array(encoded: dict[str, str]) -> array:
+    values = array(encoded['dtype'])
+    values.frombytes(base64.b64decode(encoded['data']))
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
@@ -0,0 +1,172 @@
+"""
+Index of the block graph of a Textract job, built once so consumers can look
+blocks up directly instead of scanning the block list.
+
+The index refers to blocks by their position in the block list and is JSON
+ready (object keys are strings, so block positions and page numbers used as
+keys are written as strings, e.g. index['relationships']['CHILD']['12']):
+- version, count: index format version and number of blocks
+- idToIndex: block Id -> position (the first block with that Id)
+- pages: page number -> [start, end) range of positions; into pageOrder when
+  it is present, which happens only when the blocks are not grouped by page
+  (Textract returns them grouped), otherwise into the blocks themselves
+- pageOrder: positions ordered by page, stable within a page
+- blockTypes: BlockType -> positions, in block order
+- relationships: relationship Type (CHILD, VALUE, ANSWER, ...) -> position
+  of the block holding it -> positions of the related blocks
+- parents: position -> positions of the blocks listing it as a CHILD
+- missingIds: IDs referenced by relationships but not among the blocks,
+  present only when there are any
+"""
+
+from typing import Any, Iterable
+
+INDEX_VERSION = 1
+
+
+class BlockIndexBuilder:
+    """
+    Builds the index of a block list added in parts, e.g. one
+    GetDocumentAnalysis page at a time; relationships are resolved by index,
+    so they may refer to blocks of later parts.
+
+    Example:
+        >>> builder = BlockIndexBuilder()
+        >>> builder.add(page['Blocks'])
+        >>> index = builder.index()
+    """
+
+    def __init__(self):
+        self.count = 0
+        self._id_to_index: dict[str, int] = {}
+        self._pages: list[Any] = []
+        self._block_types: dict[str, list[int]] = {}
+        self._relationships: list[tuple[int, str, list[str]]] = []
+
+    def add(self, blocks: Iterable[dict[str, Any]]) -> 'BlockIndexBuilder':
+        for block in blocks:
+            position = self.count
+            self.count += 1
+            block_id = block.get('Id')
+            if block_id is not None:
+                self._id_to_index.setdefault(block_id, position)
+            self._pages.append(block.get('Page'))
+            self._block_types.setdefault(block.get('BlockType'), []).append(position)
+            for relationship in block.get('Relationships') or []:
+                self._relationships.append((position, relationship.get('Type'), relationship.get('Ids') or []))
+        return self
+
+    def index(self) -> dict[str, Any]:
+        """
+        Returns:
+            Index of the blocks added so far, see the module docstring
+        """
+        id_to_index = self._id_to_index
+        relationships: dict[str, dict[str, list[int]]] = {}
+        parents: dict[str, list[int]] = {}
+        missing: dict[str, None] = {}
+        for position, relationship_type, ids in self._relationships:
+            related = []
+            for block_id in ids:
+                target = id_to_index.get(block_id)
+                if target is None:
+                    missing[block_id] = None
+                    continue
+                related.append(target)
+                if relationship_type == 'CHILD':
+                    parents.setdefault(str(target), []).append(position)
+            relationships.setdefault(relationship_type, {}).setdefault(str(position), []).extend(related)
+
+        index: dict[str, Any] = {
+            'version': INDEX_VERSION,
+            'count': self.count,
+            'idToIndex': dict(id_to_index),
+            **_page_ranges(self._pages),
+            'blockTypes': {str(block_type): list(positions) for block_type, positions in self._block_types.items()},
+            'relationships': relationships,
+            'parents': parents
+        }
+        if missing:
+            index['missingIds'] = list(missing)
+        return index
+
+
+def build_block_index(blocks: Iterable[dict[str, Any]]) -> dict[str, Any]:
+    """
+    Index a Textract block list.
+
+    Args:
+        blocks: Textract blocks (the Blocks of an AnalyzeDocument or
+                GetDocumentAnalysis response, or all pages of one)
+
+    Returns:
+        Index, see the module docstring
+    """
+    return BlockIndexBuilder().add(blocks).index()
+
+
+def get_block(blocks: list[dict[str, Any]], index: dict[str, Any], block_id: str) -> dict[str, Any] | None:
+    """The block with block_id, or None if there is none."""
+    position = index['idToIndex'].get(block_id)
+    return None if position is None else blocks[position]
+
+
+def page_blocks(blocks: list[dict[str, Any]], index: dict[str, Any], page: int) -> list[dict[str, Any]]:
+    """The blocks on page, in block order."""
+    start, end = index['pages'].get(str(page), (0, 0))
+    order = index.get('pageOrder')
+    if order is None:
+        return blocks[start:end]
+    return [blocks[position] for position in order[start:end]]
+
+
+def related_blocks(
+    blocks: list[dict[str, Any]],
+    index: dict[str, Any],
+    block_id: str,
+    relationship_type: str = 'CHILD'
+) -> list[dict[str, Any]]:
+    """
+    The blocks related to the block with block_id by relationship_type
+    (e.g. 'CHILD', 'VALUE' or 'ANSWER'), in the order the relationship lists
+    them; empty if the block or the relationship does not exist.
+    """
+    position = index['idToIndex'].get(block_id)
+    related = index['relationships'].get(relationship_type, {}).get(str(position), [])
+    return [blocks[target] for target in related]
+
+
+def parent_blocks(blocks: list[dict[str, Any]], index: dict[str, Any], block_id: str) -> list[dict[str, Any]]:
+    """The blocks listing the block with block_id as a CHILD."""
+    position = index['idToIndex'].get(block_id)
+    return [blocks[parent] for parent in index['parents'].get(str(position), [])]
+
+
+def _page_ranges(pages: list[Any]) -> dict[str, Any]:
+    """pages, and pageOrder when the blocks are not grouped by page"""
+    ranges: dict[str, list[int]] = {}
+    previous = object()
+    grouped = True
+    for position, page in enumerate(pages):
+        if page != previous:
+            key = str(page)
+            if key in ranges:
+                grouped = False
+                break
+            ranges[key] = [position, position]
+            previous = page
+        ranges[key][1] = position + 1
+    if grouped:
+        return {'pages': ranges}
+
+    order = sorted(range(len(pages)), key=lambda position: _page_sort_key(pages[position]))
+    ranges = {}
+    for offset, position in enumerate(order):
+        key = str(pages[position])
+        ranges.setdefault(key, [offset, offset])[1] = offset + 1
+    return {'pages': ranges, 'pageOrder': order}
+
+
+def _page_sort_key(page: Any) -> tuple:
+    """Pages in numeric order, then blocks without a (numeric) page"""
+    return (0, page) if type(page) is int else (1, str(page))
@@ -0,0 +1,247 @@
+"""
+Spatial index over the bounding boxes of Textract blocks, for finding the
+blocks in or near a region of a page.
+
+Each page gets a uniform grid over the normalized Geometry.BoundingBox
+coordinates (0 to 1 from the left and top of the page), with each block
+listed in every cell its box overlaps. A query visits only the cells its
+rectangle covers, or for nearest_block, rings of cells outward from the point
+until no closer block can remain. Blocks without a bounding box are not
+indexed.
+
+Distances are in normalized coordinates, so a unit across the page is not the
+same length as a unit down it unless the page is square.
+
+This is a library for Lambda code that resolves regions server-side; no
+handler uses it yet (template fields are bound to blocks in the browser).
+"""
+
+import math
+from typing import Any, Iterable
+
+# Average number of blocks per cell a page's grid is sized for, and the largest grid side
+BLOCKS_PER_CELL = 2
+MAX_CELLS_PER_SIDE = 128
+
+
+class SpatialIndex:
+    """
+    Per-page grid index of Textract blocks.
+
+    Example:
+        >>> index = SpatialIndex(blocks)
+        >>> words = index.blocks_in_rect(1, 0.1, 0.2, 0.3, 0.05, block_types=['WORD'])
+        >>> label = index.nearest_block(1, 0.5, 0.5, block_types=['LINE'])
+    """
+
+    def __init__(self, blocks: list[dict[str, Any]], cells_per_side: int | None = None):
+        """
+        Args:
+            blocks: Textract blocks
+            cells_per_side: Grid size of every page (default: sized for
+                            BLOCKS_PER_CELL blocks per cell on each page)
+        """
+        self.blocks = blocks
+        self._boxes: list[tuple[float, float, float, float] | None] = []
+        self._positions: dict[str, int] = {}
+        by_page: dict[Any, list[int]] = {}
+        for position, block in enumerate(blocks):
+            box = _box(block)
+            self._boxes.append(box)
+            block_id = block.get('Id')
+            if block_id is not None:
+                self._positions.setdefault(block_id, position)
+            if box is not None:
+                by_page.setdefault(block.get('Page'), []).append(position)
+
+        self._grids = {}
+        for page, positions in by_page.items():
+            size = cells_per_side or min(MAX_CELLS_PER_SIDE,
+                                         max(1, math.ceil(math.sqrt(len(positions) / BLOCKS_PER_CELL))))
+            self._grids[page] = _PageGrid(size, positions, self._boxes)
+
+    def blocks_in_rect(
+        self,
+        page: int,
+        left: float,
+        top: float,
+        width: float,
+        height: float,
+        within: bool = False,
+        margin: float = 0.0,
+        block_types: Iterable[str] | None = None
+    ) -> list[dict[str, Any]]:
+        """
+        Blocks on page whose bounding box meets a rectangle.
+
+        Args:
+            page: Page number
+            left, top, width, height: Rectangle, in the coordinates of
+                                      Geometry.BoundingBox
+            within: Only blocks entirely inside the rectangle, rather than
+                    every block overlapping it (touching counts)
+            margin: Distance to grow the rectangle by on every side, to
+                    include blocks near it
+            block_types: Only blocks of these types (e.g. ['WORD', 'LINE'])
+
+        Returns:
+            Matching blocks, in block order
+        """
+        rect = (left - margin, top - margin, left + width + margin, top + height + margin)
+        return [self.blocks[position] for position in self._positions_in(page, rect, within, _types(block_types))]
+
+    def nearest_block(
+        self,
+        page: int,
+        x: float,
+        y: float,
+        block_types: Iterable[str] | None = None,
+        max_distance: float | None = None
+    ) -> dict[str, Any] | None:
+        """
+        Block on page whose bounding box is closest to a point.
+
+        Args:
+            page: Page number
+            x, y: Point, in the coordinates of Geometry.BoundingBox
+            block_types: Only blocks of these types
+            max_distance: Ignore blocks farther from the point than this
+
+        Returns:
+            The closest block (distance 0 if the point is inside its box; the
+            first in block order on a tie), or None if there is none
+        """
+        grid = self._grids.get(page)
+        if grid is None:
+            return None
+        types = _types(block_types)
+        best_distance = math.inf if max_distance is None else max_distance
+        best_position = -1
+        seen = set()
+        for ring, positions in grid.rings(x, y):
+            # Blocks first met in this ring are at least ring - 1 cells from the point
+            if ring > 0 and best_distance < (ring - 1) / grid.size:
+                break
+            for position in positions:
+                if position in seen:
+                    continue
+                seen.add(position)
+                if types is not None and self.blocks[position].get('BlockType') not in types:
+                    continue
+                distance = _distance(self._boxes[position], x, y)
+                if distance < best_distance or distance == best_distance and (
+                        best_position < 0 or position < best_position):
+                    best_distance, best_position = distance, position
+        return self.blocks[best_position] if best_position >= 0 else None
+
+    def blocks_overlapping(
+        self,
+        block_id: str,
+        block_types: Iterable[str] | None = None
+    ) -> list[dict[str, Any]]:
+        """
+        Other blocks on the same page whose bounding box overlaps (or
+        touches) that of the block with block_id.
+
+        Returns:
+            Overlapping blocks, in block order; empty if the block does not
+            exist or has no bounding box
+        """
+        position = self._positions.get(block_id)
+        if position is None or self._boxes[position] is None:
+            return []
+        page = self.blocks[position].get('Page')
+        return [
+            self.blocks[other]
+            for other in self._positions_in(page, self._boxes[position], False, _types(block_types))
+            if other != position
+        ]
+
+    def _positions_in(self, page: Any, rect: tuple[float, float, float, float], within: bool,
+                      types: set[str] | None) -> list[int]:
+        grid = self._grids.get(page)
+        if grid is None:
+            return []
+        positions = []
+        for position in grid.candidates(rect):
+            box = self._boxes[position]
+            if within:
+                matches = rect[0] <= box[0] and rect[1] <= box[1] and box[2] <= rect[2] and box[3] <= rect[3]
+            else:
+                matches = _intersects(box, rect)
+            if matches and (types is None or self.blocks[position].get('BlockType') in types):
+                positions.append(position)
+        positions.sort()
+        return positions
+
+
+class _PageGrid:
+    """Cells of one page, each listing the positions of the blocks overlapping it"""
+
+    def __init__(self, size: int, positions: list[int], boxes: list):
+        self.size = size
+        self.cells: list[list[int]] = [[] for _ in range(size * size)]
+        for position in positions:
+            column_start, row_start, column_end, row_end = self._cell_range(boxes[position])
+            for row in range(row_start, row_end + 1):
+                offset = row * size
+                for column in range(column_start, column_end + 1):
+                    self.cells[offset + column].append(position)
+
+    def candidates(self, rect: tuple[float, float, float, float]) -> set[int]:
+        """Positions of the blocks in the cells rect covers"""
+        column_start, row_start, column_end, row_end = self._cell_range(rect)
+        found = set()
+        for row in range(row_start, row_end + 1):
+            offset = row * self.size
+            for column in range(column_start, column_end + 1):
+                found.update(self.cells[offset + column])
+        return found
+
+    def rings(self, x: float, y: float):
+        """
+        Yields (ring, positions) for the cells at each Chebyshev distance
+        ring from the cell of the point, nearest first
+        """
+        size = self.size
+        column, row = self._cell(x), self._cell(y)
+        for ring in range(size + 1):
+            positions = []
+            for r in range(row - ring, row + ring + 1):
+                if not 0 <= r < size:
+                    continue
+                step = 1 if r in (row - ring, row + ring) else 2 * ring or 1
+                for c in range(column - ring, column + ring + 1, step):
+                    if 0 <= c < size:
+                        positions.extend(self.cells[r * size + c])
+            yield ring, positions
+
+    def _cell(self, value: float) -> int:
+        return min(self.size - 1, max(0, int(value * self.size)))
+
+    def _cell_range(self, box: tuple[float, float, float, float]) -> tuple[int, int, int, int]:
+        return self._cell(box[0]), self._cell(box[1]), self._cell(box[2]), self._cell(box[3])
+
+
+def _box(block: dict[str, Any]) -> tuple[float, float, float, float] | None:
+    """(left, top, right, bottom) of the block's bounding box, if it has one"""
+    try:
+        box = block['Geometry']['BoundingBox']
+        left, top = float(box['Left']), float(box['Top'])
+        return left, top, left + float(box['Width']), top + float(box['Height'])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _intersects(a: tuple[float, float, float, float], b: tuple[float, float, float, float]) -> bool:
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+def _distance(box: tuple[float, float, float, float], x: float, y: float) -> float:
+    dx = max(box[0] - x, 0.0, x - box[2])
+    dy = max(box[1] - y, 0.0, y - box[3])
+    return math.hypot(dx, dy)
+
+
+def _types(block_types: Iterable[str] | None) -> set[str] | None:
+    return None if block_types is None else set(block_types)